@@ -1,6 +1,7 @@
 """SAM.gov Contract Opportunities API package."""
 
 from .sam_api import SAMAPIClient
+from .async_sam_api import AsyncSAMAPIClient
 
 __version__ = "2.0.0"
-__all__ = ["SAMAPIClient"]
+__all__ = ["SAMAPIClient", "AsyncSAMAPIClient"]
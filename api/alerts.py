@@ -0,0 +1,422 @@
+"""Saved-search alerts evaluated against local mirror changes
+
+Users save searches as subscriptions (NAICS codes, set-asides, states,
+organizations, notice types and keywords). After each mirror sync, the
+alert engine walks the notices that were added or changed since its last
+run and matches each one against every subscription at once through an
+inverted index, with no upstream queries. Matches are appended to an
+outbox that clients poll or stream.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .mirror import NOTICE_TYPES, OpportunityMirror
+
+logger = logging.getLogger(__name__)
+
+# Criteria a subscription can constrain besides keywords
+CRITERIA_FIELDS = ("naics_codes", "organization_ids", "states", "set_asides", "notice_types")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_subscriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    criteria TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alert_subscriptions_owner ON alert_subscriptions (owner);
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    subscription_id INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    notice_id TEXT NOT NULL,
+    change TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    notice TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (subscription_id, notice_id, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_alert_outbox_owner ON alert_outbox (owner, seq);
+CREATE TABLE IF NOT EXISTS alert_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def tokenize(text: Optional[str]) -> Set[str]:
+    """Lowercase word tokens of a text."""
+    return set(_TOKEN_RE.findall((text or "").lower()))
+
+
+def owner_id(api_key: str) -> str:
+    """Identify a subscriber by a hash of their API key, so keys are never stored."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def build_criteria(
+    q: Optional[str] = None,
+    naics_codes: Optional[str] = None,
+    set_asides: Optional[str] = None,
+    notice_type: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    state: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """
+    Normalize saved-search filters, given as for /api/opportunities, into criteria.
+
+    Comma-separated values match any of the values; keywords must all appear
+    in the notice's title, agency path or NAICS/PSC codes.
+
+    Returns:
+        Dict of CRITERIA_FIELDS plus ``keywords``, each a sorted list
+
+    Raises:
+        ValueError: If no criterion is given
+    """
+    def split(value: Optional[str], transform=lambda v: v) -> List[str]:
+        return sorted({transform(item.strip()) for item in (value or "").split(",") if item.strip()})
+
+    criteria = {
+        "naics_codes": split(naics_codes),
+        "organization_ids": split(organization_id),
+        "states": split(state, str.upper),
+        "set_asides": split(set_asides, str.upper),
+        "notice_types": split(notice_type, lambda code: NOTICE_TYPES.get(code.lower(), code)),
+        "keywords": sorted(tokenize(q)),
+    }
+    if not any(criteria.values()):
+        raise ValueError("A subscription needs at least one search criterion")
+    return criteria
+
+
+def notice_values(row: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """Values of a mirror change row for each criterion, plus its keyword tokens."""
+    return {
+        "naics_codes": {row["naics_code"]} if row["naics_code"] else set(),
+        "organization_ids": {code for code in (row["department_code"], row["subtier_code"], row["office_code"]) if code},
+        "states": {row["state"].upper()} if row["state"] else set(),
+        "set_asides": {row["type_of_set_aside"].upper()} if row["type_of_set_aside"] else set(),
+        "notice_types": {row["base_type"]} if row["base_type"] else set(),
+        "keywords": tokenize(" ".join(
+            value or "" for value in
+            (row["title"], row["full_parent_path_name"], row["naics_code"], row["classification_code"])
+        )),
+    }
+
+
+class SubscriptionIndex:
+    """Inverted index of subscriptions by the values they accept.
+
+    Each subscription is posted under the values of just one of its
+    criteria, the most selective it constrains (NAICS codes first, notice
+    types last). Matching a notice gathers the subscriptions posted under
+    the notice's own values and checks their remaining criteria, so its
+    cost depends on how many subscriptions share the notice's values, not
+    on how many exist.
+    """
+
+    # Criteria in the order they are tried as a subscription's posting key
+    ANCHOR_ORDER = ("naics_codes", "organization_ids", "keywords", "states", "set_asides", "notice_types")
+
+    def __init__(self, subscriptions: Iterable[Dict]):
+        """
+        Build the index.
+
+        Args:
+            subscriptions: Subscription dicts with ``id`` and ``criteria``
+        """
+        self.subscriptions: Dict[int, Dict] = {}
+        self._criteria: Dict[int, List[Tuple[str, frozenset]]] = {}
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+        self._match_all: List[int] = []
+        for subscription in subscriptions:
+            sid = subscription["id"]
+            self.subscriptions[sid] = subscription
+            constrained = [
+                (field, frozenset(subscription["criteria"][field]))
+                for field in self.ANCHOR_ORDER if subscription["criteria"].get(field)
+            ]
+            self._criteria[sid] = constrained
+            if not constrained:
+                self._match_all.append(sid)
+                continue
+            field, values = constrained[0]
+            # Every keyword must match, so any one of them is a sufficient posting key
+            for value in ([min(values, key=lambda keyword: (-len(keyword), keyword))] if field == "keywords" else values):
+                self._postings.setdefault((field, value), []).append(sid)
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def _accepts(self, sid: int, values: Dict[str, Set[str]]) -> bool:
+        for field, accepted in self._criteria[sid]:
+            if field == "keywords":
+                if not accepted <= values["keywords"]:
+                    return False
+            elif accepted.isdisjoint(values[field]):
+                return False
+        return True
+
+    def match(self, values: Dict[str, Set[str]]) -> List[int]:
+        """
+        Find the subscriptions a notice satisfies.
+
+        Args:
+            values: The notice's values, as returned by notice_values
+
+        Returns:
+            Matching subscription IDs
+        """
+        candidates: Set[int] = set()
+        for field in self.ANCHOR_ORDER:
+            for value in values[field]:
+                candidates.update(self._postings.get((field, value), ()))
+        return self._match_all + [sid for sid in candidates if self._accepts(sid, values)]
+
+
+class AlertEngine:
+    """Subscriptions, the outbox, and the job matching mirror changes to them.
+
+    State lives in SQLite (by default in the mirror database itself), so
+    every worker serves the same subscriptions and outbox. The engine's
+    position in the mirror's change order is saved with each batch of
+    outbox entries, in one transaction, so an interrupted run resumes
+    without losing or repeating alerts.
+    """
+
+    def __init__(
+        self,
+        mirror: OpportunityMirror,
+        db_path: Optional[str] = None,
+        batch_size: int = 1000,
+        retention_days: float = 30
+    ):
+        """
+        Initialize the engine.
+
+        Args:
+            mirror: Mirror whose changes are matched
+            db_path: SQLite database for subscriptions and the outbox;
+                defaults to the mirror database
+            batch_size: Mirror changes matched per transaction
+            retention_days: Days outbox entries are kept
+        """
+        self.mirror = mirror
+        self.db_path = db_path or mirror.db_path
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self.matched = 0
+
+    # Subscriptions
+
+    def create_subscription(self, owner: str, name: str, criteria: Dict[str, List[str]]) -> Dict:
+        """
+        Save a subscription. It matches notices changed from now on.
+
+        Args:
+            owner: Subscriber ID (see owner_id)
+            name: Display name
+            criteria: Criteria as returned by build_criteria
+
+        Returns:
+            The stored subscription
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO alert_subscriptions (owner, name, criteria, created_at) VALUES (?, ?, ?, ?)",
+                (owner, name, json.dumps(criteria), now)
+            )
+        return {"id": cursor.lastrowid, "name": name, "criteria": criteria, "created_at": now}
+
+    def _subscriptions(self, owner: Optional[str] = None) -> List[Dict]:
+        query, params = "SELECT * FROM alert_subscriptions", []
+        if owner is not None:
+            query, params = query + " WHERE owner = ?", [owner]
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY id", params).fetchall()
+        return [dict(row, criteria=json.loads(row["criteria"])) for row in rows]
+
+    def list_subscriptions(self, owner: str) -> List[Dict]:
+        """Return a subscriber's subscriptions."""
+        return [
+            {key: subscription[key] for key in ("id", "name", "criteria", "created_at")}
+            for subscription in self._subscriptions(owner)
+        ]
+
+    def delete_subscription(self, owner: str, subscription_id: int) -> bool:
+        """
+        Delete a subscription and its pending alerts.
+
+        Returns:
+            False if the subscriber has no such subscription
+        """
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM alert_subscriptions WHERE id = ? AND owner = ?", (subscription_id, owner)
+            ).rowcount
+            if deleted:
+                self._conn.execute("DELETE FROM alert_outbox WHERE subscription_id = ?", (subscription_id,))
+        return bool(deleted)
+
+    # Outbox
+
+    def fetch(self, owner: str, after: int = 0, limit: int = 100) -> Dict:
+        """
+        Read a subscriber's alerts in the order they were raised.
+
+        Args:
+            owner: Subscriber ID
+            after: Sequence number of the last alert already read
+            limit: Maximum alerts to return
+
+        Returns:
+            Dict with ``alerts`` and ``next`` (the cursor to pass as ``after``)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, subscription_id, notice_id, change, notice, created_at FROM alert_outbox "
+                "WHERE owner = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (owner, after, limit)
+            ).fetchall()
+        alerts = [
+            {
+                "seq": row["seq"],
+                "subscriptionId": row["subscription_id"],
+                "noticeId": row["notice_id"],
+                "change": row["change"],
+                "notice": json.loads(row["notice"]),
+                "createdAt": row["created_at"],
+            }
+            for row in rows
+        ]
+        return {"alerts": alerts, "next": alerts[-1]["seq"] if alerts else after}
+
+    # Matching
+
+    def _position(self) -> Optional[Tuple[float, int]]:
+        row = self._conn.execute("SELECT value FROM alert_meta WHERE key = 'position'").fetchone()
+        return tuple(json.loads(row["value"])) if row else None
+
+    def run(self) -> Dict[str, int]:
+        """
+        Match every mirror change since the last run against all subscriptions.
+
+        Returns:
+            Counts of changes read and alerts raised
+        """
+        started = time.time()
+        subscriptions = self._subscriptions()
+        with self._lock:
+            position = self._position()
+        counts = {"changes": 0, "alerts": 0}
+
+        if not subscriptions:
+            # Nothing to match; later subscriptions only see later changes anyway
+            position = self.mirror.last_change()
+            if position is not None:
+                with self._lock:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO alert_meta (key, value) VALUES ('position', ?)", (json.dumps(position),)
+                    )
+            return counts
+        if position is None:
+            position = (min(subscription["created_at"] for subscription in subscriptions), 0)
+
+        index = SubscriptionIndex(subscriptions)
+        while True:
+            changes = self.mirror.changes_since(position, self.batch_size)
+            if not changes:
+                break
+            entries = []
+            for row in changes:
+                if not row["active"]:
+                    continue
+                notice = {
+                    "noticeId": row["notice_id"],
+                    "title": row["title"],
+                    "fullParentPathName": row["full_parent_path_name"],
+                    "postedDate": row["posted_date"],
+                    "baseType": row["base_type"],
+                    "typeOfSetAside": row["type_of_set_aside"],
+                    "responseDeadLine": row["response_deadline"],
+                    "naicsCode": row["naics_code"],
+                    "state": row["state"],
+                }
+                encoded = None
+                for sid in index.match(notice_values(row)):
+                    subscription = index.subscriptions[sid]
+                    if row["updated_at"] < subscription["created_at"]:
+                        continue
+                    encoded = encoded or json.dumps(notice, separators=(",", ":"))
+                    entries.append((
+                        sid, subscription["owner"], row["notice_id"], row["change"], row["content_hash"],
+                        encoded, time.time()
+                    ))
+            position = (changes[-1]["updated_at"], changes[-1]["rowid"])
+
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    inserted = 0
+                    for entry in entries:
+                        inserted += self._conn.execute(
+                            "INSERT OR IGNORE INTO alert_outbox "
+                            "(subscription_id, owner, notice_id, change, content_hash, notice, created_at) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            entry
+                        ).rowcount
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO alert_meta (key, value) VALUES ('position', ?)", (json.dumps(position),)
+                    )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            counts["changes"] += len(changes)
+            counts["alerts"] += inserted
+
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM alert_outbox WHERE created_at < ?", (time.time() - self.retention_days * 86400,)
+            )
+        self.matched += counts["alerts"]
+        logger.info(
+            f"Matched {counts['changes']} mirror changes against {len(index)} subscriptions "
+            f"in {time.time() - started:.1f}s: {counts['alerts']} alerts"
+        )
+        return counts
+
+    def stats(self) -> Dict:
+        """Return subscription and outbox sizes."""
+        with self._lock:
+            subscriptions = self._conn.execute("SELECT COUNT(*) FROM alert_subscriptions").fetchone()[0]
+            pending = self._conn.execute("SELECT COUNT(*) FROM alert_outbox").fetchone()[0]
+            position = self._position()
+        return {
+            "subscriptions": subscriptions,
+            "outbox": pending,
+            "position": list(position) if position else None,
+            "matched": self.matched,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,526 @@
+"""Async SAM.gov API Client for Contract Opportunities"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import httpx
+
+from . import freshness
+from .cache import CacheEntry, LRUCache
+from .circuit_breaker import CircuitBreaker, is_upstream_failure
+from .metrics import Metrics
+from .rate_limiter import RateLimitExceeded, TokenBucketRateLimiter
+from .sam_api import DEFAULT_API_ROOT, SAMAPIClient
+from .response_cache import TieredCache, search_cache_key
+from .sam_schedule import get_ttl_until_next_update
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def create_http_client(
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 30.0,
+    timeout: float = 10.0,
+    connect_timeout: float = 5.0,
+    http2: bool = False
+) -> httpx.AsyncClient:
+    """
+    Create a pooled keep-alive HTTP client for talking to SAM.gov.
+
+    Args:
+        max_connections: Maximum number of concurrent connections
+        max_keepalive_connections: Maximum idle connections kept open
+        keepalive_expiry: Seconds an idle connection is kept open
+        timeout: Read/write/pool timeout in seconds
+        connect_timeout: Connection timeout in seconds
+        http2: Negotiate HTTP/2 (requires the ``h2`` package)
+
+    Returns:
+        Configured httpx.AsyncClient
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        http2=http2
+    )
+
+
+def is_key_failure(error: BaseException) -> bool:
+    """Whether an error is down to the API key that made the call (throttled or not authorized)."""
+    if isinstance(error, RateLimitExceeded):
+        return True
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code in (401, 403, 429)
+
+
+class AsyncSAMAPIClient(SAMAPIClient):
+    """Async client for the SAM.gov Contract Opportunities API.
+
+    Exposes the same methods as SAMAPIClient as coroutines, backed by a
+    pooled keep-alive ``httpx.AsyncClient`` so upstream calls and rate-limit
+    waits never block the event loop. Rate-limit waits longer than the
+    limiter's max_wait raise RateLimitExceeded instead of queueing.
+
+    Concurrent identical search, detail and description calls that miss the
+    cache are coalesced into a single upstream request. Stale cached search,
+    detail and description responses (see the cache's max_stale) are served
+    immediately and refreshed in the background. When given a
+    CircuitBreaker, calls fail fast with CircuitOpen while SAM.gov is
+    failing. When given Metrics, every upstream call records its latency and
+    status code per SAM.gov endpoint, and every rate-limit wait its duration.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[Union[LRUCache, TieredCache]] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        singleflight: Optional[SingleFlight] = None,
+        metrics: Optional[Metrics] = None,
+        api_root: str = DEFAULT_API_ROOT,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Initialize the async SAM API client.
+
+        Args:
+            api_key: SAM.gov API key
+            cache: Cache for search, detail and description responses
+            rate_limiter: Limiter shared with other clients and workers
+            http_client: Shared HTTP client; a private one is created (and
+                closed by aclose) when omitted
+            singleflight: Coalescer shared with other clients; a private one
+                is created when omitted
+            metrics: Shared metrics to record upstream calls into
+            api_root: Scheme and host of the SAM.gov API
+            circuit_breaker: Breaker shared with other clients; calls are
+                never short-circuited when omitted
+        """
+        super().__init__(api_key, cache=cache, rate_limiter=rate_limiter, api_root=api_root)
+        self._owns_http_client = http_client is None
+        self._http = http_client if http_client is not None else create_http_client()
+        self._singleflight = singleflight if singleflight is not None else SingleFlight()
+        self._metrics = metrics
+        self._breaker = circuit_breaker
+        # Cache key -> background refresh of a stale entry
+        self._revalidating: Dict[str, asyncio.Task] = {}
+        self.revalidations = 0
+        self.revalidation_failures = 0
+
+    async def aclose(self) -> None:
+        """Cancel background refreshes and close the HTTP client if this client created it."""
+        tasks = list(self._revalidating.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._owns_http_client:
+            await self._http.aclose()
+
+    def cache_stats(self) -> Dict:
+        """Return hit/miss/eviction counters for the response cache, and stale refresh counters."""
+        return dict(
+            self._cache.stats(),
+            revalidations=self.revalidations,
+            revalidation_failures=self.revalidation_failures
+        )
+
+    async def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, str]] = None,
+        max_wait: Optional[float] = None
+    ) -> httpx.Response:
+        """Issue a rate-limited, authenticated GET and raise for SAM.gov error responses."""
+        if self._breaker is not None:
+            self._breaker.before_call()
+        await self._acquire(max_wait)
+        started = time.perf_counter()
+        try:
+            response = await self._http.get(url, headers=self._build_headers(), params=params)
+        except httpx.HTTPError as e:
+            self._observe(url, "error", started)
+            self._record_outcome(e)
+            raise
+        self._observe(url, str(response.status_code), started)
+        try:
+            self._check_response(response)
+        except httpx.HTTPStatusError as e:
+            self._record_outcome(e)
+            raise
+        self._record_outcome()
+        return response
+
+    def _record_outcome(self, error: Optional[Exception] = None) -> None:
+        """Report a finished call to the circuit breaker; only SAM.gov-side failures count against it."""
+        if self._breaker is None:
+            return
+        if error is not None and is_upstream_failure(error):
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+
+    async def _acquire(self, max_wait: Optional[float] = None) -> None:
+        """Take a rate-limit token, recording how long the wait was."""
+        wait = await self._rate_limiter.acquire_async(self.api_key, max_wait=max_wait)
+        if self._metrics is not None:
+            self._metrics.rate_limit_wait.observe(wait)
+
+    def _observe(self, url: str, status: str, started: float) -> None:
+        if self._metrics is not None:
+            self._metrics.observe_upstream(url, status, time.perf_counter() - started)
+
+    async def _cache_get_entry(self, cache_key: str) -> Optional[CacheEntry]:
+        """Read the response cache without blocking the event loop on its disk tier."""
+        if isinstance(self._cache, TieredCache):
+            return await self._cache.get_entry_async(cache_key)
+        return self._cache.get_entry(cache_key)
+
+    async def _cache_contains(self, cache_key: str) -> bool:
+        """Check the response cache without blocking the event loop on its disk tier."""
+        if isinstance(self._cache, TieredCache):
+            return await self._cache.contains_async(cache_key)
+        return cache_key in self._cache
+
+    async def _cache_set(self, cache_key: str, value: Any) -> None:
+        """Cache a response until the next SAM.gov update, writing the disk tier off the event loop."""
+        ttl = get_ttl_until_next_update()
+        if isinstance(self._cache, TieredCache):
+            await self._cache.set_async(cache_key, value, ttl=ttl)
+        else:
+            self._cache.set(cache_key, value, ttl=ttl)
+
+    async def _lookup(self, cache_key: str, refresh: Callable[[], Awaitable[Any]]) -> Optional[CacheEntry]:
+        """
+        Look up a cached response, refreshing it in the background if it is stale.
+
+        Args:
+            cache_key: Cache key of the response
+            refresh: Zero-argument coroutine function that fetches and caches it
+
+        Returns:
+            The entry, fresh or stale, or None on a miss
+        """
+        entry = await self._cache_get_entry(cache_key)
+        if entry is None:
+            return None
+        if entry.stale and cache_key not in self._revalidating:
+            task = asyncio.ensure_future(self._singleflight.do(cache_key, refresh, rerun_on=is_key_failure))
+            self._revalidating[cache_key] = task
+            task.add_done_callback(lambda done, cache_key=cache_key: self._revalidated(cache_key, done))
+            self.revalidations += 1
+        freshness.note(True, entry.age, entry.ttl)
+        return entry
+
+    def _revalidated(self, cache_key: str, task: asyncio.Task) -> None:
+        if self._revalidating.get(cache_key) is task:
+            del self._revalidating[cache_key]
+        if not task.cancelled() and task.exception() is not None:
+            # The stale entry stays in service; the next request retries
+            self.revalidation_failures += 1
+            logger.debug(f"Background refresh of {cache_key} failed: {str(task.exception())}")
+
+    async def _fetch(self, cache_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Fetch a missing response, coalesced with identical in-flight calls."""
+        result = await self._singleflight.do(cache_key, fetch, rerun_on=is_key_failure)
+        freshness.note(False, 0.0, get_ttl_until_next_update())
+        return result
+
+    async def search_opportunities(
+        self,
+        keyword: Optional[str] = None,
+        naics_code: Optional[str] = None,
+        set_aside: Optional[str] = None,
+        status: Optional[str] = None,
+        page: int = 1,
+        limit: int = 10,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        organization_name: Optional[str] = None,
+        place_of_performance_state: Optional[str] = None,
+        place_of_performance_zipcode: Optional[str] = None
+    ) -> Dict:
+        """
+        Search contract opportunities with optional filters and caching based on SAM.gov's update schedule.
+
+        See SAMAPIClient.search_opportunities for the meaning of each filter.
+
+        Returns:
+            Dict containing opportunities and metadata
+        """
+        filters = dict(
+            keyword=keyword,
+            naics_code=naics_code,
+            set_aside=set_aside,
+            status=status,
+            page=page,
+            limit=limit,
+            posted_from=posted_from,
+            posted_to=posted_to,
+            organization_id=organization_id,
+            organization_name=organization_name,
+            place_of_performance_state=place_of_performance_state,
+            place_of_performance_zipcode=place_of_performance_zipcode
+        )
+        cache_key = search_cache_key(**filters)
+        fetch = lambda: self._fetch_search(cache_key, filters)
+        entry = await self._lookup(cache_key, fetch)
+        if entry is not None:
+            return entry.value
+
+        return await self._fetch(cache_key, fetch)
+
+    async def prefetch_search(self, refresh: bool = False, **filters) -> bool:
+        """
+        Fetch a search page into the cache ahead of demand.
+
+        Never waits for a rate-limit token: if none is free right now the
+        call raises RateLimitExceeded, so prefetching only uses spare budget.
+
+        Args:
+            refresh: Fetch even if the page is cached, replacing the entry
+            **filters: Arguments of search_opportunities
+
+        Returns:
+            True if the page was fetched, False if it was already cached
+        """
+        cache_key = search_cache_key(**filters)
+        if not refresh and await self._cache_contains(cache_key):
+            return False
+        await self._singleflight.do(
+            cache_key, lambda: self._fetch_search(cache_key, filters, max_wait=0.0), rerun_on=is_key_failure
+        )
+        return True
+
+    async def _fetch_search(self, cache_key: str, filters: Dict, max_wait: Optional[float] = None) -> Dict:
+        """Fetch a search page from SAM.gov and cache it."""
+        try:
+            params = self._build_search_params(**filters)
+
+            logger.debug(f"Searching opportunities with params: {params}")
+
+            response = await self._get(f"{self.base_url}/search", params, max_wait=max_wait)
+
+            result = self._parse_search_response(response.json(), filters["page"], filters["limit"])
+            await self._cache_set(cache_key, result)
+            return result
+        except httpx.HTTPError as e:
+            logger.error(f"Error searching opportunities: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
+
+    async def fetch_search_page(self, params: Dict[str, str], max_wait: Optional[float] = None) -> Dict:
+        """
+        Fetch one raw search page, bypassing the response cache.
+
+        Intended for bulk jobs such as mirror syncs, which page through large
+        result sets that are not worth caching.
+
+        Args:
+            params: SAM.gov search query parameters
+            max_wait: Longest rate-limit wait before giving up; math.inf waits
+                as long as needed
+
+        Returns:
+            Raw SAM.gov search response
+        """
+        try:
+            response = await self._get(f"{self.base_url}/search", params, max_wait=max_wait)
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching search page: {str(e)}")
+            raise
+
+    async def get_opportunity(self, notice_id: str) -> Dict:
+        """
+        Get detailed information about a specific opportunity.
+
+        Args:
+            notice_id: The unique identifier of the opportunity
+
+        Returns:
+            Dict containing opportunity details
+        """
+        cache_key = f"opportunity:{notice_id}"
+        fetch = lambda: self._fetch_opportunity(cache_key, notice_id)
+        entry = await self._lookup(cache_key, fetch)
+        if entry is not None:
+            return entry.value
+
+        return await self._fetch(cache_key, fetch)
+
+    async def _fetch_opportunity(self, cache_key: str, notice_id: str) -> Dict:
+        """Fetch a single opportunity from SAM.gov and cache it."""
+        try:
+            logger.debug(f"Getting opportunity details for notice ID: {notice_id}")
+
+            response = await self._get(
+                f"{self.base_url}/search",
+                {"noticeid": notice_id, "limit": "1"}
+            )
+            data = response.json()
+
+            # Extract the first (and should be only) opportunity
+            opportunities = data.get("opportunitiesData", [])
+            if not opportunities:
+                raise ValueError(f"Opportunity {notice_id} not found")
+
+            await self._cache_set(cache_key, opportunities[0])
+            return opportunities[0]
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting opportunity details: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
+
+    async def get_opportunity_description(self, notice_id: str) -> str:
+        """
+        Get the full description text of an opportunity.
+
+        Args:
+            notice_id: The unique identifier of the opportunity
+
+        Returns:
+            String containing the full description
+        """
+        cache_key = f"description:{notice_id}"
+        fetch = lambda: self._fetch_description(cache_key, notice_id)
+        entry = await self._lookup(cache_key, fetch)
+        if entry is not None:
+            return entry.value
+
+        return await self._fetch(cache_key, fetch)
+
+    async def _fetch_description(self, cache_key: str, notice_id: str) -> str:
+        """Fetch an opportunity description from SAM.gov and cache it."""
+        try:
+            logger.debug(f"Getting description for notice ID: {notice_id}")
+
+            response = await self._get(f"{self.desc_url}/noticedesc", {"noticeid": notice_id})
+            description = response.json().get("description", "")
+            await self._cache_set(cache_key, description)
+            return description
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting opportunity description: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
+
+    async def open_resource(self, resource_id: str, range_header: Optional[str] = None) -> httpx.Response:
+        """
+        Start streaming a resource file associated with an opportunity.
+
+        SAM.gov answers with a redirect to the file's storage location, which
+        is followed. The caller must close the returned response.
+
+        Args:
+            resource_id: The unique identifier of the resource file
+            range_header: Optional HTTP Range header forwarded upstream
+
+        Returns:
+            Streaming httpx.Response whose body has not been read yet
+        """
+        try:
+            logger.debug(f"Downloading resource file: {resource_id}")
+
+            await self._acquire()
+            headers = dict(self._build_headers(), accept="*/*")
+            if range_header:
+                headers["Range"] = range_header
+            url = f"{self.resources_url}/resources/files/{resource_id}/download"
+            request = self._http.build_request("GET", url, headers=headers)
+            started = time.perf_counter()
+            try:
+                response = await self._http.send(request, stream=True, follow_redirects=True)
+            except httpx.HTTPError:
+                self._observe(url, "error", started)
+                raise
+            # Time to response headers; the body is streamed by the caller
+            self._observe(url, str(response.status_code), started)
+            if response.is_error:
+                await response.aread()
+                await response.aclose()
+                self._check_response(response)
+            return response
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error downloading resource file: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
+
+    async def get_resource_file(self, resource_id: str) -> bytes:
+        """
+        Download a resource file associated with an opportunity.
+
+        Reads the whole file into memory; use open_resource to stream it.
+
+        Args:
+            resource_id: The unique identifier of the resource file
+
+        Returns:
+            Bytes containing the file content
+        """
+        response = await self.open_resource(resource_id)
+        try:
+            return await response.aread()
+        finally:
+            await response.aclose()
+
+    async def get_organizations(self) -> List[Dict]:
+        """
+        Get a list of organizations that post opportunities.
+
+        Returns:
+            List of organization dictionaries
+        """
+        try:
+            logger.info("Getting organizations list")
+
+            response = await self._get(
+                f"{self.base_url}/search",
+                self._catalog_params(organization_hierarchy=True)
+            )
+            return self._extract_organizations(response.json().get("opportunitiesData", []))
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting organizations: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
+
+    async def get_setasides(self) -> List[Dict]:
+        """
+        Get a list of valid set-aside types and codes.
+
+        Returns:
+            List of set-aside dictionaries
+        """
+        try:
+            logger.info("Getting set-aside types")
+
+            response = await self._get(f"{self.base_url}/search", self._catalog_params())
+            return self._extract_setasides(response.json().get("opportunitiesData", []))
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error getting set-aside types: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
@@ -0,0 +1,103 @@
+"""Batch lookup of opportunity details and descriptions by notice ID"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+import httpx
+
+from .async_sam_api import AsyncSAMAPIClient
+from .mirror import OpportunityMirror
+from .rate_limiter import RateLimitExceeded
+from .relevance import RelevanceScorer
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 300
+
+
+def _error(e: Exception) -> Dict:
+    """Describe a per-ID failure with the status the single-ID routes would return."""
+    if isinstance(e, RateLimitExceeded):
+        return {"status": 429, "detail": str(e), "retryAfter": e.retry_after_header}
+    if isinstance(e, ValueError):
+        return {"status": 404 if "not found" in str(e) else 400, "detail": str(e)}
+    if isinstance(e, httpx.HTTPStatusError):
+        return {"status": e.response.status_code, "detail": str(e)}
+    return {"status": 500, "detail": str(e)}
+
+
+async def fetch_batch(
+    client: AsyncSAMAPIClient,
+    notice_ids: List[str],
+    mirror: Optional[OpportunityMirror] = None,
+    include_description: bool = False,
+    concurrency: int = 8,
+    scorer: Optional[RelevanceScorer] = None
+) -> Dict:
+    """
+    Look up details, and optionally descriptions, for many notices at once.
+
+    Details come from the local mirror when it has them; the rest go through
+    the client, which answers from its response cache or fetches from
+    SAM.gov. Upstream fetches run concurrently, at most ``concurrency`` at a
+    time, and each draws from the caller's rate budget. A failure for one
+    notice is reported under ``errors`` and does not fail the batch.
+
+    Args:
+        client: Async SAM.gov client for the caller's API key
+        notice_ids: Notice IDs to look up; duplicates are ignored
+        mirror: Optional local mirror consulted before the client
+        include_description: Also return each notice's description
+        concurrency: Maximum concurrent upstream lookups
+        scorer: Optional relevance scorer; adds ``relevanceScore`` to each item
+
+    Returns:
+        Dict with ``opportunities`` (in request order), ``errors`` keyed by
+        notice ID and ``metadata`` counts
+    """
+    notice_ids = list(dict.fromkeys(notice_ids))
+    details = await asyncio.to_thread(mirror.get_many, notice_ids) if mirror is not None else {}
+    from_mirror = len(details)
+    descriptions: Dict[str, str] = {}
+    errors: Dict[str, Dict] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(notice_id: str) -> None:
+        try:
+            if notice_id not in details:
+                async with semaphore:
+                    details[notice_id] = await client.get_opportunity(notice_id)
+            if include_description:
+                async with semaphore:
+                    descriptions[notice_id] = await client.get_opportunity_description(notice_id)
+        except Exception as e:
+            errors[notice_id] = _error(e)
+
+    await asyncio.gather(*(lookup(notice_id) for notice_id in notice_ids))
+    if errors:
+        logger.warning(f"Batch lookup failed for {len(errors)} of {len(notice_ids)} notices")
+
+    opportunities = []
+    for notice_id in notice_ids:
+        if notice_id in errors:
+            continue
+        item = {"noticeId": notice_id, "opportunity": details[notice_id]}
+        if include_description:
+            item["description"] = descriptions[notice_id]
+        opportunities.append(item)
+    if scorer is not None and opportunities:
+        scores = await asyncio.to_thread(scorer.score, [item["opportunity"] for item in opportunities])
+        for item, score in zip(opportunities, scores):
+            item["relevanceScore"] = round(score, 4)
+
+    return {
+        "opportunities": opportunities,
+        "errors": errors,
+        "metadata": {
+            "requested": len(notice_ids),
+            "found": len(opportunities),
+            "failed": len(errors),
+            "fromMirror": from_mirror
+        }
+    }
@@ -0,0 +1,194 @@
+"""In-memory caching utilities for SAM.gov API responses"""
+
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+
+def estimate_size(obj: Any) -> int:
+    """
+    Estimate the memory footprint of a JSON-like object in bytes.
+
+    Walks dicts, lists and tuples recursively and sums ``sys.getsizeof`` for
+    every node. This is an approximation, but it is cheap enough to run once
+    per cache insert and tracks real usage closely for SAM.gov payloads.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return size
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its freshness."""
+
+    value: Any
+    age: float  # Seconds since the value was fetched
+    ttl: float  # Seconds until it expires; negative once stale, inf if it never expires
+
+    @property
+    def stale(self) -> bool:
+        return self.ttl <= 0
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate memory.
+
+    Entries are evicted least-recently-used first whenever either the entry
+    limit or the byte budget is exceeded, and may carry an optional TTL after
+    which lookups treat them as misses. Expired entries are kept for a
+    further ``max_stale`` seconds, during which get_entry can still return
+    them marked stale. Hit, miss and eviction counters are kept so cache
+    effectiveness can be inspected at runtime.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, max_stale: float = 0.0):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries to keep
+            max_bytes: Approximate memory budget in bytes
+            max_stale: Seconds expired entries are kept for stale lookups
+        """
+        if max_entries <= 0 or max_bytes <= 0:
+            raise ValueError("Cache limits must be positive")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_stale = max_stale
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether an unexpired entry exists, without counting a hit or miss."""
+        entry = self._data.get(key)
+        return entry is not None and (entry[2] is None or entry[2] > time.monotonic())
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, marking it most recently used."""
+        entry = self.get_entry(key, max_stale=0.0)
+        return entry.value if entry is not None else default
+
+    def get_entry(self, key: Hashable, max_stale: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Look up key, including entries expired less than max_stale seconds ago.
+
+        Args:
+            key: Cache key
+            max_stale: Seconds past expiry an entry is still returned;
+                the cache's own max_stale when omitted
+
+        Returns:
+            The entry, marked stale if expired, or None
+        """
+        max_stale = self.max_stale if max_stale is None else max_stale
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at, stored_at = entry
+            now = time.monotonic()
+            ttl = expires_at - now if expires_at is not None else math.inf
+            if ttl <= -self.max_stale:
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if ttl <= -max_stale:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if ttl > 0:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return CacheEntry(value, now - stored_at, ttl)
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        size: Optional[int] = None,
+        age: float = 0.0
+    ) -> None:
+        """
+        Store a value, evicting least-recently-used entries as needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until the entry expires; never expires when omitted
+            size: Precomputed size in bytes; estimated when omitted
+            age: Seconds since the value was fetched, if it was cached elsewhere first
+        """
+        if size is None:
+            size = estimate_size(value)
+        now = time.monotonic()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                # Never let a single oversized value flush the whole cache
+                return
+            self._data[key] = (value, size, expires_at, now - age)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key from the cache and return its value."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def clear(self) -> None:
+        """Remove all entries. Counters are preserved."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
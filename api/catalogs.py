@@ -0,0 +1,381 @@
+"""Precomputed organization and set-aside catalogs
+
+Catalogs are aggregated over every active notice posted in the last 90 days
+rather than derived from a single page of search results. Each build
+produces an immutable CatalogSnapshot with its JSON pre-encoded, and the
+CatalogStore swaps in the new snapshot in one assignment, so requests always
+see a complete catalog and are served without any work per request.
+
+Without a mirror, a build pages through the whole window upstream. Such
+live builds are done once per bulk update for all workers: the first
+worker claims the build in a shared SQLite database (SharedBuilds) and
+publishes the result, which the others load instead of building their own.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from types import MappingProxyType
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .async_sam_api import AsyncSAMAPIClient
+from .export import OpportunityExporter
+from .mirror import OpportunityMirror
+from .sam_schedule import get_eastern_date, get_ttl_until_next_update, get_update_window_end
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "sam_catalogs.sqlite3")
+
+# SAM.gov organization types by depth in fullParentPathCode
+ORGANIZATION_TYPES = ("Department/Ind. Agency", "Sub-Tier", "Office")
+
+# (fullParentPathName, fullParentPathCode, typeOfSetAside, typeOfSetAsideDescription) -> notices
+Counts = Dict[Tuple[Optional[str], Optional[str], Optional[str], Optional[str]], int]
+
+
+class CatalogSnapshot:
+    """Immutable organization and set-aside catalogs from one build."""
+
+    __slots__ = ("organizations", "setasides", "notices", "source", "built_at", "expires_at",
+                 "organizations_json", "setasides_json", "organizations_etag", "setasides_etag")
+
+    def __init__(self, organizations: List[Dict], setasides: List[Dict], notices: int, source: str, expires_at: float):
+        def freeze(name: str, value: Any) -> None:
+            object.__setattr__(self, name, value)
+
+        organizations_json = json.dumps(organizations, separators=(",", ":")).encode()
+        setasides_json = json.dumps(setasides, separators=(",", ":")).encode()
+        freeze("organizations", tuple(MappingProxyType(org) for org in organizations))
+        freeze("setasides", tuple(MappingProxyType(entry) for entry in setasides))
+        freeze("notices", notices)
+        freeze("source", source)
+        freeze("built_at", time.time())
+        freeze("expires_at", expires_at)
+        freeze("organizations_json", organizations_json)
+        freeze("setasides_json", setasides_json)
+        freeze("organizations_etag", '"' + hashlib.sha1(organizations_json).hexdigest() + '"')
+        freeze("setasides_etag", '"' + hashlib.sha1(setasides_json).hexdigest() + '"')
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CatalogSnapshot is immutable")
+
+    def status(self) -> Dict:
+        """Describe the snapshot without its contents."""
+        return {
+            "organizations": len(self.organizations),
+            "setasides": len(self.setasides),
+            "notices": self.notices,
+            "source": self.source,
+            "built_at": self.built_at,
+            "expires_at": self.expires_at,
+            "organizations_etag": self.organizations_etag,
+            "setasides_etag": self.setasides_etag,
+        }
+
+
+def build_catalogs(counts: Counts) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Aggregate per-combination notice counts into catalogs.
+
+    Every prefix of a notice's fullParentPathCode is an organization, named
+    by the matching segment of fullParentPathName, with the number of
+    notices posted by it or any of its sub-organizations.
+
+    Args:
+        counts: Notice counts per (path name, path code, set-aside code,
+            set-aside description)
+
+    Returns:
+        (organizations, setasides), each sorted by name or code
+    """
+    organizations: Dict[str, Dict] = {}
+    setasides: Dict[str, Dict] = {}
+
+    for (path_name, path_code, setaside, setaside_description), count in counts.items():
+        codes = [code for code in (path_code or "").split(".") if code]
+        names = (path_name or "").split(".")
+        parent_id = None
+        for depth, code in enumerate(codes):
+            org = organizations.get(code)
+            if org is None:
+                org = organizations[code] = {
+                    "id": code,
+                    "name": names[depth].strip() if depth < len(names) and names[depth].strip() else code,
+                    "type": ORGANIZATION_TYPES[min(depth, len(ORGANIZATION_TYPES) - 1)],
+                    "level": depth + 1,
+                    "parentId": parent_id,
+                    "path": ".".join(codes[:depth + 1]),
+                    "count": 0,
+                }
+            org["count"] += count
+            parent_id = code
+
+        if setaside:
+            entry = setasides.get(setaside)
+            if entry is None:
+                entry = setasides[setaside] = {
+                    "code": setaside,
+                    "description": setaside_description or setaside,
+                    "count": 0,
+                }
+            entry["count"] += count
+
+    return (
+        sorted(organizations.values(), key=lambda org: (org["path"].count("."), org["name"] or "")),
+        sorted(setasides.values(), key=lambda entry: entry["code"]),
+    )
+
+
+class SharedBuilds:
+    """Live catalog builds claimed and published through SQLite, shared by all workers."""
+
+    def __init__(self, db_path: Optional[str] = None, lease: float = 3600):
+        """
+        Initialize the build table.
+
+        Args:
+            db_path: SQLite database shared by all workers
+            lease: Seconds after which a claimed build that was never
+                published (e.g. its worker died) may be claimed again
+        """
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_builds (
+                run TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                claimed_at REAL NOT NULL,
+                catalogs TEXT
+            )
+            """
+        )
+
+    def claim(self, run: str, owner: str) -> bool:
+        """
+        Claim a build so only one worker performs it.
+
+        Args:
+            run: Identifier of the build, e.g. the bulk update it follows
+            owner: Identifier of the caller (e.g. hostname and PID)
+
+        Returns:
+            True if the caller should build, False if another worker has
+            built or is building it
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT claimed_at, catalogs FROM catalog_builds WHERE run = ?", (run,)
+                ).fetchone()
+                claimed = row is None or (row[1] is None and row[0] < now - self.lease)
+                if claimed:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO catalog_builds (run, owner, claimed_at) VALUES (?, ?, ?)",
+                        (run, owner, now)
+                    )
+                self._conn.execute("DELETE FROM catalog_builds WHERE claimed_at < ?", (now - 30 * 86400,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def publish(self, run: str, catalogs: Dict) -> None:
+        """Store a claimed build's result for the other workers."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE catalog_builds SET catalogs = ? WHERE run = ?",
+                (json.dumps(catalogs, separators=(",", ":")), run)
+            )
+
+    def load(self, run: str) -> Optional[Dict]:
+        """Return a published build, or None if it has not been published."""
+        with self._lock:
+            row = self._conn.execute("SELECT catalogs FROM catalog_builds WHERE run = ?", (run,)).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] is not None else None
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CatalogStore:
+    """Holder of the current CatalogSnapshot and the logic to rebuild it.
+
+    Builds aggregate the local mirror when it covers the catalog window,
+    which needs no upstream calls. Otherwise they page through the window's
+    live search results with the given client, at the cost of one upstream
+    call per 1000 notices; a live build is shared with the other workers
+    and kept until the next bulk update window ends.
+    """
+
+    def __init__(
+        self,
+        mirror: Optional[OpportunityMirror] = None,
+        client: Optional[AsyncSAMAPIClient] = None,
+        days: int = 90,
+        builds: Optional[SharedBuilds] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            mirror: Local mirror to aggregate, if configured
+            client: Client used for live builds without a mirror
+            days: Posting window covered by the catalogs
+            builds: Live builds shared with other workers; one backed by the
+                default database file is created when a client is given
+        """
+        self.mirror = mirror
+        self.client = client
+        self.days = days
+        self.builds = builds if builds is not None or client is None else SharedBuilds()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.snapshot: Optional[CatalogSnapshot] = None
+
+    async def _live_counts(self, posted_from: str, posted_to: str) -> Tuple[Counts, int]:
+        counts: Counts = {}
+        notices = 0
+        exporter = OpportunityExporter(self.client)
+        async for records in exporter.live_pages(posted_from=posted_from, posted_to=posted_to):
+            for record in records:
+                key = (
+                    record.get("fullParentPathName"),
+                    record.get("fullParentPathCode"),
+                    record.get("typeOfSetAside"),
+                    record.get("typeOfSetAsideDescription"),
+                )
+                counts[key] = counts.get(key, 0) + 1
+                notices += 1
+        return counts, notices
+
+    async def rebuild(self) -> Optional[CatalogSnapshot]:
+        """
+        Build fresh catalogs and swap them in.
+
+        Returns:
+            The new snapshot, or None if there were no notices to build from
+        """
+        started = time.time()
+        end = get_eastern_date()
+        posted_from = (end - timedelta(days=self.days)).isoformat()
+        posted_to = end.isoformat()
+        # The current day is never fully synced; the mirror is still good
+        # enough for aggregate counts when it covers everything before it
+        complete_to = (end - timedelta(days=1)).isoformat()
+        use_mirror = self.mirror is not None and (
+            self.client is None or await asyncio.to_thread(self.mirror.covers, posted_from, complete_to)
+        )
+        if use_mirror:
+            counts = await asyncio.to_thread(self.mirror.catalog_counts, posted_from)
+            notices, source = sum(counts.values()), "mirror"
+            expires_at = time.time() + get_ttl_until_next_update()
+        elif self.client is not None:
+            return await self._rebuild_live(posted_from, posted_to)
+        else:
+            raise RuntimeError("CatalogStore needs a mirror or a client to build from")
+
+        if not notices and self.snapshot is None:
+            # Nothing synced yet; leave the endpoints on their live fallback
+            logger.warning(f"No {source} notices to build catalogs from")
+            return None
+        organizations, setasides = await asyncio.to_thread(build_catalogs, counts)
+        snapshot = CatalogSnapshot(organizations, setasides, notices, source, expires_at=expires_at)
+        self.snapshot = snapshot
+        logger.info(
+            f"Built catalogs from {notices} {source} notices in {time.time() - started:.1f}s: "
+            f"{len(organizations)} organizations, {len(setasides)} set-asides"
+        )
+        return snapshot
+
+    async def _rebuild_live(self, posted_from: str, posted_to: str) -> Optional[CatalogSnapshot]:
+        """
+        Load the live build for the current bulk update, building it if no other worker has.
+
+        A live build is kept until the next bulk update window ends, which
+        also names it, so it is not redone hourly while the window is open.
+
+        Returns:
+            The new snapshot, or None if there were no notices or another
+            worker is still building
+        """
+        started = time.time()
+        window_end = get_update_window_end()
+        run = window_end.date().isoformat()
+        catalogs = await asyncio.to_thread(self.builds.load, run)
+        if catalogs is None:
+            if not await asyncio.to_thread(self.builds.claim, run, self.owner):
+                logger.info(f"Catalog build for {run} is in progress in another worker")
+                return None
+            counts, notices = await self._live_counts(posted_from, posted_to)
+            if not notices and self.snapshot is None:
+                logger.warning("No live notices to build catalogs from")
+                return None
+            organizations, setasides = await asyncio.to_thread(build_catalogs, counts)
+            catalogs = {"organizations": organizations, "setasides": setasides, "notices": notices}
+            await asyncio.to_thread(self.builds.publish, run, catalogs)
+        snapshot = CatalogSnapshot(
+            catalogs["organizations"], catalogs["setasides"], catalogs["notices"], "live",
+            expires_at=window_end.timestamp()
+        )
+        self.snapshot = snapshot
+        logger.info(
+            f"Loaded catalogs from {snapshot.notices} live notices in {time.time() - started:.1f}s: "
+            f"{len(snapshot.organizations)} organizations, {len(snapshot.setasides)} set-asides"
+        )
+        return snapshot
+
+    def close(self) -> None:
+        """Close the shared build database, if any."""
+        if self.builds is not None:
+            self.builds.close()
+
+    def is_stale(self) -> bool:
+        """Check whether the snapshot predates the latest bulk update or mirror sync."""
+        snapshot = self.snapshot
+        if snapshot is None or time.time() >= snapshot.expires_at:
+            return True
+        if self.mirror is not None:
+            last_sync = self.mirror.get_meta("last_sync_completed")
+            return last_sync is not None and float(last_sync) > snapshot.built_at
+        return False
+
+
+async def run_catalog_schedule(store: CatalogStore, check_interval: float = 300) -> None:
+    """
+    Keep the catalogs current, forever.
+
+    The catalogs are built at startup and rebuilt whenever SAM.gov has
+    published a bulk update (or the mirror has synced) since the last build.
+
+    Args:
+        store: Catalog store to maintain
+        check_interval: Seconds between staleness checks
+    """
+    while True:
+        try:
+            if await asyncio.to_thread(store.is_stale):
+                await store.rebuild()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The previous snapshot stays in service until a build succeeds
+            logger.error(f"Catalog build failed: {str(e)}")
+        await asyncio.sleep(check_interval)
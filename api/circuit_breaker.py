@@ -0,0 +1,123 @@
+"""Circuit breaker for upstream SAM.gov calls
+
+When SAM.gov is down or timing out, every call waits out the HTTP timeout
+before failing, tying up workers for seconds at a time. After
+``failure_threshold`` consecutive failures (timeouts, connection errors or
+5xx responses) the breaker opens and calls fail immediately with
+CircuitOpen, so callers can serve stale cached data or a fast 503 instead.
+After ``reset_timeout`` seconds one probe call is let through (half-open);
+if it succeeds the breaker closes, otherwise it stays open for another
+``reset_timeout``.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling SAM.gov while the circuit breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"SAM.gov is unavailable. Retry after {retry_after:.1f} seconds")
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Value for the HTTP Retry-After header (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Whether an error means SAM.gov itself is failing, rather than the request."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by every client in a process."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe
+        """
+        if failure_threshold <= 0:
+            raise ValueError("failure_threshold must be positive")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        """
+        Admit a call, or raise CircuitOpen.
+
+        While half-open a single probe is admitted; should it never report
+        back (e.g. cancelled), another is admitted after reset_timeout.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN:
+                remaining = self._opened_at + self.reset_timeout - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpen(remaining)
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self._probe_started is not None and now - self._probe_started < self.reset_timeout:
+                self.rejected += 1
+                raise CircuitOpen(self._probe_started + self.reset_timeout - now)
+            self._probe_started = now
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        with self._lock:
+            self._failures = 0
+            self.state = CLOSED
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold or on a failed probe."""
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self._failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+                self.opened += 1
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being short-circuited."""
+        return self.state != CLOSED
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state, the consecutive failure count and trip counters."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
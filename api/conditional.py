@@ -0,0 +1,226 @@
+"""Conditional GET and compression for JSON API responses
+
+Responses carry a strong ETag built from the SAM.gov data generation (see
+sam_schedule.get_data_generation) and a hash of the encoded body, so a
+client re-polling an unchanged page gets ``304 Not Modified`` with no body.
+Larger bodies are compressed with brotli (when the optional ``brotli``
+package is installed) or gzip, as negotiated through Accept-Encoding, and
+compressed variants are cached by ETag so repeated polls do not recompress.
+Bodies are encoded with orjson when it is installed, falling back to the
+standard-library encoder.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from .cache import LRUCache
+from .sam_schedule import get_data_generation
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder produces the same JSON, slower
+    orjson = None
+
+# Codings we can produce, in order of preference
+CODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode a compact UTF-8 JSON response body, with orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:  # e.g. integers beyond 64 bits; let the stdlib encoder handle them
+            pass
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the preferred coding the client accepts.
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+
+    Returns:
+        "br", "gzip", or None for identity
+    """
+    accepted: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = quality
+    for coding in CODINGS:
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if (tag[2:] if tag.startswith("W/") else tag) == opaque:
+            return True
+    return False
+
+
+def variant_etag(etag: str, coding: Optional[str]) -> str:
+    """ETag of one content coding of a body; strong ETags must differ between codings."""
+    return etag if coding is None else f'{etag[:-1]}-{coding}"'
+
+
+class ResponseMetrics:
+    """Per-route counters of responses, 304s and bytes saved."""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, body_bytes: int, sent_bytes: int, not_modified: bool) -> None:
+        """
+        Count one response.
+
+        Args:
+            route: Route path template
+            body_bytes: Size of the uncompressed body
+            sent_bytes: Size of the body actually sent (0 for 304)
+            not_modified: Whether the response was a 304
+        """
+        with self._lock:
+            counters = self._routes.setdefault(route, {
+                "responses": 0, "not_modified": 0, "compressed": 0, "body_bytes": 0, "sent_bytes": 0,
+            })
+            counters["responses"] += 1
+            counters["not_modified"] += not_modified
+            counters["compressed"] += 0 < sent_bytes < body_bytes
+            counters["body_bytes"] += body_bytes
+            counters["sent_bytes"] += sent_bytes
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return counters per route, with bytes saved by 304s and compression."""
+        with self._lock:
+            return {
+                route: dict(counters, saved_bytes=counters["body_bytes"] - counters["sent_bytes"])
+                for route, counters in self._routes.items()
+            }
+
+
+class ConditionalResponder:
+    """Builds JSON responses with ETags, 304s and content coding."""
+
+    def __init__(
+        self,
+        min_compress_bytes: int = 1024,
+        cache_max_entries: int = 256,
+        cache_max_bytes: int = 32 * 1024 * 1024
+    ):
+        """
+        Initialize the responder.
+
+        Args:
+            min_compress_bytes: Bodies smaller than this are sent uncompressed
+            cache_max_entries: Compressed variants kept in memory
+            cache_max_bytes: Memory budget for compressed variants
+        """
+        self.min_compress_bytes = min_compress_bytes
+        self.metrics = ResponseMetrics()
+        self._compressed = LRUCache(max_entries=cache_max_entries, max_bytes=cache_max_bytes)
+
+    def _compress(self, body: bytes, coding: str, etag: str) -> bytes:
+        key = (etag, coding)
+        compressed = self._compressed.get(key)
+        if compressed is None:
+            if coding == "br":
+                compressed = brotli.compress(body, quality=5)
+            else:
+                compressed = gzip.compress(body, compresslevel=6, mtime=0)
+            self._compressed.set(key, compressed, size=len(compressed))
+        return compressed
+
+    def respond(
+        self,
+        request: Request,
+        route: str,
+        content: Any = None,
+        body: Optional[bytes] = None,
+        etag: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """
+        Build the response for a JSON payload.
+
+        Args:
+            request: Incoming request (for If-None-Match and Accept-Encoding)
+            route: Route path template the metrics are recorded under
+            content: Payload to encode, unless ``body`` is given
+            body: Pre-encoded JSON body
+            etag: ETag of a pre-encoded body; derived from the body when omitted
+            headers: Extra headers for both 200 and 304 responses, e.g. freshness
+
+        Returns:
+            A 304, or a 200 with the body in the negotiated coding
+        """
+        if body is None:
+            body = encode_json(content)
+        if etag is None:
+            etag = f'"{get_data_generation()}-{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+        coding = negotiate_encoding(request.headers.get("accept-encoding")) if len(body) >= self.min_compress_bytes else None
+
+        # A client holding any coding of the same body already has current data
+        if any(etag_matches(request.headers.get("if-none-match"), variant_etag(etag, variant))
+               for variant in (None,) + CODINGS):
+            self.metrics.record(route, len(body), 0, not_modified=True)
+            return Response(status_code=304, headers={
+                "ETag": variant_etag(etag, coding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding",
+                **(headers or {}),
+            })
+
+        body_sent = body
+        if coding is not None:
+            compressed = self._compress(body, coding, etag)
+            if len(compressed) < len(body):
+                body_sent = compressed
+            else:
+                coding = None
+        response_headers = {"ETag": variant_etag(etag, coding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if coding is not None:
+            response_headers["Content-Encoding"] = coding
+        response_headers.update(headers or {})
+        self.metrics.record(route, len(body), len(body_sent), not_modified=False)
+        return Response(content=body_sent, media_type="application/json", headers=response_headers)
+
+    def stats(self) -> Dict:
+        """Return per-route metrics and compressed variant cache counters."""
+        return {"routes": self.metrics.stats(), "compressed_cache": self._compressed.stats()}
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with encode_json (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -0,0 +1,404 @@
+"""In-process index of SAM.gov entity registrations
+
+Built from a columnar snapshot of the entity export (see api.snapshot). The
+index itself is a handful of NumPy arrays, saved next to the snapshot and
+memory-mapped on later starts:
+
+- sorted UEI and CAGE keys with their row numbers, for exact lookup
+- sorted, normalized legal and DBA names, for case-insensitive prefix search
+- a trigram inverted index over the names, for fuzzy search
+- a NAICS inverted index, with the entity's SBA size status for each code
+- a bit set per entity of the socio-economic certifications set-asides
+  require
+
+Entity details are read from the snapshot's memory-mapped columns, so only
+the index arrays are resident: roughly 200 bytes per registration.
+"""
+
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .snapshot import ColumnarSnapshot, convert_csv, open_snapshot
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIRECTORY = "entity_index"
+INDEX_VERSION = 1
+
+# Name keys are truncated to this many bytes for prefix search
+NAME_KEY_BYTES = 48
+
+# Certification bits, from SAM.gov business type codes
+EIGHT_A = 1 << 0          # SBA 8(a) participant or joint venture (A6, JT)
+HUBZONE = 1 << 1          # SBA certified HUBZone firm (XX)
+SDVOSB = 1 << 2           # Service-disabled veteran-owned (QF)
+VOSB = 1 << 3             # Veteran-owned (A5)
+WOSB = 1 << 4             # Women-owned small business (8W, 8C)
+EDWOSB = 1 << 5           # Economically disadvantaged WOSB (8E, 8D)
+INDIAN = 1 << 6           # American Indian or tribally owned (OW, 3I, I)
+
+_BUSINESS_TYPE_BITS = {
+    "A6": EIGHT_A, "JT": EIGHT_A, "XX": HUBZONE, "QF": SDVOSB | VOSB, "A5": VOSB,
+    "8W": WOSB, "8C": WOSB, "8E": EDWOSB | WOSB, "8D": EDWOSB | WOSB, "OW": INDIAN, "3I": INDIAN, "I": INDIAN,
+}
+
+# typeOfSetAside -> certification bits of which the entity needs at least
+# one (0: being small for the NAICS code is enough)
+SETASIDE_REQUIREMENTS = {
+    "SBA": 0, "SBP": 0,
+    "8A": EIGHT_A, "8AN": EIGHT_A,
+    "HZC": HUBZONE, "HZS": HUBZONE,
+    "SDVOSBC": SDVOSB, "SDVOSBS": SDVOSB,
+    "WOSB": WOSB, "WOSBSS": WOSB,
+    "EDWOSB": EDWOSB, "EDWOSBSS": EDWOSB,
+    "VSA": VOSB, "VSS": VOSB,
+    "ISBEE": INDIAN, "IEE": INDIAN,
+}
+
+# Registrations for federal assistance only cannot receive contracts
+ASSISTANCE_ONLY_PURPOSE = "Z1"
+
+UEI = "entityRegistration_ueiSAM"
+CAGE = "entityRegistration_cageCode"
+LEGAL_NAME = "entityRegistration_legalBusinessName"
+DBA_NAME = "entityRegistration_dbaName"
+STATUS = "entityRegistration_registrationStatus"
+EXPIRATION = "entityRegistration_registrationExpirationDate"
+PURPOSE = "entityRegistration_purposeOfRegistrationCode"
+EXCLUDED = "entityRegistration_exclusionStatusFlag"
+ADDRESS = "coreData_physicalAddress"
+BUSINESS_TYPES = "coreData_businessTypes"
+GOODS_AND_SERVICES = "assertions_goodsAndServices"
+
+_NON_ALNUM_RE = re.compile(r"[^0-9A-Z]+")
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Uppercase a name and collapse punctuation and whitespace to single spaces."""
+    return _NON_ALNUM_RE.sub(" ", (name or "").upper()).strip()
+
+
+def _trigrams(name: str) -> np.ndarray:
+    """Distinct trigrams of a normalized name, packed into int32s."""
+    data = f" {name} ".encode("ascii", "ignore")
+    return np.unique(np.array(
+        [data[i] << 16 | data[i + 1] << 8 | data[i + 2] for i in range(len(data) - 2)], dtype=np.int32
+    ))
+
+
+def _inverted(keys: Sequence[int], rows: Sequence[int], extra: Optional[Sequence[bool]] = None) -> Dict[str, np.ndarray]:
+    """Build a compressed posting list: sorted distinct keys, offsets into rows."""
+    keys_array = np.asarray(keys, dtype=np.int32)
+    order = np.lexsort((np.asarray(rows, dtype=np.int32), keys_array))
+    distinct, starts = np.unique(keys_array[order], return_index=True)
+    result = {
+        "keys": distinct,
+        "offsets": np.append(starts, len(order)).astype(np.int64),
+        "rows": np.asarray(rows, dtype=np.int32)[order],
+    }
+    if extra is not None:
+        result["extra"] = np.asarray(extra, dtype=bool)[order]
+    return result
+
+
+def _certifications(business_types: Any) -> int:
+    """Certification bits from a coreData.businessTypes value."""
+    bits = 0
+    if isinstance(business_types, dict):
+        for entry in (business_types.get("businessTypeList") or []) + (business_types.get("sbaBusinessTypeList") or []):
+            if isinstance(entry, dict):
+                code = entry.get("businessTypeCode") or entry.get("sbaBusinessTypeCode")
+                bits |= _BUSINESS_TYPE_BITS.get(code or "", 0)
+    return bits
+
+
+def _naics(goods_and_services: Any) -> Dict[int, bool]:
+    """NAICS codes of an entity, mapped to whether it is small for each."""
+    codes: Dict[int, bool] = {}
+    if not isinstance(goods_and_services, dict):
+        return codes
+    for entry in goods_and_services.get("naicsList") or []:
+        code = str((entry or {}).get("naicsCode") or "")
+        if code.isdigit():
+            codes[int(code)] = codes.get(int(code), False) or (entry.get("sbaSmallBusiness") or "").upper() == "Y"
+    primary = str(goods_and_services.get("primaryNaics") or "")
+    if primary.isdigit():
+        codes.setdefault(int(primary), False)
+    return codes
+
+
+def build_index(snapshot: ColumnarSnapshot) -> Dict[str, np.ndarray]:
+    """
+    Build the index arrays for an entity snapshot.
+
+    Args:
+        snapshot: Snapshot of an entity export
+
+    Returns:
+        Dict of named index arrays
+    """
+    rows = len(snapshot)
+    index: Dict[str, np.ndarray] = {}
+
+    for name, column, width in (("uei", UEI, 12), ("cage", CAGE, 5)):
+        values = [(value or "").upper().encode() for value in snapshot.column(column)]
+        keys = np.array(values, dtype=f"S{width}")
+        present = np.flatnonzero(keys != b"")
+        order = present[np.argsort(keys[present], kind="stable")]
+        index[f"{name}_keys"], index[f"{name}_rows"] = keys[order], order.astype(np.int32)
+
+    name_keys: List[bytes] = []
+    name_rows: List[int] = []
+    trigrams: List[np.ndarray] = []
+    for row, names in enumerate(zip(snapshot.column(LEGAL_NAME), snapshot.column(DBA_NAME))):
+        normalized = [name for name in dict.fromkeys(normalize_name(value) for value in names) if name]
+        for name in normalized:
+            name_keys.append(name.encode("ascii", "ignore")[:NAME_KEY_BYTES])
+            name_rows.append(row)
+        trigrams.append(np.unique(np.concatenate([_trigrams(name) for name in normalized])) if normalized else
+                        np.zeros(0, dtype=np.int32))
+    keys = np.array(name_keys, dtype=f"S{NAME_KEY_BYTES}")
+    order = np.argsort(keys, kind="stable")
+    index["name_keys"], index["name_rows"] = keys[order], np.asarray(name_rows, dtype=np.int32)[order]
+    grams = _inverted(
+        np.concatenate(trigrams) if trigrams else np.zeros(0, dtype=np.int32),
+        np.repeat(np.arange(rows, dtype=np.int32), [len(row_grams) for row_grams in trigrams])
+    )
+    index["trigram_keys"], index["trigram_offsets"], index["trigram_rows"] = grams["keys"], grams["offsets"], grams["rows"]
+
+    flags = np.zeros(rows, dtype=np.uint8)
+    naics_keys: List[int] = []
+    naics_rows: List[int] = []
+    naics_small: List[bool] = []
+    for row, (business_types, goods) in enumerate(zip(snapshot.column(BUSINESS_TYPES), snapshot.column(GOODS_AND_SERVICES))):
+        flags[row] = _certifications(business_types)
+        for code, small in _naics(goods).items():
+            naics_keys.append(code)
+            naics_rows.append(row)
+            naics_small.append(small)
+    naics = _inverted(naics_keys, naics_rows, naics_small)
+    index["flags"] = flags
+    index["naics_keys"], index["naics_offsets"] = naics["keys"], naics["offsets"]
+    index["naics_rows"], index["naics_small"] = naics["rows"], naics["extra"]
+
+    status = np.array([(value or "").upper() == "ACTIVE" for value in snapshot.column(STATUS)], dtype=bool)
+    purpose = np.array([value != ASSISTANCE_ONLY_PURPOSE for value in snapshot.column(PURPOSE)], dtype=bool)
+    # The flag column is bool in snapshots, but str if an export left it blank throughout
+    excluded = np.array([str(value).upper() in ("TRUE", "Y", "YES") for value in snapshot.column(EXCLUDED)], dtype=bool)
+    index["registered"] = status & purpose & ~excluded
+    return index
+
+
+class EntityIndex:
+    """Lookup, name search and set-aside matching over entity registrations.
+
+    Open one with EntityIndex.load(); the index arrays are built on first
+    use of a snapshot and memory-mapped from its ``entity_index`` directory
+    afterwards.
+    """
+
+    def __init__(self, snapshot: ColumnarSnapshot, arrays: Dict[str, np.ndarray]):
+        """
+        Initialize the index.
+
+        Args:
+            snapshot: Entity snapshot the index was built from
+            arrays: Index arrays as returned by build_index
+        """
+        self.snapshot = snapshot
+        self.arrays = arrays
+        self.loaded_at = time.time()
+
+    @classmethod
+    def load(cls, path: str) -> "EntityIndex":
+        """
+        Open the index for an entity snapshot, building it if needed.
+
+        Args:
+            path: Entity snapshot directory, or the CSV export (converted
+                to a snapshot first if it has not been)
+
+        Returns:
+            EntityIndex over the snapshot
+        """
+        if path.endswith(".csv") and not os.path.isdir(os.path.splitext(path)[0] + ".snapshot"):
+            convert_csv(path)
+        snapshot = open_snapshot(path)
+        directory = os.path.join(snapshot.path, INDEX_DIRECTORY)
+        meta_path = os.path.join(directory, "meta.json")
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            meta = {}
+        if meta.get("version") == INDEX_VERSION and meta.get("snapshot_created_at") == snapshot.created_at:
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in meta["arrays"]}
+            return cls(snapshot, arrays)
+
+        started = time.time()
+        arrays = build_index(snapshot)
+        os.makedirs(directory, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        with open(meta_path, "w") as file:
+            json.dump({"version": INDEX_VERSION, "snapshot_created_at": snapshot.created_at, "arrays": list(arrays)}, file)
+        logger.info(f"Built entity index for {len(snapshot)} registrations in {time.time() - started:.1f}s")
+        return cls(snapshot, arrays)
+
+    def __len__(self) -> int:
+        return len(self.snapshot)
+
+    def _exact(self, name: str, key: str) -> Optional[int]:
+        keys = self.arrays[f"{name}_keys"]
+        encoded = key.strip().upper().encode()
+        position = int(np.searchsorted(keys, encoded))
+        if position < len(keys) and keys[position] == encoded:
+            return int(self.arrays[f"{name}_rows"][position])
+        return None
+
+    def summary(self, row: int) -> Dict:
+        """Return the commonly used fields of one registration."""
+        column = self.snapshot.column
+        expiration = column(EXPIRATION)[row]
+        address = column(ADDRESS)[row] or {}
+        return {
+            "ueiSAM": column(UEI)[row],
+            "cageCode": column(CAGE)[row],
+            "legalBusinessName": column(LEGAL_NAME)[row],
+            "dbaName": column(DBA_NAME)[row],
+            "registrationStatus": column(STATUS)[row],
+            "registrationExpirationDate": None if np.isnat(expiration) else str(expiration),
+            "city": address.get("city"),
+            "stateOrProvinceCode": address.get("stateOrProvinceCode"),
+            "countryCode": address.get("countryCode"),
+        }
+
+    def get(self, uei: Optional[str] = None, cage: Optional[str] = None) -> Optional[Dict]:
+        """
+        Look up a registration by UEI or CAGE code.
+
+        Args:
+            uei: Unique Entity ID
+            cage: CAGE code
+
+        Returns:
+            The full registration, nested as in the SAM.gov entity API, or
+            None if it is not in the snapshot
+        """
+        row = self._exact("uei", uei) if uei else self._exact("cage", cage) if cage else None
+        if row is None:
+            return None
+        return self.snapshot.records(row, row + 1, nested=True)[0]
+
+    def search(self, query: str, fuzzy: bool = False, limit: int = 20) -> List[Dict]:
+        """
+        Search registrations by legal or DBA name, ignoring case and punctuation.
+
+        Args:
+            query: Name or name prefix
+            fuzzy: Rank by similarity instead of requiring a prefix match
+            limit: Maximum results
+
+        Returns:
+            Summaries of matching registrations; fuzzy results carry a
+            ``score`` between 0 and 1
+        """
+        name = normalize_name(query)
+        if not name:
+            raise ValueError("Search query must contain letters or digits")
+        if not fuzzy:
+            keys = self.arrays["name_keys"]
+            prefix = name.encode("ascii", "ignore")[:NAME_KEY_BYTES]
+            start = int(np.searchsorted(keys, prefix, side="left"))
+            stop = int(np.searchsorted(keys, prefix + b"\xff", side="right"))
+            rows = list(dict.fromkeys(self.arrays["name_rows"][start:stop].tolist()))[:limit]
+            return [self.summary(row) for row in rows]
+
+        # Rank candidates sharing the most trigrams with the query, then
+        # rescore the best of them by edit similarity
+        keys = self.arrays["trigram_keys"]
+        grams = _trigrams(name)
+        positions = np.searchsorted(keys, grams)
+        positions = positions[(positions < len(keys)) & (keys[np.minimum(positions, len(keys) - 1)] == grams)]
+        offsets = self.arrays["trigram_offsets"]
+        postings = [self.arrays["trigram_rows"][offsets[p]:offsets[p + 1]] for p in positions.tolist()]
+        if not postings:
+            return []
+        rows, shared = np.unique(np.concatenate(postings), return_counts=True)
+        candidates = rows[np.argsort(-shared, kind="stable")[:max(limit * 5, 50)]].tolist()
+        legal, dba = self.snapshot.column(LEGAL_NAME), self.snapshot.column(DBA_NAME)
+        scored = []
+        for row in candidates:
+            score = max(
+                difflib.SequenceMatcher(None, name, normalize_name(value)).ratio()
+                for value in (legal[row], dba[row]) if value
+            )
+            scored.append((score, row))
+        scored.sort(key=lambda item: -item[0])
+        return [dict(self.summary(row), score=round(score, 4)) for score, row in scored[:limit]]
+
+    def match(self, naics_code: str, set_aside: Optional[str] = None, limit: int = 100, offset: int = 0) -> Dict:
+        """
+        Find registered entities eligible for an opportunity.
+
+        An entity matches when its registration is active, unexpired, not
+        excluded and covers contracts, it lists the NAICS code and, for a
+        set-aside, it is small for that NAICS code and holds a qualifying
+        certification.
+
+        Args:
+            naics_code: The opportunity's naicsCode
+            set_aside: The opportunity's typeOfSetAside, if any
+            limit: Maximum entities returned
+            offset: Matches to skip, for paging
+
+        Returns:
+            Dict with ``entities`` (summaries) and ``totalRecords``
+        """
+        naics_code = (naics_code or "").strip()
+        if not naics_code.isdigit():
+            raise ValueError(f"Invalid NAICS code: {naics_code}")
+        set_aside = (set_aside or "").strip().upper() or None
+        if set_aside in ("NONE", "N/A"):
+            set_aside = None
+        if set_aside is not None and set_aside not in SETASIDE_REQUIREMENTS:
+            raise ValueError(f"Unknown set-aside type: {set_aside}")
+
+        keys = self.arrays["naics_keys"]
+        position = int(np.searchsorted(keys, int(naics_code)))
+        if position >= len(keys) or keys[position] != int(naics_code):
+            return {"entities": [], "totalRecords": 0}
+        start, stop = self.arrays["naics_offsets"][position:position + 2].tolist()
+        rows = np.asarray(self.arrays["naics_rows"][start:stop])
+
+        eligible = np.asarray(self.arrays["registered"])[rows]
+        expiration = np.asarray(self.snapshot.column(EXPIRATION))[rows]
+        eligible &= np.isnat(expiration) | (expiration >= np.datetime64(date.today(), "D"))
+        if set_aside is not None:
+            eligible &= np.asarray(self.arrays["naics_small"][start:stop])
+            required = SETASIDE_REQUIREMENTS[set_aside]
+            if required:
+                eligible &= (np.asarray(self.arrays["flags"])[rows] & required) != 0
+        matches = rows[eligible]
+        return {
+            "entities": [self.summary(row) for row in matches[offset:offset + limit].tolist()],
+            "totalRecords": int(len(matches)),
+        }
+
+    def stats(self) -> Dict:
+        """Return the index size."""
+        return {
+            "snapshot": self.snapshot.path,
+            "registrations": len(self.snapshot),
+            "naics_codes": int(len(self.arrays["naics_keys"])),
+            "index_bytes": int(sum(array.nbytes for array in self.arrays.values())),
+            "loaded_at": self.loaded_at,
+        }
@@ -0,0 +1,237 @@
+"""Streaming bulk export of opportunity searches as NDJSON or CSV
+
+Exports walk an entire result set instead of one page of it. Upstream pages
+are requested a few at a time ahead of the consumer, and date ranges with
+more results than SAM.gov will page through are split into smaller posted-date
+windows. Records are written out as they arrive, so memory use depends on
+the page size and prefetch depth, not on the size of the export.
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import math
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+from .async_sam_api import AsyncSAMAPIClient
+from .mirror import OpportunityMirror, _nested, to_iso_date
+
+logger = logging.getLogger(__name__)
+
+# CSV columns and the path of each within a SAM.gov opportunity record
+CSV_FIELDS = [
+    ("noticeId", ("noticeId",)),
+    ("title", ("title",)),
+    ("solicitationNumber", ("solicitationNumber",)),
+    ("fullParentPathName", ("fullParentPathName",)),
+    ("fullParentPathCode", ("fullParentPathCode",)),
+    ("postedDate", ("postedDate",)),
+    ("type", ("type",)),
+    ("baseType", ("baseType",)),
+    ("archiveDate", ("archiveDate",)),
+    ("typeOfSetAside", ("typeOfSetAside",)),
+    ("typeOfSetAsideDescription", ("typeOfSetAsideDescription",)),
+    ("responseDeadLine", ("responseDeadLine",)),
+    ("naicsCode", ("naicsCode",)),
+    ("classificationCode", ("classificationCode",)),
+    ("active", ("active",)),
+    ("placeOfPerformanceState", ("placeOfPerformance", "state", "code")),
+    ("placeOfPerformanceZip", ("placeOfPerformance", "zip")),
+    ("uiLink", ("uiLink",)),
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def ndjson_chunks(pages: AsyncIterator[List[Dict]]) -> AsyncIterator[str]:
+    """Encode pages of records as newline-delimited JSON, one chunk per page."""
+    async for records in pages:
+        yield "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+
+
+async def csv_chunks(pages: AsyncIterator[List[Dict]]) -> AsyncIterator[str]:
+    """Encode pages of records as CSV rows of CSV_FIELDS, one chunk per page.
+
+    The header row is sent with the first page.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in CSV_FIELDS])
+    async for records in pages:
+        for record in records:
+            writer.writerow([_nested(record, *path) for _, path in CSV_FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def prime(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Produce the first chunk of a stream before the response starts.
+
+    Errors in the first upstream page (bad filters, rate limiting) then
+    surface as ordinary error responses instead of a truncated download.
+
+    Args:
+        chunks: Stream of response body chunks
+
+    Returns:
+        Stream yielding the same chunks
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def body() -> AsyncIterator[str]:
+        if first is None:
+            return
+        yield first
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; aborting the stream is the only signal left
+            logger.error(f"Export aborted: {str(e)}")
+            raise
+
+    return body()
+
+
+class OpportunityExporter:
+    """Walk every result of a search, page by page.
+
+    Live exports read SAM.gov in posted-date windows. Each window is probed
+    with its first page; if it reports more than ``max_window_records``
+    results it is halved and each half is read separately, down to single
+    days. The remaining pages of a window are fetched with up to
+    ``prefetch`` requests in flight, all drawn from the caller's rate budget.
+    Mirror exports read the local mirror with keyset paging instead.
+    """
+
+    def __init__(
+        self,
+        client: AsyncSAMAPIClient,
+        mirror: Optional[OpportunityMirror] = None,
+        page_size: int = 1000,
+        prefetch: int = 3,
+        max_window_records: int = 10000
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            client: Async SAM.gov client used for live exports
+            mirror: Local mirror used for mirror exports
+            page_size: Records requested per page (SAM.gov allows up to 1000)
+            prefetch: Upstream pages requested ahead of the consumer
+            max_window_records: Largest result count read from a single
+                posted-date window before it is split
+        """
+        self.client = client
+        self.mirror = mirror
+        self.page_size = page_size
+        self.prefetch = max(1, prefetch)
+        self.max_window_records = max_window_records
+
+    async def _fetch(self, params: Dict[str, str], offset: int) -> Dict:
+        return await self.client.fetch_search_page(dict(params, offset=str(offset)), max_wait=math.inf)
+
+    async def _pages_ahead(self, params: Dict[str, str], offsets: Iterable[int]) -> AsyncIterator[Dict]:
+        """Fetch pages at the given offsets in order, keeping several in flight."""
+        offsets = iter(offsets)
+        pending = deque()
+        try:
+            for offset in offsets:
+                pending.append(asyncio.ensure_future(self._fetch(params, offset)))
+                if len(pending) >= self.prefetch:
+                    break
+            while pending:
+                data = await pending.popleft()
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(asyncio.ensure_future(self._fetch(params, offset)))
+                yield data
+        finally:
+            # The consumer went away or a page failed; drop the fetches ahead
+            for task in pending:
+                task.cancel()
+
+    async def _window_pages(self, filters: Dict[str, Any], start: date, end: date) -> AsyncIterator[List[Dict]]:
+        """Yield every page of one posted-date window, splitting it if too large."""
+        params = self.client._build_search_params(
+            **filters,
+            page=1,
+            limit=self.page_size,
+            posted_from=start.isoformat(),
+            posted_to=end.isoformat()
+        )
+        first = await self._fetch(params, 0)
+        total = first.get("totalRecords", 0)
+
+        if total > self.max_window_records and start < end:
+            middle = start + (end - start) // 2
+            logger.info(f"Splitting export window {start} to {end} ({total} records)")
+            async for records in self._window_pages(filters, middle + timedelta(days=1), end):
+                yield records
+            async for records in self._window_pages(filters, start, middle):
+                yield records
+            return
+        if total > self.max_window_records:
+            logger.warning(f"Export window {start} has {total} records; later pages may be refused upstream")
+
+        yield _records(first)
+        async for data in self._pages_ahead(params, range(self.page_size, total, self.page_size)):
+            records = _records(data)
+            if records:
+                yield records
+
+    async def live_pages(self, posted_from: Optional[str] = None, posted_to: Optional[str] = None, **filters: Any) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of raw SAM.gov records for a search, newest windows first.
+
+        Args:
+            posted_from: Start date (YYYY-MM-DD or MM/dd/yyyy); defaults to
+                90 days before posted_to
+            posted_to: End date (YYYY-MM-DD or MM/dd/yyyy); defaults to today
+            **filters: Any other search filter except page and limit
+        """
+        end = date.fromisoformat(to_iso_date(posted_to)) if posted_to and posted_from else datetime.now().date()
+        start = date.fromisoformat(to_iso_date(posted_from)) if posted_to and posted_from else end - timedelta(days=90)
+        if start > end:
+            raise ValueError("posted_from must not be after posted_to")
+        async for records in self._window_pages(filters, start, end):
+            yield records
+
+    async def mirror_pages(self, **filters: Any) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of records from the local mirror, newest first.
+
+        Args:
+            **filters: Any mirror search filter except page and limit
+        """
+        after = None
+        while True:
+            records = await asyncio.to_thread(self.mirror.scan, after=after, limit=self.page_size, **filters)
+            if not records:
+                return
+            yield records
+            if len(records) < self.page_size:
+                return
+            last = records[-1]
+            after = (last["postedDate"][:10], last["noticeId"])
+
+
+def _records(data: Dict) -> List[Dict]:
+    """Extract the opportunity list from a raw search response."""
+    records = data.get("opportunitiesData") or []
+    return [records] if isinstance(records, dict) else records
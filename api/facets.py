@@ -0,0 +1,304 @@
+"""Facet counts over the local opportunity mirror
+
+Counts notices per NAICS code, set-aside, notice type, place-of-performance
+state and agency for any /api/opportunities filter combination, without
+paging through results upstream.
+
+The index keeps one dictionary-encoded NumPy column per filterable field,
+addressed by mirror rowid: each value gets a small integer code and each
+notice stores its code. A filter value's bitmap over all notices is one
+vectorized comparison against its column, filters are intersected as
+boolean arrays, and the counts for a dimension are a single ``bincount``
+over the surviving codes. A change to a notice only rewrites its slots, so
+the index follows the mirror's change feed (OpportunityMirror.changes_since)
+incrementally rather than being rebuilt.
+
+As usual for search filters, each dimension's counts ignore that
+dimension's own filter, so the other values stay visible: with
+``set_asides=SBA`` the set-aside counts still cover every set-aside.
+"""
+
+import logging
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .mirror import NOTICE_TYPES, OpportunityMirror, default_date_range, to_iso_date
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("naics", "set_aside", "notice_type", "state", "agency")
+
+# SAM.gov baseType -> the notice_type code /api/opportunities accepts
+NOTICE_TYPE_CODES = {name: code for code, name in NOTICE_TYPES.items()}
+
+
+def _split(value: Optional[str], transform=lambda v: v) -> List[str]:
+    """Split a comma-separated filter value the way OpportunityMirror does."""
+    return [transform(item.strip()) for item in (value or "").split(",") if item.strip()]
+
+
+def _ordinal(value: Optional[str]) -> int:
+    """Day number of a YYYY-MM-DD date, 0 when missing."""
+    try:
+        return date.fromisoformat(value[:10]).toordinal() if value else 0
+    except ValueError:
+        return 0
+
+
+class _Column:
+    """Dictionary-encoded column: a value code per rowid, 0 where there is no value."""
+
+    def __init__(self, capacity: int):
+        # Code 0 is reserved for "no value"; np.intp codes let bincount skip a conversion
+        self.values: List[Optional[str]] = [None]
+        self._codes_by_value: Dict[str, int] = {}
+        self.codes = np.zeros(capacity, dtype=np.intp)
+
+    def grow(self, capacity: int) -> None:
+        codes = np.zeros(capacity, dtype=np.intp)
+        codes[:len(self.codes)] = self.codes
+        self.codes = codes
+
+    def set(self, rowid: int, value: Optional[str]) -> None:
+        if not value:
+            self.codes[rowid] = 0
+            return
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+        self.codes[rowid] = code
+
+    def mask(self, values: Iterable[str], size: int) -> np.ndarray:
+        """Bitmap of the rowids holding any of values."""
+        codes = [self._codes_by_value[value] for value in values if value in self._codes_by_value]
+        if not codes:
+            return np.zeros(size, dtype=bool)
+        if len(codes) == 1:
+            return self.codes[:size] == codes[0]
+        return np.isin(self.codes[:size], codes)
+
+    def matching(self, predicate) -> List[str]:
+        return [value for value in self.values[1:] if predicate(value)]
+
+    def counts(self, mask: np.ndarray, limit: int) -> List[Tuple[str, int]]:
+        """The most frequent values among the rowids in mask, most frequent first."""
+        codes = self.codes[:len(mask)]
+        if not mask.all():
+            codes = codes[mask]
+        counts = np.bincount(codes, minlength=len(self.values))
+        counts[0] = 0
+        present = np.flatnonzero(counts)
+        top = present[np.argsort(-counts[present], kind="stable")[:limit]]
+        return [(self.values[code], int(counts[code])) for code in top]
+
+
+class FacetIndex:
+    """In-memory facet index over an OpportunityMirror, kept current from its change feed."""
+
+    def __init__(self, mirror: OpportunityMirror, batch_size: int = 5000):
+        """
+        Initialize an empty index; refresh() loads it.
+
+        Args:
+            mirror: Mirror to index
+            batch_size: Changed notices read per query while refreshing
+        """
+        self.mirror = mirror
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._position: Optional[Tuple[float, int]] = None
+        self._size = 0
+        capacity = 1024
+        self._active = np.zeros(capacity, dtype=bool)
+        self._posted = np.zeros(capacity, dtype=np.int32)
+        self._columns = {
+            name: _Column(capacity)
+            for name in ("naics", "set_aside", "notice_type", "state", "zipcode", "department", "subtier", "office", "path")
+        }
+        self._agency_names: Dict[str, str] = {}
+        self.ready = False
+        self.applied = 0
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._active)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        active = np.zeros(capacity, dtype=bool)
+        active[:len(self._active)] = self._active
+        posted = np.zeros(capacity, dtype=np.int32)
+        posted[:len(self._posted)] = self._posted
+        self._active, self._posted = active, posted
+        for column in self._columns.values():
+            column.grow(capacity)
+
+    def apply(self, changes: List[Dict[str, Any]]) -> None:
+        """
+        Index new and changed notices.
+
+        Args:
+            changes: Rows as returned by OpportunityMirror.changes_since
+        """
+        if not changes:
+            return
+        with self._lock:
+            size = max(self._size, max(row["rowid"] for row in changes) + 1)
+            self._reserve(size)
+            columns = self._columns
+            for row in changes:
+                rowid = row["rowid"]
+                self._active[rowid] = bool(row["active"])
+                self._posted[rowid] = _ordinal(row["posted_date"])
+                columns["naics"].set(rowid, row["naics_code"])
+                columns["set_aside"].set(rowid, row["type_of_set_aside"])
+                columns["notice_type"].set(rowid, row["base_type"])
+                columns["state"].set(rowid, row["state"])
+                columns["zipcode"].set(rowid, row["zipcode"])
+                columns["department"].set(rowid, row["department_code"])
+                columns["subtier"].set(rowid, row["subtier_code"])
+                columns["office"].set(rowid, row["office_code"])
+                columns["path"].set(rowid, row["full_parent_path_name"])
+                if row["department_code"] and row["full_parent_path_name"]:
+                    self._agency_names[row["department_code"]] = row["full_parent_path_name"].split(".")[0]
+            self._size = size
+            self.applied += len(changes)
+
+    def refresh(self) -> int:
+        """
+        Apply the mirror's changes since the last refresh.
+
+        A refresh already running in another thread is not waited for.
+
+        Returns:
+            Number of notices applied
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            started = time.time()
+            applied = 0
+            while True:
+                changes = self.mirror.changes_since(self._position, self.batch_size)
+                if not changes:
+                    break
+                self.apply(changes)
+                self._position = (changes[-1]["updated_at"], changes[-1]["rowid"])
+                applied += len(changes)
+            if not self.ready:
+                notices = int(np.count_nonzero(self._active[:self._size]))
+                logger.info(f"Facet index ready: {notices} notices indexed in {time.time() - started:.1f}s")
+            self.ready = True
+            return applied
+        finally:
+            self._refresh_lock.release()
+
+    def facets(
+        self,
+        keyword: Optional[str] = None,
+        naics_code: Optional[str] = None,
+        set_aside: Optional[str] = None,
+        status: Optional[str] = None,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        organization_name: Optional[str] = None,
+        place_of_performance_state: Optional[str] = None,
+        place_of_performance_zipcode: Optional[str] = None,
+        limit: int = 20
+    ) -> Dict:
+        """
+        Count active notices per dimension for a search.
+
+        Takes the same filters as OpportunityMirror.search; a missing date
+        range means the last 90 days.
+
+        Args:
+            limit: Maximum values returned per dimension, most frequent first
+
+        Returns:
+            Dict with ``facets`` (per dimension, a list of value/count pairs)
+            and ``metadata`` (the matching total)
+        """
+        started = time.perf_counter()
+        posted_from, posted_to = default_date_range(posted_from, posted_to)
+        first, last = _ordinal(to_iso_date(posted_from)), _ordinal(to_iso_date(posted_to))
+        keyword_rowids = self.mirror.keyword_rowids(keyword) if keyword else None
+        if keyword_rowids is not None:
+            keyword_rowids = np.asarray(keyword_rowids, dtype=np.int64)
+
+        with self._lock:
+            size = self._size
+            columns = self._columns
+            base = self._active[:size] & (self._posted[:size] >= first) & (self._posted[:size] <= last)
+            if keyword_rowids is not None:
+                matched = np.zeros(size, dtype=bool)
+                matched[keyword_rowids[keyword_rowids < size]] = True
+                base &= matched
+            if place_of_performance_zipcode:
+                base &= columns["zipcode"].mask(_split(place_of_performance_zipcode), size)
+            if organization_name:
+                needle = organization_name.lower()
+                base &= columns["path"].mask(columns["path"].matching(lambda path: needle in path.lower()), size)
+
+            # Filters on faceted dimensions, each left out of its own counts
+            filters: Dict[str, np.ndarray] = {}
+            if naics_code:
+                filters["naics"] = columns["naics"].mask(_split(naics_code), size)
+            if set_aside:
+                filters["set_aside"] = columns["set_aside"].mask(_split(set_aside, str.upper), size)
+            if status:
+                filters["notice_type"] = columns["notice_type"].mask(
+                    _split(status, lambda code: NOTICE_TYPES.get(code.lower(), code)), size
+                )
+            if place_of_performance_state:
+                filters["state"] = columns["state"].mask(_split(place_of_performance_state, str.upper), size)
+            if organization_id:
+                filters["agency"] = (
+                    columns["department"].mask([organization_id], size)
+                    | columns["subtier"].mask([organization_id], size)
+                    | columns["office"].mask([organization_id], size)
+                )
+
+            facets = {}
+            for dimension in DIMENSIONS:
+                mask = base.copy()
+                for other, selected in filters.items():
+                    if other != dimension:
+                        mask &= selected
+                column = columns["department" if dimension == "agency" else dimension]
+                facets[dimension] = [self._entry(dimension, value, count) for value, count in column.counts(mask, limit)]
+            total = base
+            for selected in filters.values():
+                total = total & selected
+            total = int(np.count_nonzero(total))
+
+        self.queries += 1
+        self.query_seconds += time.perf_counter() - started
+        return {"facets": facets, "metadata": {"total": total, "source": "mirror"}}
+
+    def _entry(self, dimension: str, value: str, count: int) -> Dict:
+        """A facet value as the filter value to send back, with a label where the value is a code."""
+        if dimension == "notice_type":
+            return {"value": NOTICE_TYPE_CODES.get(value, value), "label": value, "count": count}
+        if dimension == "agency":
+            return {"value": value, "label": self._agency_names.get(value), "count": count}
+        return {"value": value, "count": count}
+
+    def stats(self) -> Dict:
+        """Return the index size and query timings."""
+        return {
+            "ready": self.ready,
+            "notices": int(np.count_nonzero(self._active[:self._size])),
+            "applied": self.applied,
+            "queries": self.queries,
+            "avg_query_ms": round(self.query_seconds / self.queries * 1000, 3) if self.queries else 0.0,
+        }
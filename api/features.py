@@ -0,0 +1,292 @@
+"""Feature extraction for the opportunity relevance model
+
+Derives the relevance model's twelve features, named after the columns of
+preprocessed_data.csv, from raw SAM.gov opportunity records. Categorical
+fields are encoded here (agency and state as hash buckets, notice types as
+codes) rather than kept as strings, so models must be trained on the output
+of this module; api.relevance_training does that, which keeps training and
+serving on identical inputs.
+
+Records are first gathered into one list per source field; every feature is
+then computed for the whole batch with NumPy array operations. Categorical
+values are hashed once per distinct value, not once per row.
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .mirror import NOTICE_TYPES
+
+FEATURE_NAMES = (
+    "agency",
+    "contract_value",
+    "contract_type",
+    "naics_code",
+    "place_of_performance",
+    "contract_duration",
+    "small_business",
+    "veteran_owned",
+    "woman_owned",
+    "minority_owned",
+    "subcontracting_plan",
+    "keywords",
+)
+
+# Set-aside codes grouped by the preprocessed_data.csv flag they imply
+SMALL_BUSINESS_SETASIDES = (
+    "SBA", "SBP", "8A", "8AN", "HZC", "HZS", "SDVOSBC", "SDVOSBS",
+    "WOSB", "WOSBSS", "EDWOSB", "EDWOSBSS", "VSA", "VSS", "ISBEE", "IEE",
+)
+VETERAN_SETASIDES = ("SDVOSBC", "SDVOSBS", "VSA", "VSS")
+WOMAN_SETASIDES = ("WOSB", "WOSBSS", "EDWOSB", "EDWOSBSS")
+MINORITY_SETASIDES = ("8A", "8AN", "ISBEE", "IEE")
+
+_BASE_TYPES = {name: float(index) for index, name in enumerate(NOTICE_TYPES.values(), start=1)}
+
+# Categorical values are hashed into this many buckets
+HASH_BUCKETS = 1 << 16
+
+# Raw fields the features are derived from; a notice whose values for these
+# are unchanged keeps its cached feature vector
+SOURCE_FIELDS = (
+    "department",
+    "award_amount",
+    "base_type",
+    "naics_code",
+    "state",
+    "posted_date",
+    "response_deadline",
+    "set_aside",
+    "title",
+)
+
+
+def _bucket(value: Optional[str]) -> float:
+    """Map a categorical value to a stable numeric bucket (0 for missing)."""
+    if not value:
+        return 0.0
+    return float(int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "little") % HASH_BUCKETS + 1)
+
+
+def _buckets(values: np.ndarray) -> np.ndarray:
+    """Hash an array of categorical strings, once per distinct value."""
+    distinct, inverse = np.unique(values, return_inverse=True)
+    return np.array([_bucket(value) for value in distinct.tolist()], dtype=np.float64)[inverse.reshape(-1)]
+
+
+def _numbers(values: Sequence[Any]) -> np.ndarray:
+    """Convert numbers or numeric strings to floats, with 0 for missing or invalid values."""
+    array = np.asarray(values, dtype=object)
+    result = np.zeros(len(array), dtype=np.float64)
+    present = np.flatnonzero((array != None) & (array != ""))  # noqa: E711 - elementwise comparison
+    try:
+        result[present] = array[present].astype(np.float64)
+    except (TypeError, ValueError):
+        for index in present:
+            try:
+                result[index] = float(array[index])
+            except (TypeError, ValueError):
+                pass
+    return result
+
+
+def _dates(values: Sequence[Optional[str]]) -> np.ndarray:
+    """Parse ISO dates or timestamps to datetime64[D], NaT for missing or invalid values."""
+    # A U10 array keeps only the YYYY-MM-DD prefix of timestamps
+    array = np.array([value or "" for value in values], dtype="U10")
+    try:
+        return array.astype("datetime64[D]")
+    except ValueError:
+        result = np.full(len(array), np.datetime64("NaT"), dtype="datetime64[D]")
+        for index, value in enumerate(array.tolist()):
+            try:
+                result[index] = np.datetime64(value, "D")
+            except ValueError:
+                pass
+        return result
+
+
+def source_columns(opportunities: List[Dict]) -> Dict[str, List[Any]]:
+    """
+    Gather the raw source fields of a batch of opportunities, one list per field.
+
+    Args:
+        opportunities: Opportunity dicts as returned by the v2 search endpoint
+
+    Returns:
+        Dict mapping each SOURCE_FIELDS name to its values in input order
+    """
+    def nested(record: Dict, outer: str, inner: str) -> Any:
+        value = record.get(outer)
+        return value.get(inner) if isinstance(value, dict) else None
+
+    def state(record: Dict) -> Any:
+        place = record.get("placeOfPerformance")
+        value = place.get("state") if isinstance(place, dict) else None
+        return value.get("code") if isinstance(value, dict) else None
+
+    return {
+        "department": [(opp.get("fullParentPathName") or "").split(".", 1)[0] for opp in opportunities],
+        "award_amount": [nested(opp, "award", "amount") for opp in opportunities],
+        "base_type": [opp.get("baseType") for opp in opportunities],
+        "naics_code": [opp.get("naicsCode") for opp in opportunities],
+        "state": [state(opp) or "" for opp in opportunities],
+        "posted_date": [opp.get("postedDate") for opp in opportunities],
+        "response_deadline": [opp.get("responseDeadLine") for opp in opportunities],
+        "set_aside": [opp.get("typeOfSetAside") or "" for opp in opportunities],
+        "title": [opp.get("title") or "" for opp in opportunities],
+    }
+
+
+def compute_features(columns: Dict[str, List[Any]]) -> np.ndarray:
+    """
+    Compute the feature matrix for a batch from its source columns.
+
+    Args:
+        columns: Source columns as returned by source_columns
+
+    Returns:
+        (n, 12) float64 matrix in FEATURE_NAMES order
+    """
+    count = len(columns["title"])
+    matrix = np.zeros((count, len(FEATURE_NAMES)), dtype=np.float64)
+    if not count:
+        return matrix
+
+    setasides = np.char.upper(np.array(columns["set_aside"], dtype=str))
+    durations = _dates(columns["response_deadline"]) - _dates(columns["posted_date"])
+    distinct, inverse = np.unique(np.array(columns["base_type"], dtype=object).astype(str), return_inverse=True)
+
+    matrix[:, 0] = _buckets(np.array(columns["department"], dtype=str))
+    matrix[:, 1] = _numbers(columns["award_amount"])
+    matrix[:, 2] = np.array([_BASE_TYPES.get(name, 0.0) for name in distinct.tolist()])[inverse.reshape(-1)]
+    matrix[:, 3] = _numbers(columns["naics_code"])
+    matrix[:, 4] = _buckets(np.array(columns["state"], dtype=str))
+    matrix[:, 5] = np.where(np.isnat(durations), 0, durations.astype(np.int64))
+    matrix[:, 6] = np.isin(setasides, SMALL_BUSINESS_SETASIDES)
+    matrix[:, 7] = np.isin(setasides, VETERAN_SETASIDES)
+    matrix[:, 8] = np.isin(setasides, WOMAN_SETASIDES)
+    matrix[:, 9] = np.isin(setasides, MINORITY_SETASIDES)
+    # Column 10, subcontracting_plan, stays 0: SAM.gov notices do not say whether one applies
+    matrix[:, 11] = np.fromiter((len(title.split()) for title in columns["title"]), dtype=np.float64, count=count)
+    return matrix
+
+
+def feature_matrix(opportunities: List[Dict]) -> np.ndarray:
+    """Compute the (n, 12) feature matrix for a batch of opportunities, without caching."""
+    return compute_features(source_columns(opportunities))
+
+
+def signature_hashes(columns: Dict[str, List[Any]]) -> np.ndarray:
+    """
+    Hash each row's source field values into one int64 per row.
+
+    Rows with equal hashes have (barring collisions) equal features. The
+    hashes are only stable within a process, which is all in-memory caches
+    need.
+    """
+    count = len(columns["title"])
+    return np.fromiter((hash(row) for row in zip(*columns.values())), dtype=np.int64, count=count)
+
+
+class FeaturePipeline:
+    """Feature extraction with a per-notice cache of feature vectors.
+
+    The cache is a fixed-size block of NumPy arrays: feature rows, plus the
+    hash of the source fields each row was computed from, with a dict from
+    noticeId to row slot. Lookups for a whole batch are one vectorized
+    comparison, and the cache adds no per-row Python objects for the garbage
+    collector to walk. A batch only computes rows that are new or whose
+    source fields changed (e.g. an amendment moving the deadline), together
+    in one vectorized pass. When full, the oldest slots are reused first.
+    """
+
+    def __init__(self, cache_max_entries: int = 500_000):
+        """
+        Initialize the pipeline.
+
+        Args:
+            cache_max_entries: Feature vectors kept in memory
+        """
+        self.capacity = cache_max_entries
+        self._slots: Dict[str, int] = {}
+        self._owners: List[Optional[str]] = [None] * cache_max_entries
+        self._hashes = np.zeros(cache_max_entries, dtype=np.int64)
+        self._rows = np.zeros((cache_max_entries, len(FEATURE_NAMES)), dtype=np.float64)
+        self._next_slot = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.computed = 0
+
+    def _slot_for(self, notice_id: str) -> int:
+        """Return the slot of a notice, claiming the oldest slot for new notices."""
+        slot = self._slots.get(notice_id)
+        if slot is None:
+            slot = self._next_slot
+            self._next_slot = (slot + 1) % self.capacity
+            evicted = self._owners[slot]
+            if evicted is not None:
+                del self._slots[evicted]
+            self._owners[slot] = notice_id
+            self._slots[notice_id] = slot
+        return slot
+
+    def transform(
+        self,
+        opportunities: List[Dict],
+        columns: Optional[Dict[str, List[Any]]] = None,
+        hashes: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Build the feature matrix for a batch, reusing cached rows.
+
+        Args:
+            opportunities: Opportunity dicts as returned by the v2 search endpoint
+            columns: The batch's source_columns, if the caller already has them
+            hashes: The batch's signature_hashes, if the caller already has them
+
+        Returns:
+            (n, 12) feature matrix, and each row's source signature hash
+            (see signature_hashes) for downstream caches
+        """
+        count = len(opportunities)
+        if columns is None:
+            columns = source_columns(opportunities)
+        if hashes is None:
+            hashes = signature_hashes(columns)
+        notice_ids = [opp.get("noticeId") for opp in opportunities]
+        matrix = np.empty((count, len(FEATURE_NAMES)), dtype=np.float64)
+
+        with self._lock:
+            slots = np.fromiter((self._slots.get(notice_id, -1) for notice_id in notice_ids), dtype=np.int64, count=count)
+            hit = slots >= 0
+            hit[hit] = self._hashes[slots[hit]] == hashes[hit]
+            matrix[hit] = self._rows[slots[hit]]
+            missing = np.flatnonzero(~hit)
+            self.hits += count - len(missing)
+
+        if len(missing):
+            computed = compute_features({name: [values[index] for index in missing] for name, values in columns.items()})
+            matrix[missing] = computed
+            with self._lock:
+                for row, index in enumerate(missing.tolist()):
+                    if notice_ids[index]:
+                        slot = self._slot_for(notice_ids[index])
+                        self._hashes[slot] = hashes[index]
+                        self._rows[slot] = computed[row]
+                self.computed += len(missing)
+        return matrix, hashes
+
+    def stats(self) -> Dict:
+        """Return cache size and hit/compute counters."""
+        lookups = self.hits + self.computed
+        return {
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "computed": self.computed,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,63 @@
+"""Freshness of the SAM.gov data served to the current request
+
+The async client notes how old the data it returns is (a cache hit, a
+stale hit being revalidated in the background, or a fresh upstream fetch)
+in a context variable. Each request runs in its own context, so routes can
+read it back after the call and report it as ``Age`` and ``Cache-Status``
+(RFC 9211) response headers; a negative ``ttl`` says how many seconds past
+expiry the data is.
+"""
+
+import math
+from contextvars import ContextVar
+from typing import Dict, NamedTuple, Optional
+
+CACHE_NAME = "sam-shortlist"
+
+
+class Freshness(NamedTuple):
+    """How fresh the data served was."""
+
+    hit: bool  # Served from the cache rather than fetched for this request
+    age: float  # Seconds since the data was fetched from SAM.gov
+    ttl: float  # Seconds until it expires; negative once stale
+
+    @property
+    def stale(self) -> bool:
+        return self.ttl <= 0
+
+
+_current: ContextVar[Optional[Freshness]] = ContextVar("sam_freshness", default=None)
+
+
+def note(hit: bool, age: float, ttl: float) -> None:
+    """Record the freshness of data served, keeping the stalest seen in this request."""
+    previous = _current.get()
+    if previous is None or ttl < previous.ttl:
+        _current.set(Freshness(hit, age, ttl))
+
+
+def current() -> Optional[Freshness]:
+    """Return the stalest data served so far in this request, if any came from the client."""
+    return _current.get()
+
+
+def freshness_headers(freshness: Optional[Freshness]) -> Dict[str, str]:
+    """
+    Build response headers describing how fresh the data is.
+
+    Args:
+        freshness: Result of current(); no headers when None
+
+    Returns:
+        ``Age`` for cache hits, and ``Cache-Status`` with the remaining TTL
+    """
+    if freshness is None:
+        return {}
+    status = [CACHE_NAME, "hit" if freshness.hit else "fwd=miss"]
+    if math.isfinite(freshness.ttl):
+        status.append(f"ttl={math.floor(freshness.ttl)}")
+    headers = {"Cache-Status": "; ".join(status)}
+    if freshness.hit:
+        headers["Age"] = str(int(freshness.age))
+    return headers
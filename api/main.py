@@ -1,16 +1,45 @@
 """FastAPI backend for SAM.gov Contract Opportunities"""
 
 import os
+import json
+import asyncio
 import logging
 from typing import Optional
-from fastapi import FastAPI, HTTPException, Query, Response, Header, Depends
+import httpx
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
-from .sam_api import SAMAPIClient
+from .alerts import AlertEngine, build_criteria, owner_id
+from .async_sam_api import AsyncSAMAPIClient, create_http_client
+from .batch import MAX_BATCH_SIZE, fetch_batch
+from .catalogs import CatalogStore, SharedBuilds, run_catalog_schedule
+from .circuit_breaker import CircuitBreaker, CircuitOpen
+from .conditional import ConditionalResponder, FastJSONResponse
+from .entities import EntityIndex
+from .facets import FacetIndex
+from .freshness import current as current_freshness, freshness_headers
+from .export import MEDIA_TYPES, OpportunityExporter, csv_chunks, ndjson_chunks, prime
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware, SamplingProfiler, cache_families, prefetch_families, rate_limit_families
+from .rate_limiter import RateLimitExceeded, TokenBucketRateLimiter
+from .mirror import OpportunityMirror
+from .mirror_sync import MirrorSync, run_sync_schedule
+from .pagination import Cursor, read_page
+from .prefetch import SearchPrefetcher
+from .projection import parse_fields, project, project_page
+from .registry import SAMClientRegistry
+from .relevance import DEFAULT_MODEL_PATH, RelevanceScorer
+from .resource_cache import PASSTHROUGH_HEADERS, CachedFileResponse, ResourceCache
+from .sam_api import DEFAULT_API_ROOT
+from .search_index import DescriptionIndexer
+from .response_cache import DiskCache
+from .warming import CacheWarmer, QueryLog, run_warming_schedule
 
 # Load environment variables
 load_dotenv()
@@ -38,29 +67,390 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+app.add_middleware(MetricsMiddleware)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def startup():
+    """Create the process-wide SAM.gov client registry and connection pool."""
+    http_client = create_http_client(
+        max_connections=int(os.getenv("SAM_HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("SAM_HTTP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("SAM_HTTP_KEEPALIVE_EXPIRY", "30")),
+        timeout=float(os.getenv("SAM_HTTP_TIMEOUT", "10")),
+        connect_timeout=float(os.getenv("SAM_HTTP_CONNECT_TIMEOUT", "5")),
+        http2=os.getenv("SAM_HTTP2", "false").lower() == "true"
+    )
+    app.state.metrics = Metrics()
+    app.state.profiler = (
+        SamplingProfiler(interval=float(os.getenv("SAM_PROFILER_INTERVAL", "0.01")))
+        if os.getenv("SAM_PROFILER", "false").lower() == "true" else None
+    )
+    cache_max_stale = float(os.getenv("SAM_CACHE_MAX_STALE", "86400"))
+    max_wait = os.getenv("SAM_RATE_LIMIT_MAX_WAIT", "5")
+    rate_limiter = TokenBucketRateLimiter(
+        db_path=os.getenv("SAM_RATE_LIMIT_DB"),
+        calls=int(os.getenv("SAM_RATE_LIMIT_CALLS", "60")),
+        period=float(os.getenv("SAM_RATE_LIMIT_PERIOD", "60")),
+        burst=int(os.getenv("SAM_RATE_LIMIT_BURST", "10")),
+        daily_quota=int(os.getenv("SAM_DAILY_QUOTA", "100000")),
+        max_wait=float(max_wait) if max_wait else None
+    )
+    app.state.sam_clients = SAMClientRegistry(
+        max_clients=int(os.getenv("SAM_MAX_CLIENTS", "32")),
+        cache_max_entries=int(os.getenv("SAM_CACHE_MAX_ENTRIES", "1024")),
+        cache_max_bytes=int(os.getenv("SAM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        cache_max_stale=cache_max_stale,
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        disk_cache=DiskCache(
+            db_path=os.getenv("SAM_CACHE_DB"),
+            max_entries=int(os.getenv("SAM_CACHE_DB_MAX_ENTRIES", "100000")),
+            max_stale=cache_max_stale
+        ),
+        metrics=app.state.metrics,
+        api_root=os.getenv("SAM_API_ROOT", DEFAULT_API_ROOT),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("SAM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("SAM_BREAKER_RESET_TIMEOUT", "30"))
+        )
+    )
+
+    app.state.prefetcher = SearchPrefetcher(
+        rate_limiter,
+        pages=int(os.getenv("SAM_PREFETCH_PAGES", "1")),
+        min_tokens=float(os.getenv("SAM_PREFETCH_MIN_TOKENS", "5")),
+        min_daily_remaining=int(os.getenv("SAM_PREFETCH_MIN_DAILY_REMAINING", "1000")),
+        max_foreground=int(os.getenv("SAM_PREFETCH_MAX_FOREGROUND", "8"))
+    )
+
+    app.state.resource_cache = ResourceCache(
+        directory=os.getenv("SAM_RESOURCE_CACHE_DIR"),
+        max_bytes=int(os.getenv("SAM_RESOURCE_CACHE_MAX_BYTES", str(10 * 1024 ** 3)))
+    )
+    model_path = os.getenv("SAM_RELEVANCE_MODEL", DEFAULT_MODEL_PATH)
+    app.state.relevance = load_relevance_scorer(model_path)
+    app.state.responses = ConditionalResponder(
+        min_compress_bytes=int(os.getenv("SAM_COMPRESS_MIN_BYTES", "1024"))
+    )
+    app.state.metrics.add_collector(collect_cache_metrics)
+    app.state.metrics.add_collector(collect_rate_limit_metrics)
+    app.state.metrics.add_collector(collect_prefetch_metrics)
+    app.state.export_options = dict(
+        prefetch=int(os.getenv("SAM_EXPORT_PREFETCH", "3")),
+        max_window_records=int(os.getenv("SAM_EXPORT_MAX_WINDOW_RECORDS", "10000"))
+    )
+
+    # Optional local mirror, synced during SAM.gov's bulk update window
+    mirror_db = os.getenv("SAM_MIRROR_DB")
+    app.state.mirror = OpportunityMirror(mirror_db) if mirror_db else None
+    app.state.alerts = (
+        AlertEngine(
+            app.state.mirror,
+            db_path=os.getenv("SAM_ALERTS_DB"),
+            retention_days=float(os.getenv("SAM_ALERTS_RETENTION_DAYS", "30"))
+        )
+        if app.state.mirror is not None else None
+    )
+    app.state.mirror_sync_task = None
+    sync_api_key = os.getenv("SAM_API_KEY")
+    if app.state.mirror is not None and sync_api_key:
+        sync_client = app.state.sam_clients.get(sync_api_key)
+        mirror_sync = MirrorSync(
+            sync_client,
+            app.state.mirror,
+            days=int(os.getenv("SAM_MIRROR_DAYS", "90"))
+        )
+        descriptions_per_run = int(os.getenv("SAM_MIRROR_DESCRIPTIONS_PER_RUN", "0"))
+        description_indexer = (
+            DescriptionIndexer(sync_client, app.state.mirror, max_per_run=descriptions_per_run)
+            if descriptions_per_run > 0 else None
+        )
+        app.state.mirror_sync_task = asyncio.create_task(
+            run_sync_schedule(mirror_sync, description_indexer=description_indexer, alert_engine=app.state.alerts)
+        )
+
+    # Organization and set-aside catalogs, rebuilt after each bulk update
+    app.state.catalogs = CatalogStore(
+        mirror=app.state.mirror,
+        client=app.state.sam_clients.get(sync_api_key) if sync_api_key else None,
+        builds=SharedBuilds(os.getenv("SAM_CATALOG_DB")) if sync_api_key else None
+    )
+    app.state.catalog_task = None
+    if app.state.catalogs.mirror is not None or app.state.catalogs.client is not None:
+        app.state.catalog_task = asyncio.create_task(run_catalog_schedule(app.state.catalogs))
+
+    # Most frequent searches, re-run into the response cache after each bulk update
+    app.state.warmer = None
+    app.state.warming_task = None
+    warm_top_k = int(os.getenv("SAM_WARM_TOP_K", "50"))
+    if sync_api_key and warm_top_k > 0:
+        app.state.warmer = CacheWarmer(
+            app.state.sam_clients.get(sync_api_key),
+            QueryLog(
+                db_path=os.getenv("SAM_WARM_DB"),
+                half_life_days=float(os.getenv("SAM_WARM_HALF_LIFE_DAYS", "7"))
+            ),
+            catalogs=app.state.catalogs,
+            top_k=warm_top_k
+        )
+        app.state.warming_task = asyncio.create_task(
+            run_warming_schedule(app.state.warmer, delay=float(os.getenv("SAM_WARM_DELAY_MINUTES", "10")) * 60)
+        )
+
+    # Entity registration index, loaded (or built, on first use of a snapshot) in the background
+    entity_snapshot = os.getenv("SAM_ENTITY_SNAPSHOT")
+    app.state.entities = None
+    app.state.entity_task = asyncio.create_task(load_entity_index(entity_snapshot)) if entity_snapshot else None
+
+    # Facet counts over the mirror, loaded in the background and then kept current per request
+    app.state.facets = FacetIndex(app.state.mirror) if app.state.mirror is not None else None
+    app.state.facets_task = asyncio.create_task(load_facet_index(app.state.facets)) if app.state.facets is not None else None
+
+def collect_cache_metrics():
+    """Cache hit and miss counters per tier, read at scrape time."""
+    return cache_families(
+        app.state.sam_clients.stats(),
+        app.state.resource_cache.stats(),
+        app.state.responses.stats()
+    )
+
+def collect_rate_limit_metrics():
+    """Rate limiter queue depth and per-key quota, read at scrape time."""
+    return rate_limit_families(
+        app.state.sam_clients.rate_limiter.stats(),
+        app.state.sam_clients.rate_limit_status()
+    )
+
+def collect_prefetch_metrics():
+    """Prefetch counters, kept apart from ordinary cache hits."""
+    return prefetch_families(app.state.prefetcher.stats())
+
+async def load_entity_index(path: str) -> None:
+    """Load the entity index off the event loop and publish it on app.state."""
+    try:
+        app.state.entities = await asyncio.to_thread(EntityIndex.load, path)
+        logger.info(f"Entity index ready: {len(app.state.entities)} registrations")
+    except Exception as e:
+        logger.error(f"Failed to load entity index from {path}: {str(e)}")
+
+def load_relevance_scorer(model_path: Optional[str]) -> Optional[RelevanceScorer]:
+    """Load the relevance model, or return None if it is missing or cannot rank notices."""
+    if not model_path or not os.path.exists(model_path):
+        return None
+    scorer = RelevanceScorer(model_path)
+    try:
+        scorer.version  # Loads and validates the model
+    except ValueError as e:
+        logger.warning(f"Relevance scoring disabled: {str(e)}")
+        return None
+    return scorer
+
+async def load_facet_index(facets: FacetIndex) -> None:
+    """Index every mirrored notice off the event loop."""
+    try:
+        await asyncio.to_thread(facets.refresh)
+    except Exception as e:
+        logger.error(f"Failed to build facet index: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background jobs and close pooled upstream connections."""
+    for task in (app.state.mirror_sync_task, app.state.catalog_task, app.state.entity_task, app.state.warming_task,
+                 app.state.facets_task):
+        if task is not None:
+            task.cancel()
+    if app.state.warmer is not None:
+        app.state.warmer.query_log.close()
+    if app.state.profiler is not None:
+        app.state.profiler.stop()
+    await app.state.prefetcher.aclose()
+    await app.state.sam_clients.aclose()
+    app.state.resource_cache.close()
+    app.state.catalogs.close()
+    if app.state.alerts is not None:
+        app.state.alerts.close()
+
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """Reject over-budget requests with 429 and a Retry-After header."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
+@app.exception_handler(CircuitOpen)
+async def circuit_open_handler(request: Request, exc: CircuitOpen):
+    """Fail fast with 503 and a Retry-After header while SAM.gov is failing."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
+def upstream_error(e: httpx.HTTPError) -> HTTPException:
+    """Map a failed SAM.gov call to 504 or 502 without leaking the upstream error text."""
+    if isinstance(e, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail="SAM.gov did not respond in time")
+    if isinstance(e, httpx.HTTPStatusError):
+        return HTTPException(status_code=502, detail=f"SAM.gov returned HTTP {e.response.status_code}")
+    return HTTPException(status_code=502, detail="Could not reach SAM.gov")
+
 async def get_api_key(authorization: str = Header(...)) -> str:
     """Extract API key from Authorization header."""
     if not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Invalid authorization header")
     return authorization.replace('Bearer ', '')
 
-def get_sam_client(api_key: str = Depends(get_api_key)) -> SAMAPIClient:
-    """Get an authenticated SAM.gov API client."""
+def get_sam_client(request: Request, api_key: str = Depends(get_api_key)) -> AsyncSAMAPIClient:
+    """Get the shared, authenticated SAM.gov API client for this API key."""
     if not api_key:
         raise HTTPException(status_code=401, detail="API key is required")
-    return SAMAPIClient(api_key)
+    return request.app.state.sam_clients.get(api_key)
+
+def get_mirror(request: Request) -> Optional[OpportunityMirror]:
+    """Get the local opportunity mirror, if one is configured."""
+    return request.app.state.mirror
+
+def get_relevance(request: Request) -> Optional[RelevanceScorer]:
+    """Get the relevance scorer, if a model is available."""
+    return request.app.state.relevance
+
+def get_alerts(request: Request) -> AlertEngine:
+    """Get the alert engine, or fail if there is no mirror to match against."""
+    if request.app.state.alerts is None:
+        raise HTTPException(status_code=404, detail="Alerts need the local mirror, which is not configured")
+    return request.app.state.alerts
+
+def get_facets(request: Request) -> FacetIndex:
+    """Get the facet index, or fail if there is no mirror or it is still loading."""
+    if request.app.state.facets is None:
+        raise HTTPException(status_code=404, detail="Facets need the local mirror, which is not configured")
+    if not request.app.state.facets.ready:
+        raise HTTPException(status_code=503, detail="Facet index is not available yet")
+    return request.app.state.facets
+
+def get_profiler(request: Request) -> SamplingProfiler:
+    """Get the sampling profiler, or fail if SAM_PROFILER did not enable it."""
+    if request.app.state.profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler is not enabled")
+    return request.app.state.profiler
+
+def get_entities(request: Request) -> EntityIndex:
+    """Get the entity index, or fail if it is not configured or still loading."""
+    if request.app.state.entities is None:
+        if request.app.state.entity_task is None:
+            raise HTTPException(status_code=404, detail="Entity index is not configured")
+        raise HTTPException(status_code=503, detail="Entity index is not available yet")
+    return request.app.state.entities
+
+
+class BatchRequest(BaseModel):
+    """Body of a batch opportunity lookup."""
+    notice_ids: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE, description="Notice IDs to look up")
+    include_description: bool = Field(False, description="Also return each notice's description")
+
+class AlertSubscriptionRequest(BaseModel):
+    """Body of a saved-search subscription, with the filters of /api/opportunities."""
+    name: str = Field(..., min_length=1, max_length=200, description="Display name")
+    q: Optional[str] = Field(None, description="Keywords that must all appear")
+    naics_codes: Optional[str] = Field(None, description="NAICS codes (comma-separated)")
+    set_asides: Optional[str] = Field(None, description="Set-aside types (comma-separated)")
+    notice_type: Optional[str] = Field(None, description="Notice types (comma-separated, e.g., 'p,o')")
+    organization_id: Optional[str] = Field(None, description="Organization IDs (comma-separated)")
+    state: Optional[str] = Field(None, description="Place of performance state codes (comma-separated)")
 
 @app.get("/")
 async def root():
     """Root endpoint serving the frontend."""
     return FileResponse('index.html')
 
-@app.get("/api/opportunities")
+@app.get("/api/cache/stats")
+async def get_cache_stats(request: Request):
+    """
+    Get response cache hit/miss/eviction counters for each registered client.
+    """
+    stats = await run_in_threadpool(request.app.state.sam_clients.stats)
+    stats["resources"] = await run_in_threadpool(request.app.state.resource_cache.stats)
+    stats["responses"] = request.app.state.responses.stats()
+    stats["prefetch"] = request.app.state.prefetcher.stats()
+    if request.app.state.warmer is not None:
+        stats["warming"] = await run_in_threadpool(request.app.state.warmer.stats)
+    if request.app.state.relevance is not None:
+        stats["relevance"] = request.app.state.relevance.stats()
+    if request.app.state.entities is not None:
+        stats["entities"] = request.app.state.entities.stats()
+    if request.app.state.facets is not None:
+        stats["facets"] = request.app.state.facets.stats()
+    if request.app.state.alerts is not None:
+        stats["alerts"] = await run_in_threadpool(request.app.state.alerts.stats)
+    return stats
+
+@app.get("/api/rate-limit")
+async def get_rate_limit_status(client: AsyncSAMAPIClient = Depends(get_sam_client)):
+    """
+    Get the token bucket level and daily SAM.gov quota usage for the caller's API key.
+    """
+    return client.rate_limit_status()
+
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """
+    Export upstream, cache, rate-limit and route latency metrics in Prometheus text format.
+    """
+    body = await run_in_threadpool(request.app.state.metrics.render)
+    return Response(content=body, media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/debug/profiler")
+async def get_profiler_status(profiler: SamplingProfiler = Depends(get_profiler)):
+    """
+    Get whether the sampling profiler is running and how much it has collected.
+    """
+    return profiler.stats()
+
+@app.post("/api/debug/profiler")
+async def toggle_profiler(
+    profiler: SamplingProfiler = Depends(get_profiler),
+    enabled: bool = Query(..., description="Start or stop sampling"),
+    interval: Optional[float] = Query(None, gt=0, le=1, description="Seconds between samples"),
+    reset: bool = Query(True, description="Discard stacks from earlier runs when starting")
+):
+    """
+    Start or stop the sampling profiler.
+    """
+    if enabled:
+        profiler.start(interval=interval, reset=reset)
+    else:
+        await run_in_threadpool(profiler.stop)
+    return profiler.stats()
+
+@app.get("/api/debug/profiler/stacks", response_class=PlainTextResponse)
+async def get_profiler_stacks(
+    profiler: SamplingProfiler = Depends(get_profiler),
+    limit: Optional[int] = Query(None, ge=1, description="Most frequent stacks to return")
+):
+    """
+    Get sampled stacks in collapsed format, for flamegraph tools.
+    """
+    return PlainTextResponse(profiler.collapsed(limit))
+
+@app.get("/api/mirror/status")
+async def get_mirror_status(mirror: Optional[OpportunityMirror] = Depends(get_mirror)):
+    """
+    Get the size and sync coverage of the local opportunity mirror.
+    """
+    if mirror is None:
+        raise HTTPException(status_code=404, detail="Local mirror is not configured")
+    return await run_in_threadpool(mirror.status)
+
+@app.get("/api/opportunities", response_class=FastJSONResponse)
 async def search_opportunities(
-    client: SAMAPIClient = Depends(get_sam_client),
+    request: Request,
+    client: AsyncSAMAPIClient = Depends(get_sam_client),
+    mirror: Optional[OpportunityMirror] = Depends(get_mirror),
+    relevance: Optional[RelevanceScorer] = Depends(get_relevance),
     q: Optional[str] = Query(None, description="Search term"),
     naics_codes: Optional[str] = Query(None, description="NAICS code filter (comma-separated)"),
     set_asides: Optional[str] = Query(None, description="Set-aside type (e.g., 'SBA', 'WOSB')"),
@@ -72,67 +462,276 @@ async def search_opportunities(
     organization_id: Optional[str] = Query(None, description="Filter by organization ID"),
     organization_name: Optional[str] = Query(None, description="Filter by organization name"),
     state: Optional[str] = Query(None, description="Filter by state code (e.g., 'CA')"),
-    zipcode: Optional[str] = Query(None, description="Filter by ZIP code")
+    zipcode: Optional[str] = Query(None, description="Filter by ZIP code"),
+    source: str = Query("auto", pattern="^(auto|live|mirror)$", description="Serve from the local mirror, SAM.gov, or the mirror when it covers the date range"),
+    sort: str = Query("default", pattern="^(default|relevance)$", description="Order the page by relevance model score"),
+    fields: Optional[str] = Query(None, description="Fields to return per opportunity (comma-separated, dotted paths allowed)"),
+    paging: str = Query("offset", pattern="^(offset|cursor)$", description="Page by page number, or by cursor over a snapshot of the mirror"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; implies paging=cursor")
 ):
     """Search contract opportunities with optional filters."""
+    filters = dict(
+        keyword=q,
+        naics_code=naics_codes,
+        set_aside=set_asides,
+        status=notice_type,
+        page=page,
+        limit=limit,
+        posted_from=posted_from,
+        posted_to=posted_to,
+        organization_id=organization_id,
+        organization_name=organization_name,
+        place_of_performance_state=state,
+        place_of_performance_zipcode=zipcode
+    )
+    if source == "mirror" and mirror is None:
+        raise HTTPException(status_code=400, detail="Local mirror is not configured")
+    if sort == "relevance" and relevance is None:
+        raise HTTPException(status_code=400, detail="Relevance model is not available")
+    keyset = paging == "cursor" or cursor is not None
+    if keyset and mirror is None:
+        raise HTTPException(status_code=400, detail="Local mirror is not configured")
+    if keyset and source == "live":
+        raise HTTPException(status_code=400, detail="Cursor paging reads the local mirror and cannot be combined with source=live")
+    if keyset and page != 1:
+        raise HTTPException(status_code=400, detail="Cursor paging does not take a page number")
+    try:
+        projection = parse_fields(fields)
+        if keyset:
+            if cursor is not None:
+                position = Cursor.decode(cursor)
+                position.check(filters)
+            else:
+                position = Cursor.start(filters)
+            result = await run_in_threadpool(read_page, mirror, position, limit)
+        elif mirror is not None and (source == "mirror" or (
+            source == "auto" and await run_in_threadpool(mirror.covers, posted_from, posted_to)
+        )):
+            result = await run_in_threadpool(mirror.search, **filters)
+        else:
+            prefetcher = request.app.state.prefetcher
+            prefetcher.begin(client, filters)
+            if request.app.state.warmer is not None:
+                request.app.state.warmer.query_log.record(filters)
+            result = None
+            try:
+                result = await client.search_opportunities(**filters)
+            finally:
+                prefetcher.end(client, filters, result)
+        if relevance is not None:
+            result = dict(
+                result,
+                opportunities=await run_in_threadpool(relevance.annotate, result["opportunities"], sort == "relevance")
+            )
+        result = project_page(result, projection)
+        return request.app.state.responses.respond(
+            request, "/api/opportunities", result, headers=freshness_headers(current_freshness())
+        )
+    except (RateLimitExceeded, CircuitOpen):
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Error searching opportunities: {str(e)}")
+        raise upstream_error(e)
+    except Exception as e:
+        logger.error(f"Error searching opportunities: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/opportunities/facets", response_class=FastJSONResponse)
+async def get_opportunity_facets(
+    request: Request,
+    facets: FacetIndex = Depends(get_facets),
+    q: Optional[str] = Query(None, description="Search term"),
+    naics_codes: Optional[str] = Query(None, description="NAICS code filter (comma-separated)"),
+    set_asides: Optional[str] = Query(None, description="Set-aside type (e.g., 'SBA', 'WOSB')"),
+    notice_type: Optional[str] = Query(None, description="Notice type (e.g., 'p', 'o', 'k')"),
+    posted_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD or MM/dd/yyyy)"),
+    posted_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD or MM/dd/yyyy)"),
+    organization_id: Optional[str] = Query(None, description="Filter by organization ID"),
+    organization_name: Optional[str] = Query(None, description="Filter by organization name"),
+    state: Optional[str] = Query(None, description="Filter by state code (e.g., 'CA')"),
+    zipcode: Optional[str] = Query(None, description="Filter by ZIP code"),
+    limit: int = Query(20, description="Maximum values per dimension", ge=1, le=1000)
+):
+    """
+    Count matching opportunities by NAICS code, set-aside, notice type, state and agency.
+
+    Computed from the local mirror; each dimension's counts ignore that
+    dimension's own filter.
+    """
     try:
-        return client.search_opportunities(
+        await run_in_threadpool(facets.refresh)
+        result = await run_in_threadpool(
+            facets.facets,
             keyword=q,
             naics_code=naics_codes,
             set_aside=set_asides,
             status=notice_type,
-            page=page,
-            limit=limit,
             posted_from=posted_from,
             posted_to=posted_to,
             organization_id=organization_id,
             organization_name=organization_name,
             place_of_performance_state=state,
-            place_of_performance_zipcode=zipcode
+            place_of_performance_zipcode=zipcode,
+            limit=limit
         )
+        result["metadata"]["covered"] = await run_in_threadpool(facets.mirror.covers, posted_from, posted_to)
+        return request.app.state.responses.respond(request, "/api/opportunities/facets", result)
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error searching opportunities: {str(e)}")
+        logger.error(f"Error counting facets: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/opportunities/export")
+async def export_opportunities(
+    request: Request,
+    client: AsyncSAMAPIClient = Depends(get_sam_client),
+    mirror: Optional[OpportunityMirror] = Depends(get_mirror),
+    q: Optional[str] = Query(None, description="Search term"),
+    naics_codes: Optional[str] = Query(None, description="NAICS code filter (comma-separated)"),
+    set_asides: Optional[str] = Query(None, description="Set-aside type (e.g., 'SBA', 'WOSB')"),
+    notice_type: Optional[str] = Query(None, description="Notice type (e.g., 'p', 'o', 'k')"),
+    posted_from: Optional[str] = Query(None, description="Start date (YYYY-MM-DD or MM/dd/yyyy)"),
+    posted_to: Optional[str] = Query(None, description="End date (YYYY-MM-DD or MM/dd/yyyy)"),
+    organization_id: Optional[str] = Query(None, description="Filter by organization ID"),
+    organization_name: Optional[str] = Query(None, description="Filter by organization name"),
+    state: Optional[str] = Query(None, description="Filter by state code (e.g., 'CA')"),
+    zipcode: Optional[str] = Query(None, description="Filter by ZIP code"),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Export format"),
+    source: str = Query("auto", pattern="^(auto|live|mirror)$", description="Serve from the local mirror, SAM.gov, or the mirror when it covers the date range")
+):
+    """Stream every opportunity matching the filters as NDJSON or CSV."""
+    filters = dict(
+        keyword=q,
+        naics_code=naics_codes,
+        set_aside=set_asides,
+        status=notice_type,
+        posted_from=posted_from,
+        posted_to=posted_to,
+        organization_id=organization_id,
+        organization_name=organization_name,
+        place_of_performance_state=state,
+        place_of_performance_zipcode=zipcode
+    )
+    if source == "mirror" and mirror is None:
+        raise HTTPException(status_code=400, detail="Local mirror is not configured")
+    exporter = OpportunityExporter(client, mirror, **request.app.state.export_options)
+    if mirror is not None and (source == "mirror" or (
+        source == "auto" and await run_in_threadpool(mirror.covers, posted_from, posted_to)
+    )):
+        pages = exporter.mirror_pages(**filters)
+    else:
+        pages = exporter.live_pages(**filters)
+    try:
+        body = await prime(ndjson_chunks(pages) if format == "ndjson" else csv_chunks(pages))
+    except (RateLimitExceeded, CircuitOpen):
+        raise
+    except ValueError as e:
+        logger.error(f"Invalid request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting opportunities: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="opportunities.{format}"'}
+    )
+
+@app.post("/api/opportunities/batch")
+async def get_opportunities_batch(
+    batch: BatchRequest,
+    client: AsyncSAMAPIClient = Depends(get_sam_client),
+    mirror: Optional[OpportunityMirror] = Depends(get_mirror),
+    relevance: Optional[RelevanceScorer] = Depends(get_relevance)
+):
+    """
+    Get details, and optionally descriptions, for up to 300 opportunities.
 
-@app.get("/api/opportunities/{notice_id}")
-async def get_opportunity(notice_id: str, client: SAMAPIClient = Depends(get_sam_client)):
+    Failures are reported per notice ID under ``errors``.
+    """
+    return await fetch_batch(
+        client,
+        batch.notice_ids,
+        mirror=mirror,
+        include_description=batch.include_description,
+        scorer=relevance
+    )
+
+@app.get("/api/opportunities/{notice_id}", response_class=FastJSONResponse)
+async def get_opportunity(
+    notice_id: str,
+    request: Request,
+    client: AsyncSAMAPIClient = Depends(get_sam_client),
+    fields: Optional[str] = Query(None, description="Fields to return (comma-separated, dotted paths allowed)")
+):
     """
     Get detailed information about a specific opportunity.
     """
     try:
-        return client.get_opportunity(notice_id)
+        projection = parse_fields(fields)
+        opportunity = project(await client.get_opportunity(notice_id), projection)
+        return request.app.state.responses.respond(
+            request, "/api/opportunities/{notice_id}", opportunity, headers=freshness_headers(current_freshness())
+        )
+    except (RateLimitExceeded, CircuitOpen):
+        raise
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching opportunity {notice_id}: {str(e)}")
+        raise upstream_error(e)
     except Exception as e:
         logger.error(f"Error fetching opportunity {notice_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/opportunities/{notice_id}/description")
-async def get_opportunity_description(notice_id: str, client: SAMAPIClient = Depends(get_sam_client)):
+async def get_opportunity_description(notice_id: str, client: AsyncSAMAPIClient = Depends(get_sam_client)):
     """
     Get the full description text of an opportunity.
     """
     try:
-        return {"description": client.get_opportunity_description(notice_id)}
+        description = await client.get_opportunity_description(notice_id)
+        return JSONResponse({"description": description}, headers=freshness_headers(current_freshness()))
+    except (RateLimitExceeded, CircuitOpen):
+        raise
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
+    except httpx.HTTPError as e:
+        logger.error(f"Error fetching description for {notice_id}: {str(e)}")
+        raise upstream_error(e)
     except Exception as e:
         logger.error(f"Error fetching description for {notice_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/opportunities/resources/{resource_id}")
-async def get_resource_file(resource_id: str, client: SAMAPIClient = Depends(get_sam_client)):
+async def get_resource_file(
+    resource_id: str,
+    request: Request,
+    client: AsyncSAMAPIClient = Depends(get_sam_client)
+):
     """
     Download a resource file associated with an opportunity.
+
+    Files are streamed from SAM.gov and cached on disk; cached files support
+    Range and conditional (If-None-Match / If-Modified-Since) requests.
     """
+    resource_cache = request.app.state.resource_cache
+    entry = await run_in_threadpool(resource_cache.lookup, resource_id)
+    if entry is not None:
+        return CachedFileResponse(entry, request.headers)
+
+    range_header = request.headers.get("range")
     try:
-        content = client.get_resource_file(resource_id)
-        return Response(content=content)
+        upstream = await client.open_resource(resource_id, range_header)
+    except (RateLimitExceeded, CircuitOpen):
+        raise
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -140,13 +739,49 @@ async def get_resource_file(resource_id: str, client: SAMAPIClient = Depends(get
         logger.error(f"Error downloading resource {resource_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    headers = {name: upstream.headers[name] for name in PASSTHROUGH_HEADERS if name in upstream.headers}
+    if "content-encoding" in upstream.headers:
+        # The body is relayed decoded, so the upstream length no longer applies
+        headers.pop("content-length", None)
+    if upstream.status_code == 200:
+        body = resource_cache.stream_and_store(resource_id, upstream)
+    else:
+        # Partial content is relayed as-is; the full file is cached on a later request
+        body = upstream.aiter_bytes()
+    return StreamingResponse(
+        body,
+        status_code=upstream.status_code,
+        headers=headers,
+        background=BackgroundTask(upstream.aclose)
+    )
+
+@app.get("/api/catalogs/status")
+async def get_catalog_status(request: Request):
+    """
+    Get the size, source and age of the current organization and set-aside catalogs.
+    """
+    snapshot = request.app.state.catalogs.snapshot
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Catalogs have not been built yet")
+    return snapshot.status()
+
 @app.get("/api/organizations")
-async def get_organizations(client: SAMAPIClient = Depends(get_sam_client)):
+async def get_organizations(request: Request, client: AsyncSAMAPIClient = Depends(get_sam_client)):
     """
     Get a list of organizations that post opportunities.
+
+    Served from the precomputed catalog when one has been built, including
+    the hierarchy (``parentId``, ``level``) and notice counts.
     """
+    snapshot = request.app.state.catalogs.snapshot
+    if snapshot is not None:
+        return request.app.state.responses.respond(
+            request, "/api/organizations", body=snapshot.organizations_json, etag=snapshot.organizations_etag
+        )
     try:
-        return client.get_organizations()
+        return await client.get_organizations()
+    except (RateLimitExceeded, CircuitOpen):
+        raise
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -155,15 +790,163 @@ async def get_organizations(client: SAMAPIClient = Depends(get_sam_client)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/setasides")
-async def get_setasides(client: SAMAPIClient = Depends(get_sam_client)):
+async def get_setasides(request: Request, client: AsyncSAMAPIClient = Depends(get_sam_client)):
     """
     Get a list of valid set-aside types and codes.
+
+    Served from the precomputed catalog when one has been built, with
+    notice counts.
     """
+    snapshot = request.app.state.catalogs.snapshot
+    if snapshot is not None:
+        return request.app.state.responses.respond(
+            request, "/api/setasides", body=snapshot.setasides_json, etag=snapshot.setasides_etag
+        )
     try:
-        return client.get_setasides()
+        return await client.get_setasides()
+    except (RateLimitExceeded, CircuitOpen):
+        raise
     except ValueError as e:
         logger.error(f"Invalid request: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching set-aside types: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/entities/search")
+async def search_entities(
+    entities: EntityIndex = Depends(get_entities),
+    q: str = Query(..., min_length=1, description="Legal or DBA business name, or its prefix"),
+    fuzzy: bool = Query(False, description="Rank by name similarity instead of prefix matching"),
+    limit: int = Query(20, description="Maximum results", ge=1, le=100)
+):
+    """
+    Search registered entities by legal or DBA name.
+    """
+    try:
+        return {"entities": await run_in_threadpool(entities.search, q, fuzzy, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/entities/match")
+async def match_entities(
+    entities: EntityIndex = Depends(get_entities),
+    naics_code: str = Query(..., description="The opportunity's NAICS code"),
+    set_aside: Optional[str] = Query(None, description="The opportunity's set-aside type (e.g., 'SBA', 'SDVOSBC')"),
+    page: int = Query(1, description="Page number", ge=1),
+    limit: int = Query(100, description="Results per page", ge=1, le=1000)
+):
+    """
+    Find registered entities eligible to bid on an opportunity.
+
+    Matches active, unexcluded registrations listing the NAICS code; for a
+    set-aside, only entities that are small for that code and hold the
+    required certification.
+    """
+    try:
+        return await run_in_threadpool(entities.match, naics_code, set_aside, limit, (page - 1) * limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/entities/cage/{cage_code}")
+async def get_entity_by_cage(cage_code: str, entities: EntityIndex = Depends(get_entities)):
+    """
+    Get an entity registration by CAGE code.
+    """
+    entity = await run_in_threadpool(entities.get, None, cage_code)
+    if entity is None:
+        raise HTTPException(status_code=404, detail=f"No entity with CAGE code {cage_code}")
+    return entity
+
+@app.get("/api/entities/{uei}")
+async def get_entity(uei: str, entities: EntityIndex = Depends(get_entities)):
+    """
+    Get an entity registration by Unique Entity ID (UEI).
+    """
+    entity = await run_in_threadpool(entities.get, uei)
+    if entity is None:
+        raise HTTPException(status_code=404, detail=f"No entity with UEI {uei}")
+    return entity
+
+@app.post("/api/alerts/subscriptions", status_code=201)
+async def create_alert_subscription(
+    subscription: AlertSubscriptionRequest,
+    api_key: str = Depends(get_api_key),
+    alerts: AlertEngine = Depends(get_alerts)
+):
+    """
+    Save a search; notices added or changed by later mirror syncs that match it raise alerts.
+    """
+    try:
+        criteria = build_criteria(
+            q=subscription.q,
+            naics_codes=subscription.naics_codes,
+            set_asides=subscription.set_asides,
+            notice_type=subscription.notice_type,
+            organization_id=subscription.organization_id,
+            state=subscription.state
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await run_in_threadpool(alerts.create_subscription, owner_id(api_key), subscription.name, criteria)
+
+@app.get("/api/alerts/subscriptions")
+async def list_alert_subscriptions(api_key: str = Depends(get_api_key), alerts: AlertEngine = Depends(get_alerts)):
+    """
+    List the caller's saved searches.
+    """
+    return {"subscriptions": await run_in_threadpool(alerts.list_subscriptions, owner_id(api_key))}
+
+@app.delete("/api/alerts/subscriptions/{subscription_id}", status_code=204)
+async def delete_alert_subscription(
+    subscription_id: int,
+    api_key: str = Depends(get_api_key),
+    alerts: AlertEngine = Depends(get_alerts)
+):
+    """
+    Delete one of the caller's saved searches and its pending alerts.
+    """
+    if not await run_in_threadpool(alerts.delete_subscription, owner_id(api_key), subscription_id):
+        raise HTTPException(status_code=404, detail=f"No subscription {subscription_id}")
+    return Response(status_code=204)
+
+@app.get("/api/alerts")
+async def get_alerts_outbox(
+    api_key: str = Depends(get_api_key),
+    alerts: AlertEngine = Depends(get_alerts),
+    after: int = Query(0, description="Sequence number of the last alert already read", ge=0),
+    limit: int = Query(100, description="Maximum alerts", ge=1, le=1000)
+):
+    """
+    Poll the caller's alerts; pass the returned ``next`` as ``after`` to continue.
+    """
+    return await run_in_threadpool(alerts.fetch, owner_id(api_key), after, limit)
+
+@app.get("/api/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    api_key: str = Depends(get_api_key),
+    alerts: AlertEngine = Depends(get_alerts),
+    after: int = Query(0, description="Sequence number of the last alert already read", ge=0)
+):
+    """
+    Stream the caller's alerts as server-sent events, resuming after ``Last-Event-ID``.
+    """
+    owner = owner_id(api_key)
+    last_event_id = request.headers.get("last-event-id", "")
+    cursor = int(last_event_id) if last_event_id.isdigit() else after
+    poll_interval = float(os.getenv("SAM_ALERTS_POLL_INTERVAL", "5"))
+
+    async def events():
+        nonlocal cursor
+        while not await request.is_disconnected():
+            batch = await run_in_threadpool(alerts.fetch, owner, cursor, 100)
+            for alert in batch["alerts"]:
+                yield f"id: {alert['seq']}\nevent: alert\ndata: {json.dumps(alert)}\n\n"
+            cursor = batch["next"]
+            if not batch["alerts"]:
+                # Comment line; keeps proxies from closing the idle connection
+                yield ": keep-alive\n\n"
+                await asyncio.sleep(poll_interval)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
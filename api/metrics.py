@@ -0,0 +1,487 @@
+"""Prometheus metrics and a sampling profiler
+
+Hot-path instrumentation (upstream calls, rate-limit waits, request
+latency) records into in-process counters and histograms that cost about a
+microsecond per sample: a bisect into the bucket bounds and two additions
+under an uncontended lock. Everything else (cache hit ratios, quota left) is
+read from the existing ``stats()`` methods when ``/metrics`` is scraped, so
+it costs nothing between scrapes. ``render`` produces the Prometheus text
+exposition format (version 0.0.4).
+"""
+
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as TallyCounter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+# (labels, value) pairs of one metric family, as produced by collectors
+Samples = List[Tuple[Dict[str, str], float]]
+Family = Tuple[str, str, str, Samples]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    """Base class of labelled metric families."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, values: Tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """Monotonic counter per label combination."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple = (), amount: float = 1) -> None:
+        """Add amount to the series for the given label values."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self._labels(labels))} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values per label combination."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        """Record one value for the given label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def lines(self) -> Iterable[str]:
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            label_values = self._labels(labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket_labels = dict(label_values, le=_format_value(float(bound)))
+                yield f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(label_values)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(label_values)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Metric families plus collectors evaluated at scrape time."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric family to the exposition."""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """
+        Add a callable returning ``(name, type, help, samples)`` families at scrape time.
+
+        Collector failures are logged and skipped so one broken source does
+        not take down the whole scrape.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        for collector in self._collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {str(e)}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Metrics:
+    """The application's hot-path metric families."""
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.upstream_latency = self.registry.register(Histogram(
+            "sam_upstream_request_duration_seconds",
+            "SAM.gov request latency by API endpoint",
+            ("endpoint",)
+        ))
+        self.upstream_responses = self.registry.register(Counter(
+            "sam_upstream_responses_total",
+            "SAM.gov responses by API endpoint and status code",
+            ("endpoint", "status")
+        ))
+        self.rate_limit_wait = self.registry.register(Histogram(
+            "sam_rate_limit_wait_seconds",
+            "Time upstream requests waited for a rate-limit token",
+            buckets=WAIT_BUCKETS
+        ))
+        self.request_latency = self.registry.register(Histogram(
+            "http_request_duration_seconds",
+            "Server latency by route, method and status code",
+            ("method", "route", "status")
+        ))
+
+    def observe_upstream(self, url: str, status: str, seconds: float) -> None:
+        """Record one SAM.gov call by its endpoint (e.g. "v2/search")."""
+        endpoint = upstream_endpoint(url)
+        self.upstream_latency.observe(seconds, (endpoint,))
+        self.upstream_responses.inc((endpoint, status))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """See MetricsRegistry.add_collector."""
+        self.registry.add_collector(collector)
+
+    def render(self) -> str:
+        """See MetricsRegistry.render."""
+        return self.registry.render()
+
+
+def upstream_endpoint(url: str) -> str:
+    """
+    Label a SAM.gov URL by API version and endpoint.
+
+    ``https://api.sam.gov/opportunities/v2/search`` becomes ``v2/search`` and
+    resource downloads become ``v3/resources``, so per-file URLs do not
+    create a series each.
+    """
+    _, _, path = url.partition("/opportunities/")
+    parts = path.split("/", 2)
+    return "/".join(parts[:2]) if len(parts) >= 2 else "other"
+
+
+def cache_families(client_stats: Dict, resource_stats: Optional[Dict] = None, response_stats: Optional[Dict] = None) -> List[Family]:
+    """
+    Turn cache ``stats()`` dicts into hit/miss counters and hit ratios per tier.
+
+    Args:
+        client_stats: SAMClientRegistry.stats(); L1 tiers are summed over
+            clients, and the shared L2 is counted once. Stale hits and the
+            circuit breaker state are reported alongside
+        resource_stats: ResourceCache.stats()
+        response_stats: ConditionalResponder.stats()
+
+    Returns:
+        Metric families for MetricsRegistry collectors
+    """
+    tiers: Dict[str, List[float]] = {}
+    stale: Dict[str, float] = {}
+    for stats in client_stats.get("clients", {}).values():
+        l1 = tiers.setdefault("l1", [0, 0])
+        l1[0] += stats["l1"]["hits"]
+        l1[1] += stats["l1"]["misses"]
+        stale["l1"] = stale.get("l1", 0) + stats["l1"]["stale_hits"]
+        if "l2" in stats:
+            tiers["l2"] = [stats["l2"]["hits"], stats["l2"]["misses"]]
+            stale["l2"] = stats["l2"]["stale_hits"]
+    if resource_stats is not None:
+        tiers["resources"] = [resource_stats["hits"], resource_stats["misses"]]
+    if response_stats is not None:
+        compressed = response_stats["compressed_cache"]
+        tiers["compressed_responses"] = [compressed["hits"], compressed["misses"]]
+
+    hits = [({"tier": tier}, counts[0]) for tier, counts in tiers.items()]
+    misses = [({"tier": tier}, counts[1]) for tier, counts in tiers.items()]
+    ratios = [
+        ({"tier": tier}, counts[0] / (counts[0] + counts[1]) if counts[0] + counts[1] else 0.0)
+        for tier, counts in tiers.items()
+    ]
+    families = [
+        ("sam_cache_hits_total", "counter", "Cache hits by tier", hits),
+        ("sam_cache_misses_total", "counter", "Cache misses by tier", misses),
+        ("sam_cache_hit_ratio", "gauge", "Cache hit ratio by tier since start", ratios),
+        ("sam_cache_stale_hits_total", "counter", "Expired entries served while being refreshed, by tier",
+         [({"tier": tier}, count) for tier, count in stale.items()]),
+    ]
+    singleflight = client_stats.get("singleflight")
+    if singleflight is not None:
+        families.append((
+            "sam_upstream_coalesced_total", "counter",
+            "Upstream calls answered by an identical in-flight call",
+            [({}, singleflight["coalesced"])]
+        ))
+    breaker = client_stats.get("circuit_breaker")
+    if breaker is not None:
+        families.extend([
+            ("sam_upstream_circuit_open", "gauge", "Whether upstream calls are being short-circuited",
+             [({}, 0 if breaker["state"] == "closed" else 1)]),
+            ("sam_upstream_circuit_opened_total", "counter", "Times the circuit breaker opened",
+             [({}, breaker["opened"])]),
+            ("sam_upstream_circuit_rejected_total", "counter", "Upstream calls rejected by the open circuit breaker",
+             [({}, breaker["rejected"])]),
+        ])
+    return families
+
+
+def rate_limit_families(limiter_stats: Dict, key_status: Iterable[Dict]) -> List[Family]:
+    """
+    Turn rate limiter counters and per-key status into metric families.
+
+    Args:
+        limiter_stats: TokenBucketRateLimiter.stats()
+        key_status: TokenBucketRateLimiter.status() of each registered key
+
+    Returns:
+        Metric families for MetricsRegistry collectors
+    """
+    key_status = list(key_status)
+    return [
+        ("sam_rate_limit_queue_depth", "gauge", "Requests currently waiting for a rate-limit token",
+         [({}, limiter_stats["waiting"])]),
+        ("sam_rate_limit_rejections_total", "counter", "Requests rejected by the rate limiter",
+         [({}, limiter_stats["rejections"])]),
+        ("sam_rate_limit_tokens", "gauge", "Tokens left in each key's bucket",
+         [({"key": status["key"]}, status["tokens"]) for status in key_status]),
+        ("sam_daily_quota_remaining", "gauge", "SAM.gov requests left today for each key",
+         [({"key": status["key"]}, status["daily_remaining"]) for status in key_status]),
+    ]
+
+
+def prefetch_families(prefetch_stats: Dict) -> List[Family]:
+    """
+    Turn SearchPrefetcher.stats() into metric families.
+
+    Prefetch hits are foreground requests for a page the prefetcher fetched;
+    they are also counted as ordinary cache hits in their tier.
+    """
+    outcomes = ("fetched", "already_cached", "skipped_budget", "skipped_busy", "cancelled", "failed")
+    return [
+        ("sam_prefetch_pages_total", "counter", "Prefetched search pages by outcome",
+         [({"outcome": outcome}, prefetch_stats[outcome]) for outcome in outcomes]),
+        ("sam_prefetch_hits_total", "counter", "Foreground searches served a prefetched page",
+         [({}, prefetch_stats["hits"])]),
+        ("sam_prefetch_hit_ratio", "gauge", "Prefetched pages later requested, per page fetched",
+         [({}, prefetch_stats["hit_ratio"])]),
+    ]
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording server latency per route template.
+
+    Requests are labelled by the matched route's path template (so
+    ``/api/opportunities/{notice_id}`` is one series) or ``unmatched``. The
+    metrics are looked up on ``app.state.metrics`` per request, so the
+    middleware can be installed before startup creates them. Streaming
+    responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict] = None
+
+    def _route(self, scope) -> str:
+        if self._routes is None:
+            routes = {}
+            for route in scope["app"].routes:
+                endpoint = getattr(route, "endpoint", None) or getattr(route, "app", None)
+                if endpoint is not None:
+                    routes.setdefault(endpoint, route.path)
+            self._routes = routes
+        return self._routes.get(scope.get("endpoint"), "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        metrics = getattr(scope["app"].state, "metrics", None) if scope["type"] == "http" else None
+        if metrics is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.request_latency.observe(
+                time.perf_counter() - started, (scope["method"], self._route(scope), str(status))
+            )
+
+
+class SamplingProfiler:
+    """Statistical profiler that samples every thread's stack on an interval.
+
+    A daemon thread reads ``sys._current_frames()`` every ``interval``
+    seconds and tallies the stacks in collapsed form (``file:function;...``
+    one line per stack, as flamegraph tools expect). While stopped it costs
+    nothing; while running, the overhead is one stack walk per thread per
+    interval, paid by the sampling thread rather than by requests.
+    """
+
+    def __init__(self, interval: float = 0.01, max_stacks: int = 10_000, max_depth: int = 64):
+        """
+        Initialize the profiler, stopped.
+
+        Args:
+            interval: Seconds between samples
+            max_stacks: Distinct stacks kept; rarer new stacks are dropped beyond this
+            max_depth: Frames kept per stack, innermost first
+        """
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.max_depth = max_depth
+        self.samples = 0
+        self.dropped = 0
+        self.started_at: Optional[float] = None
+        self._stacks: TallyCounter = TallyCounter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None, reset: bool = True) -> None:
+        """
+        Start sampling; a no-op if already running.
+
+        Args:
+            interval: New sampling interval in seconds
+            reset: Discard the stacks collected by earlier runs
+        """
+        if self.running:
+            return
+        if interval is not None:
+            if interval <= 0:
+                raise ValueError("interval must be positive")
+            self.interval = interval
+        if reset:
+            with self._lock:
+                self._stacks.clear()
+                self.samples = 0
+                self.dropped = 0
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started ({self.interval * 1000:.1f}ms interval)")
+
+    def stop(self) -> None:
+        """Stop sampling, keeping the collected stacks."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+
+    def _frame_label(self, frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            stacks = []
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(self._frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(labels)))
+            del frames
+            with self._lock:
+                self.samples += 1
+                for stack in stacks:
+                    if stack in self._stacks or len(self._stacks) < self.max_stacks:
+                        self._stacks[stack] += 1
+                    else:
+                        self.dropped += 1
+
+    def collapsed(self, limit: Optional[int] = None) -> str:
+        """Return the collected stacks in collapsed format, most frequent first."""
+        with self._lock:
+            stacks = self._stacks.most_common(limit)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def stats(self) -> Dict:
+        """Return whether the profiler runs and how much it has collected."""
+        with self._lock:
+            return {
+                "running": self.running,
+                "interval": self.interval,
+                "started_at": self.started_at,
+                "samples": self.samples,
+                "stacks": len(self._stacks),
+                "dropped": self.dropped,
+            }
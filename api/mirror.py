@@ -0,0 +1,766 @@
+"""Local SQLite mirror of SAM.gov contract opportunities
+
+Opportunities are upserted by noticeId into an indexed table so searches can
+be answered locally, with no upstream calls or rate-limit exposure. An FTS5
+table sharing the opportunities rowid provides BM25-ranked keyword search.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .sam_schedule import get_eastern_date
+from .search_index import COLUMN_WEIGHTS, build_match_query
+
+logger = logging.getLogger(__name__)
+
+# Notice type codes accepted by /api/opportunities mapped to SAM.gov baseType
+NOTICE_TYPES = {
+    "u": "Justification",
+    "p": "Presolicitation",
+    "a": "Award Notice",
+    "r": "Sources Sought",
+    "s": "Special Notice",
+    "o": "Solicitation",
+    "g": "Sale of Surplus Property",
+    "k": "Combined Synopsis/Solicitation",
+    "i": "Intent to Bundle Requirements (DoD-Funded)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS opportunities (
+    notice_id TEXT PRIMARY KEY,
+    title TEXT,
+    solicitation_number TEXT,
+    full_parent_path_name TEXT,
+    full_parent_path_code TEXT,
+    department_code TEXT,
+    subtier_code TEXT,
+    office_code TEXT,
+    posted_date TEXT,
+    type TEXT,
+    base_type TEXT,
+    archive_date TEXT,
+    type_of_set_aside TEXT,
+    type_of_set_aside_description TEXT,
+    response_deadline TEXT,
+    naics_code TEXT,
+    classification_code TEXT,
+    active INTEGER,
+    state TEXT,
+    zipcode TEXT,
+    data TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_opp_naics ON opportunities (naics_code);
+CREATE INDEX IF NOT EXISTS idx_opp_setaside ON opportunities (type_of_set_aside);
+CREATE INDEX IF NOT EXISTS idx_opp_posted ON opportunities (posted_date DESC, notice_id DESC);
+CREATE INDEX IF NOT EXISTS idx_opp_deadline ON opportunities (response_deadline);
+CREATE INDEX IF NOT EXISTS idx_opp_state ON opportunities (state);
+CREATE INDEX IF NOT EXISTS idx_opp_department ON opportunities (department_code);
+CREATE INDEX IF NOT EXISTS idx_opp_subtier ON opportunities (subtier_code);
+CREATE INDEX IF NOT EXISTS idx_opp_office ON opportunities (office_code);
+CREATE INDEX IF NOT EXISTS idx_opp_updated ON opportunities (updated_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS opportunity_fts USING fts5 (
+    title_text,
+    description_text,
+    naics_text,
+    agency_text,
+    tokenize = 'porter unicode61',
+    prefix = '2 3 4'
+);
+CREATE TABLE IF NOT EXISTS descriptions (
+    notice_id TEXT PRIMARY KEY,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    posted_from TEXT NOT NULL,
+    posted_to TEXT NOT NULL,
+    next_offset INTEGER NOT NULL,
+    total INTEGER,
+    started_at REAL NOT NULL,
+    completed_at REAL,
+    PRIMARY KEY (posted_from, posted_to)
+);
+CREATE TABLE IF NOT EXISTS mirror_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO opportunities (
+    notice_id, title, solicitation_number, full_parent_path_name, full_parent_path_code,
+    department_code, subtier_code, office_code, posted_date, type, base_type, archive_date,
+    type_of_set_aside, type_of_set_aside_description, response_deadline, naics_code,
+    classification_code, active, state, zipcode, data, content_hash, first_seen, updated_at
+) VALUES (
+    :notice_id, :title, :solicitation_number, :full_parent_path_name, :full_parent_path_code,
+    :department_code, :subtier_code, :office_code, :posted_date, :type, :base_type, :archive_date,
+    :type_of_set_aside, :type_of_set_aside_description, :response_deadline, :naics_code,
+    :classification_code, :active, :state, :zipcode, :data, :content_hash, :now, :now
+)
+ON CONFLICT(notice_id) DO UPDATE SET
+    title = excluded.title,
+    solicitation_number = excluded.solicitation_number,
+    full_parent_path_name = excluded.full_parent_path_name,
+    full_parent_path_code = excluded.full_parent_path_code,
+    department_code = excluded.department_code,
+    subtier_code = excluded.subtier_code,
+    office_code = excluded.office_code,
+    posted_date = excluded.posted_date,
+    type = excluded.type,
+    base_type = excluded.base_type,
+    archive_date = excluded.archive_date,
+    type_of_set_aside = excluded.type_of_set_aside,
+    type_of_set_aside_description = excluded.type_of_set_aside_description,
+    response_deadline = excluded.response_deadline,
+    naics_code = excluded.naics_code,
+    classification_code = excluded.classification_code,
+    active = excluded.active,
+    state = excluded.state,
+    zipcode = excluded.zipcode,
+    data = excluded.data,
+    content_hash = excluded.content_hash,
+    updated_at = excluded.updated_at
+WHERE opportunities.content_hash != excluded.content_hash
+"""
+
+
+def _nested(record: Dict, *path: str) -> Optional[str]:
+    """Follow a path of keys through nested dicts, returning None on any gap."""
+    value: Any = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value if value not in ("", {}) else None
+
+
+def _date_only(value: Optional[str]) -> Optional[str]:
+    """Reduce a SAM.gov date or timestamp to YYYY-MM-DD."""
+    return value[:10] if value else None
+
+
+def to_iso_date(value: str) -> str:
+    """Convert YYYY-MM-DD or MM/dd/yyyy to YYYY-MM-DD."""
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError("Invalid date format. Expected YYYY-MM-DD or MM/dd/yyyy")
+
+
+def default_date_range(posted_from: Optional[str] = None, posted_to: Optional[str] = None) -> Tuple[str, str]:
+    """
+    The posted-date range a search covers: the last 90 days unless both ends are given.
+
+    Days are US/Eastern, as SAM.gov posts by and as covers() and the sync
+    windows count them, so a search routed to the mirror reads the same
+    range its coverage was checked for.
+    """
+    if not posted_from or not posted_to:
+        end_date = get_eastern_date()
+        return (end_date - timedelta(days=90)).isoformat(), end_date.isoformat()
+    return posted_from, posted_to
+
+
+def flatten_opportunity(record: Dict) -> Dict[str, Any]:
+    """
+    Extract indexed columns from a raw SAM.gov opportunity record.
+
+    Args:
+        record: Opportunity dict as returned by the v2 search endpoint
+
+    Returns:
+        Dict of column values, including the JSON payload and its content hash
+    """
+    data = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    naics = [record.get("naicsCode")] + list(record.get("naicsCodes") or []) + [record.get("classificationCode")]
+    path_codes = [code for code in (record.get("fullParentPathCode") or "").split(".") if code]
+    active = record.get("active")
+    return {
+        "notice_id": record["noticeId"],
+        "title": record.get("title"),
+        "solicitation_number": record.get("solicitationNumber"),
+        "full_parent_path_name": record.get("fullParentPathName"),
+        "full_parent_path_code": record.get("fullParentPathCode"),
+        "department_code": path_codes[0] if path_codes else None,
+        "subtier_code": path_codes[1] if len(path_codes) > 1 else None,
+        "office_code": path_codes[-1] if len(path_codes) > 2 else None,
+        "posted_date": _date_only(record.get("postedDate")),
+        "type": record.get("type"),
+        "base_type": record.get("baseType"),
+        "archive_date": _date_only(record.get("archiveDate")),
+        "type_of_set_aside": record.get("typeOfSetAside"),
+        "type_of_set_aside_description": record.get("typeOfSetAsideDescription"),
+        "response_deadline": record.get("responseDeadLine"),
+        "naics_code": record.get("naicsCode"),
+        "classification_code": record.get("classificationCode"),
+        "active": 1 if str(active).lower() in ("yes", "true", "1") else 0,
+        "state": _nested(record, "placeOfPerformance", "state", "code"),
+        "zipcode": _nested(record, "placeOfPerformance", "zip"),
+        "naics_text": " ".join(dict.fromkeys(code for code in naics if code)),
+        "data": data,
+        "content_hash": hashlib.sha1(data.encode()).hexdigest(),
+    }
+
+
+class OpportunityMirror:
+    """Indexed SQLite store of SAM.gov opportunities keyed by noticeId.
+
+    Each thread gets its own connection so concurrent searches do not queue
+    behind each other; writes are serialized by a lock within the process
+    and by SQLite's write lock across processes.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (and create if needed) the mirror database.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        self._rebuild_search_index_if_empty()
+
+    def _rebuild_search_index_if_empty(self) -> None:
+        """Populate the FTS table for mirrors created before it existed."""
+        conn = self._connection()
+        if conn.execute("SELECT 1 FROM opportunity_fts LIMIT 1").fetchone():
+            return
+        if not conn.execute("SELECT 1 FROM opportunities LIMIT 1").fetchone():
+            return
+        logger.info("Building full-text index for existing mirror")
+        with self._write_lock:
+            conn.execute(
+                """
+                INSERT INTO opportunity_fts (rowid, title_text, description_text, naics_text, agency_text)
+                SELECT rowid, coalesce(title, ''), '',
+                       coalesce(naics_code, '') || ' ' || coalesce(classification_code, ''),
+                       coalesce(full_parent_path_name, '')
+                FROM opportunities
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, records: Iterable[Dict]) -> List[Tuple[str, str]]:
+        """
+        Insert or update opportunities by noticeId.
+
+        Records whose content is unchanged are left untouched.
+
+        Args:
+            records: Raw SAM.gov opportunity dicts
+
+        Returns:
+            List of (notice_id, change) pairs where change is "new" or "updated"
+        """
+        rows = [flatten_opportunity(record) for record in records if record.get("noticeId")]
+        if not rows:
+            return []
+        now = time.time()
+        ids = [row["notice_id"] for row in rows]
+        conn = self._connection()
+        changes = []
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {}
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start:start + 500]
+                    existing.update(conn.execute(
+                        f"SELECT notice_id, content_hash FROM opportunities WHERE notice_id IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall())
+                for row in rows:
+                    previous = existing.get(row["notice_id"])
+                    if previous == row["content_hash"]:
+                        continue
+                    conn.execute(UPSERT_SQL, {**row, "now": now})
+                    self._index_row(conn, row, is_new=previous is None)
+                    changes.append((row["notice_id"], "new" if previous is None else "updated"))
+                    existing[row["notice_id"]] = row["content_hash"]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return changes
+
+    def _index_row(self, conn: sqlite3.Connection, row: Dict[str, Any], is_new: bool) -> None:
+        """Add or refresh a row's full-text entry, keeping any indexed description."""
+        rowid = conn.execute(
+            "SELECT rowid FROM opportunities WHERE notice_id = ?", (row["notice_id"],)
+        ).fetchone()[0]
+        values = (
+            row["title"] or "",
+            row["naics_text"],
+            (row["full_parent_path_name"] or "").replace(".", " "),
+            rowid,
+        )
+        if not is_new and conn.execute("SELECT 1 FROM opportunity_fts WHERE rowid = ?", (rowid,)).fetchone():
+            conn.execute(
+                "UPDATE opportunity_fts SET title_text = ?, naics_text = ?, agency_text = ? WHERE rowid = ?",
+                values
+            )
+        else:
+            conn.execute(
+                "INSERT INTO opportunity_fts (title_text, description_text, naics_text, agency_text, rowid) "
+                "VALUES (?, '', ?, ?, ?)",
+                values
+            )
+
+    def set_description(self, notice_id: str, description: str) -> None:
+        """Index the plain-text description of a mirrored notice."""
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT rowid FROM opportunities WHERE notice_id = ?", (notice_id,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE opportunity_fts SET description_text = ? WHERE rowid = ?",
+                        (description, row[0])
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO descriptions (notice_id, indexed_at) VALUES (?, ?)",
+                        (notice_id, time.time())
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def notices_missing_description(self, limit: Optional[int] = None) -> List[str]:
+        """Return IDs of active notices without an indexed description, newest first."""
+        return [row[0] for row in self._connection().execute(
+            """
+            SELECT o.notice_id FROM opportunities o
+            LEFT JOIN descriptions d ON d.notice_id = o.notice_id
+            WHERE d.notice_id IS NULL AND o.active = 1
+            ORDER BY o.posted_date DESC
+            LIMIT ?
+            """,
+            (-1 if limit is None else limit,)
+        )]
+
+    def get(self, notice_id: str) -> Optional[Dict]:
+        """Return the stored opportunity dict for notice_id, if any."""
+        row = self._connection().execute(
+            "SELECT data FROM opportunities WHERE notice_id = ?", (notice_id,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def get_many(self, notice_ids: List[str]) -> Dict[str, Dict]:
+        """Return stored opportunity dicts for the given notice IDs that exist."""
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(notice_ids), 500):
+            chunk = notice_ids[start:start + 500]
+            for row in conn.execute(
+                f"SELECT notice_id, data FROM opportunities WHERE notice_id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ):
+                found[row["notice_id"]] = json.loads(row["data"])
+        return found
+
+    def catalog_counts(self, posted_from: str) -> Dict[Tuple[Optional[str], ...], int]:
+        """
+        Count active notices posted since posted_from per organization path and set-aside.
+
+        Returns:
+            Notice counts keyed by (full_parent_path_name, full_parent_path_code,
+            type_of_set_aside, type_of_set_aside_description)
+        """
+        rows = self._connection().execute(
+            """
+            SELECT full_parent_path_name, full_parent_path_code,
+                   type_of_set_aside, type_of_set_aside_description, COUNT(*)
+            FROM opportunities
+            WHERE active = 1 AND posted_date >= ?
+            GROUP BY 1, 2, 3, 4
+            """,
+            (to_iso_date(posted_from),)
+        ).fetchall()
+        return {tuple(row[:4]): row[4] for row in rows}
+
+    def count(self) -> int:
+        """Return the number of stored opportunities."""
+        return self._connection().execute("SELECT COUNT(*) FROM opportunities").fetchone()[0]
+
+    def _build_filters(
+        self,
+        naics_code: Optional[str] = None,
+        set_aside: Optional[str] = None,
+        status: Optional[str] = None,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        organization_name: Optional[str] = None,
+        place_of_performance_state: Optional[str] = None,
+        place_of_performance_zipcode: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> Tuple[str, List[Any]]:
+        """
+        Translate search filters into a SQL WHERE clause and parameters.
+
+        Columns are qualified with the ``o`` alias for the opportunities
+        table. The keyword is not included; it is matched through the
+        full-text index by search(). ``after`` restricts results to those
+        following a (posted_date, notice_id) position, newest first.
+        """
+        clauses = ["o.active = 1"]
+        params: List[Any] = []
+
+        posted_from, posted_to = default_date_range(posted_from, posted_to)
+        posted_from, posted_to = to_iso_date(posted_from), to_iso_date(posted_to)
+        if after is not None and after[0] <= posted_to:
+            # The position stands in for the upper date bound: SQLite only
+            # seeks idx_opp_posted to a row value when it is the upper bound
+            clauses.append("o.posted_date >= ? AND (o.posted_date, o.notice_id) < (?, ?)")
+            params += [posted_from, *after]
+        else:
+            clauses.append("o.posted_date BETWEEN ? AND ?")
+            params += [posted_from, posted_to]
+
+        def add_in(column: str, value: Optional[str], transform=lambda v: v):
+            items = [transform(item.strip()) for item in (value or "").split(",") if item.strip()]
+            if items:
+                clauses.append(f"o.{column} IN ({','.join('?' * len(items))})")
+                params.extend(items)
+
+        add_in("naics_code", naics_code)
+        add_in("type_of_set_aside", set_aside, str.upper)
+        add_in("base_type", status, lambda code: NOTICE_TYPES.get(code.lower(), code))
+        add_in("state", place_of_performance_state, str.upper)
+        add_in("zipcode", place_of_performance_zipcode)
+
+        if organization_id:
+            clauses.append("(o.department_code = ? OR o.subtier_code = ? OR o.office_code = ?)")
+            params += [organization_id] * 3
+        if organization_name:
+            clauses.append("o.full_parent_path_name LIKE ?")
+            params.append(f"%{organization_name}%")
+
+        return " AND ".join(clauses), params
+
+    def search(
+        self,
+        keyword: Optional[str] = None,
+        naics_code: Optional[str] = None,
+        set_aside: Optional[str] = None,
+        status: Optional[str] = None,
+        page: int = 1,
+        limit: int = 10,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        organization_name: Optional[str] = None,
+        place_of_performance_state: Optional[str] = None,
+        place_of_performance_zipcode: Optional[str] = None
+    ) -> Dict:
+        """
+        Search stored opportunities with the same filters as SAMAPIClient.search_opportunities.
+
+        Results are returned in the same shape as a live search, with
+        ``metadata.source`` set to ``"mirror"``. Without a keyword they are
+        ordered newest first. With a keyword (see build_match_query for the
+        syntax) they are matched against titles, descriptions, NAICS codes
+        and agency names, ordered by BM25 relevance, and each carries its
+        ``searchScore`` (higher is more relevant).
+        """
+        where, params = self._build_filters(
+            naics_code=naics_code,
+            set_aside=set_aside,
+            status=status,
+            posted_from=posted_from,
+            posted_to=posted_to,
+            organization_id=organization_id,
+            organization_name=organization_name,
+            place_of_performance_state=place_of_performance_state,
+            place_of_performance_zipcode=place_of_performance_zipcode
+        )
+        conn = self._connection()
+        offset = (page - 1) * limit
+        match = build_match_query(keyword) if keyword else None
+
+        if match is None:
+            total = conn.execute(f"SELECT COUNT(*) FROM opportunities o WHERE {where}", params).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT o.data FROM opportunities o WHERE {where} "
+                "ORDER BY o.posted_date DESC, o.notice_id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+            opportunities = [json.loads(row["data"]) for row in rows]
+        else:
+            # Rank inside the FTS table first and join only the matches; the
+            # window count avoids a second pass over the hits for the total
+            weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+            source = (
+                f"FROM (SELECT rowid AS rid, bm25(opportunity_fts, {weights}) AS rank "
+                "FROM opportunity_fts WHERE opportunity_fts MATCH ?) h "
+                f"CROSS JOIN opportunities o ON o.rowid = h.rid WHERE {where}"
+            )
+            hits = conn.execute(
+                f"SELECT h.rid, h.rank, COUNT(*) OVER () AS total {source} ORDER BY h.rank LIMIT ? OFFSET ?",
+                [match] + params + [limit, offset]
+            ).fetchall()
+            if hits:
+                total = hits[0]["total"]
+            else:
+                total = conn.execute(f"SELECT COUNT(*) {source}", [match] + params).fetchone()[0]
+            data = dict(conn.execute(
+                f"SELECT rowid, data FROM opportunities WHERE rowid IN ({','.join('?' * len(hits))})",
+                [hit["rid"] for hit in hits]
+            ).fetchall()) if hits else {}
+            opportunities = []
+            for hit in hits:
+                opportunity = json.loads(data[hit["rid"]])
+                opportunity["searchScore"] = round(-hit["rank"], 4)
+                opportunities.append(opportunity)
+
+        return {
+            "opportunities": opportunities,
+            "metadata": {
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "source": "mirror"
+            }
+        }
+
+    def scan(
+        self,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 1000,
+        keyword: Optional[str] = None,
+        seen_before: Optional[float] = None,
+        **filters: Any
+    ) -> List[Dict]:
+        """
+        Read matching opportunities newest first, one keyset page at a time.
+
+        Unlike search(), pages are addressed by the (postedDate, noticeId) of
+        the last record already read rather than an offset, so walking an
+        entire result set costs one index range scan per page. A keyword is
+        applied as a full-text filter; results are not ranked.
+
+        Args:
+            after: (posted_date, notice_id) of the last record of the
+                previous page, or None for the first page
+            limit: Maximum records to return
+            keyword: Optional full-text query; like search(), one without
+                searchable terms is ignored
+            seen_before: Leave out notices first stored after this time, so
+                pages of one walk stay consistent while the mirror syncs
+            **filters: Any other search() filter except page
+
+        Returns:
+            List of raw opportunity records
+        """
+        where, params = self._build_filters(after=after, **filters)
+        match = build_match_query(keyword) if keyword else None
+        if match is not None:
+            where += " AND o.rowid IN (SELECT rowid FROM opportunity_fts WHERE opportunity_fts MATCH ?)"
+            params.append(match)
+        if seen_before is not None:
+            where += " AND o.first_seen <= ?"
+            params.append(seen_before)
+        rows = self._connection().execute(
+            f"SELECT o.data FROM opportunities o WHERE {where} "
+            "ORDER BY o.posted_date DESC, o.notice_id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def keyword_rowids(self, keyword: str) -> Optional[List[int]]:
+        """
+        Return the rowids of notices matching a full-text query (see build_match_query).
+
+        None when the keyword has no searchable terms, which search() ignores.
+        """
+        match = build_match_query(keyword)
+        if match is None:
+            return None
+        return [row[0] for row in self._connection().execute(
+            "SELECT rowid FROM opportunity_fts WHERE opportunity_fts MATCH ?", (match,)
+        )]
+
+    def changes_since(self, after: Optional[Tuple[float, int]] = None, limit: int = 1000) -> List[Dict]:
+        """
+        Read notices inserted or changed since a point in the mirror's history.
+
+        Every upsert that changes a notice moves it to the end of this
+        (updated_at, rowid) order, so walking it from a saved position visits
+        each change once.
+
+        Args:
+            after: (updated_at, rowid) of the last change already read, or
+                None to start from the oldest
+            limit: Maximum rows to return
+
+        Returns:
+            Indexed columns of each changed notice (not its JSON payload),
+            with ``rowid`` and ``change`` ("new" or "updated")
+        """
+        where, params = "", []
+        if after is not None:
+            where, params = "WHERE (updated_at, rowid) > (?, ?)", list(after)
+        rows = self._connection().execute(
+            f"""
+            SELECT rowid, notice_id, title, full_parent_path_name, department_code, subtier_code, office_code,
+                   posted_date, base_type, type_of_set_aside, response_deadline, naics_code, classification_code,
+                   active, state, zipcode, content_hash, first_seen, updated_at
+            FROM opportunities {where} ORDER BY updated_at, rowid LIMIT ?
+            """,
+            params + [limit]
+        ).fetchall()
+        return [
+            dict(row, change="new" if row["first_seen"] == row["updated_at"] else "updated")
+            for row in rows
+        ]
+
+    def last_change(self) -> Optional[Tuple[float, int]]:
+        """Return the (updated_at, rowid) of the most recent change, if any."""
+        row = self._connection().execute(
+            "SELECT updated_at, rowid FROM opportunities ORDER BY updated_at DESC, rowid DESC LIMIT 1"
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    # Sync bookkeeping
+
+    def get_checkpoint(self, posted_from: str, posted_to: str) -> Optional[Dict]:
+        """Return the sync checkpoint for a posted-date window, if any."""
+        row = self._connection().execute(
+            "SELECT * FROM sync_checkpoints WHERE posted_from = ? AND posted_to = ?",
+            (posted_from, posted_to)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def save_checkpoint(
+        self,
+        posted_from: str,
+        posted_to: str,
+        next_offset: int,
+        total: Optional[int],
+        completed: bool = False
+    ) -> None:
+        """Record sync progress for a posted-date window."""
+        now = time.time()
+        with self._write_lock:
+            self._connection().execute(
+                """
+                INSERT INTO sync_checkpoints (posted_from, posted_to, next_offset, total, started_at, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(posted_from, posted_to) DO UPDATE SET
+                    next_offset = excluded.next_offset,
+                    total = excluded.total,
+                    completed_at = excluded.completed_at
+                """,
+                (posted_from, posted_to, next_offset, total, now, now if completed else None)
+            )
+
+    def set_meta(self, key: str, value: str) -> None:
+        """Store a mirror metadata value."""
+        with self._write_lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew a named lease shared by every process using this mirror.
+
+        Used so only one worker runs a background job at a time.
+
+        Args:
+            name: Lease name
+            owner: Identifier of the caller (e.g. hostname and PID)
+            ttl: Seconds the lease stays valid without renewal
+
+        Returns:
+            True if the caller now holds the lease
+        """
+        now = time.time()
+        key = f"lease:{name}"
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT value FROM mirror_meta WHERE key = ?", (key,)).fetchone()
+                if row:
+                    holder, _, expires = row["value"].rpartition("|")
+                    if holder != owner and float(expires) > now:
+                        conn.execute("ROLLBACK")
+                        return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO mirror_meta (key, value) VALUES (?, ?)",
+                    (key, f"{owner}|{now + ttl}")
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """Return a mirror metadata value."""
+        row = self._connection().execute(
+            "SELECT value FROM mirror_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row["value"] if row else None
+
+    def covers(self, posted_from: Optional[str] = None, posted_to: Optional[str] = None) -> bool:
+        """
+        Check whether a completed sync covers the requested posted-date range.
+
+        A missing range means the default 90-day window. Dates are Eastern,
+        as SAM.gov posts by, and a range reaching the current day is never
+        covered, since notices for it are still being posted.
+        """
+        synced_from = self.get_meta("synced_from")
+        synced_to = self.get_meta("synced_to")
+        if not synced_from or not synced_to:
+            return False
+        today = get_eastern_date()
+        posted_from, posted_to = default_date_range(posted_from, posted_to)
+        try:
+            posted_from, posted_to = to_iso_date(posted_from), to_iso_date(posted_to)
+        except ValueError:
+            return False
+        return synced_from <= posted_from and posted_to <= min(synced_to, (today - timedelta(days=1)).isoformat())
+
+    def status(self) -> Dict:
+        """Return mirror size and sync coverage."""
+        last_sync = self.get_meta("last_sync_completed")
+        return {
+            "opportunities": self.count(),
+            "synced_from": self.get_meta("synced_from"),
+            "synced_to": self.get_meta("synced_to"),
+            "last_sync_completed": float(last_sync) if last_sync else None,
+            "db_size_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0,
+        }
@@ -0,0 +1,247 @@
+"""Incremental sync of SAM.gov opportunities into the local mirror
+
+Pages through the v2 search endpoint one posted-date window at a time,
+upserting each page and checkpointing progress so an interrupted sync resumes
+where it stopped. Run it from the command line with::
+
+    python -m api.mirror_sync --db mirror.sqlite3 --days 90
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import socket
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .alerts import AlertEngine
+from .async_sam_api import AsyncSAMAPIClient
+from .mirror import OpportunityMirror, to_iso_date
+from .sam_schedule import get_eastern_date, is_bulk_update_time
+from .search_index import DescriptionIndexer
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorSync:
+    """Sync engine filling an OpportunityMirror from SAM.gov.
+
+    The requested range is split into fixed, calendar-aligned windows of
+    ``window_days`` so checkpoints line up between runs. A window that was
+    completed after it had settled (``settle_days`` past its end) is skipped
+    on later runs; recent windows are re-read every run to pick up late
+    postings and amendments.
+    """
+
+    def __init__(
+        self,
+        client: AsyncSAMAPIClient,
+        mirror: OpportunityMirror,
+        days: int = 90,
+        window_days: int = 1,
+        page_size: int = 1000,
+        settle_days: int = 2
+    ):
+        """
+        Initialize the sync engine.
+
+        Args:
+            client: Async SAM.gov client used for upstream calls
+            mirror: Mirror to write into
+            days: Default look-back window in days
+            window_days: Length of each posted-date window
+            page_size: Records requested per page (SAM.gov allows up to 1000)
+            settle_days: Days after which a completed window is not re-read
+        """
+        self.client = client
+        self.mirror = mirror
+        self.days = days
+        self.window_days = window_days
+        self.page_size = page_size
+        self.settle_days = settle_days
+        self.running = False
+
+    def _windows(self, start: date, end: date) -> Iterator[Tuple[date, date]]:
+        """Yield calendar-aligned (from, to) windows covering start..end."""
+        window_start = date.fromordinal(start.toordinal() - start.toordinal() % self.window_days)
+        while window_start <= end:
+            window_end = window_start + timedelta(days=self.window_days - 1)
+            yield max(window_start, start), min(window_end, end)
+            window_start = window_end + timedelta(days=1)
+
+    def _is_settled(self, checkpoint: Optional[Dict], window_end: date) -> bool:
+        """Check whether a window was completed after it stopped changing."""
+        if not checkpoint or not checkpoint["completed_at"]:
+            return False
+        settled_on = datetime.combine(window_end + timedelta(days=self.settle_days), datetime.min.time())
+        return checkpoint["completed_at"] >= settled_on.timestamp()
+
+    async def sync_window(self, window_from: date, window_to: date) -> Dict[str, int]:
+        """
+        Sync one posted-date window, resuming from its checkpoint.
+
+        Returns:
+            Counts of pages fetched and records new or updated
+        """
+        iso_from, iso_to = window_from.isoformat(), window_to.isoformat()
+        checkpoint = await asyncio.to_thread(self.mirror.get_checkpoint, iso_from, iso_to)
+        offset = checkpoint["next_offset"] if checkpoint and not checkpoint["completed_at"] else 0
+        counts = {"pages": 0, "new": 0, "updated": 0}
+
+        while True:
+            params = {
+                "limit": str(self.page_size),
+                "offset": str(offset),
+                "postedFrom": window_from.strftime("%m/%d/%Y"),
+                "postedTo": window_to.strftime("%m/%d/%Y")
+            }
+            data = await self.client.fetch_search_page(params, max_wait=math.inf)
+            records = data.get("opportunitiesData") or []
+            if isinstance(records, dict):
+                records = [records]
+            total = data.get("totalRecords", 0)
+
+            changes = await asyncio.to_thread(self.mirror.upsert, records)
+            for _, change in changes:
+                counts[change] += 1
+            counts["pages"] += 1
+
+            offset += len(records)
+            done = not records or offset >= total
+            await asyncio.to_thread(self.mirror.save_checkpoint, iso_from, iso_to, offset, total, done)
+            if done:
+                return counts
+
+    def _record_coverage(self, start: date, end: date) -> None:
+        """Record start..end as synced, and the sync as completed now."""
+        if start <= end:
+            # Widen recorded coverage only when it stays contiguous with the new range
+            synced_from = self.mirror.get_meta("synced_from")
+            synced_to = self.mirror.get_meta("synced_to")
+            if synced_from and synced_to and synced_from <= end.isoformat() and start.isoformat() <= synced_to:
+                start_iso = min(synced_from, start.isoformat())
+                end_iso = max(synced_to, end.isoformat())
+            else:
+                start_iso, end_iso = start.isoformat(), end.isoformat()
+            self.mirror.set_meta("synced_from", start_iso)
+            self.mirror.set_meta("synced_to", end_iso)
+        self.mirror.set_meta("last_sync_completed", str(time.time()))
+
+    async def run(self, posted_from: Optional[str] = None, posted_to: Optional[str] = None) -> Dict[str, int]:
+        """
+        Sync every window in the range, skipping settled ones.
+
+        Args:
+            posted_from: Start date (YYYY-MM-DD or MM/dd/yyyy); defaults to
+                ``days`` before posted_to
+            posted_to: End date (YYYY-MM-DD or MM/dd/yyyy); defaults to today
+                in US/Eastern
+
+        Returns:
+            Totals of windows synced and skipped, pages fetched and records changed
+        """
+        today = get_eastern_date()
+        end = date.fromisoformat(to_iso_date(posted_to)) if posted_to else today
+        start = date.fromisoformat(to_iso_date(posted_from)) if posted_from else end - timedelta(days=self.days)
+        totals = {"windows": 0, "skipped": 0, "pages": 0, "new": 0, "updated": 0}
+
+        self.running = True
+        started = time.time()
+        try:
+            for window_from, window_to in self._windows(start, end):
+                checkpoint = await asyncio.to_thread(
+                    self.mirror.get_checkpoint, window_from.isoformat(), window_to.isoformat()
+                )
+                if self._is_settled(checkpoint, window_to):
+                    totals["skipped"] += 1
+                    continue
+                counts = await self.sync_window(window_from, window_to)
+                totals["windows"] += 1
+                for key, value in counts.items():
+                    totals[key] += value
+                logger.info(f"Synced {window_from} to {window_to}: {counts}")
+        finally:
+            self.running = False
+
+        # Notices for the current Eastern day are still being posted, so
+        # coverage only extends through the last complete day
+        await asyncio.to_thread(self._record_coverage, start, min(end, today - timedelta(days=1)))
+        logger.info(f"Mirror sync finished in {time.time() - started:.1f}s: {totals}")
+        return totals
+
+
+async def run_sync_schedule(
+    sync: MirrorSync,
+    check_interval: float = 600,
+    min_interval: float = 12 * 3600,
+    description_indexer: Optional[DescriptionIndexer] = None,
+    alert_engine: Optional[AlertEngine] = None
+) -> None:
+    """
+    Run the sync once per SAM.gov bulk-update window, forever.
+
+    When several workers share the mirror, a lease in the mirror database
+    ensures only one of them syncs at a time.
+
+    Args:
+        sync: Sync engine to run
+        check_interval: Seconds between schedule checks
+        min_interval: Minimum seconds between completed syncs
+        description_indexer: Indexes pending notice descriptions after each sync
+        alert_engine: Matches the sync's changes against saved searches after each sync
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            last = await asyncio.to_thread(sync.mirror.get_meta, "last_sync_completed")
+            due = last is None or time.time() - float(last) >= min_interval
+            if (due and is_bulk_update_time() and not sync.running
+                    and await asyncio.to_thread(sync.mirror.acquire_lease, "mirror_sync", owner, min_interval)):
+                await sync.run()
+                if description_indexer is not None:
+                    await description_indexer.run()
+                if alert_engine is not None:
+                    await asyncio.to_thread(alert_engine.run)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Progress is checkpointed; the next check resumes the sync
+            logger.error(f"Mirror sync failed: {str(e)}")
+        await asyncio.sleep(check_interval)
+
+
+def main() -> None:
+    """Command-line entry point for a one-off sync."""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Sync SAM.gov opportunities into a local mirror")
+    parser.add_argument("--db", default=os.getenv("SAM_MIRROR_DB", "sam_mirror.sqlite3"), help="Mirror database path")
+    parser.add_argument("--days", type=int, default=90, help="Days of postings to sync")
+    parser.add_argument("--posted-from", help="Start date (YYYY-MM-DD or MM/dd/yyyy)")
+    parser.add_argument("--posted-to", help="End date (YYYY-MM-DD or MM/dd/yyyy)")
+    parser.add_argument("--window-days", type=int, default=1, help="Days per sync window")
+    args = parser.parse_args()
+
+    api_key = os.getenv("SAM_API_KEY")
+    if not api_key:
+        parser.error("SAM_API_KEY must be set")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    async def run() -> None:
+        client = AsyncSAMAPIClient(api_key)
+        try:
+            sync = MirrorSync(client, OpportunityMirror(args.db), days=args.days, window_days=args.window_days)
+            await sync.run(args.posted_from, args.posted_to)
+        finally:
+            await client.aclose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
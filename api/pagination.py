@@ -0,0 +1,138 @@
+"""Opaque cursors for keyset pagination over the local mirror
+
+Offset pages get slower the deeper they go and shift whenever notices are
+added or removed between requests. A cursor instead records where the
+previous page stopped, as the (postedDate, noticeId) of its last notice in
+the mirror's newest-first order, together with a snapshot of the query:
+its filters with the default date range resolved, and the time the first
+page was read. Later pages are read from that position onward
+(OpportunityMirror.scan), skipping notices first seen after the snapshot,
+so each page costs one index range scan however deep it is, and notices
+ingested while a client pages through results neither repeat nor push
+others onto the next page.
+
+Cursors are URL-safe base64 JSON. They are opaque to clients but not
+secret; a tampered cursor can only change the caller's own query.
+"""
+
+import base64
+import binascii
+import json
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .mirror import OpportunityMirror, default_date_range, to_iso_date
+
+CURSOR_VERSION = 1
+
+# Filters a cursor may carry: the OpportunityMirror.scan keyword and filters
+FILTERS = (
+    "keyword",
+    "naics_code",
+    "set_aside",
+    "status",
+    "posted_from",
+    "posted_to",
+    "organization_id",
+    "organization_name",
+    "place_of_performance_state",
+    "place_of_performance_zipcode",
+)
+
+
+class Cursor(NamedTuple):
+    """A position in a snapshot of a mirror search."""
+
+    filters: Dict[str, str]  # Non-empty filters, dates resolved to YYYY-MM-DD
+    snapshot: float  # Notices first seen after this time are left out
+    after: Optional[Tuple[str, str]] = None  # (posted_date, notice_id) of the last notice returned
+
+    @classmethod
+    def start(cls, filters: Dict[str, Any]) -> "Cursor":
+        """
+        Snapshot a query before its first page.
+
+        Args:
+            filters: Search filters; unknown and empty ones are ignored
+        """
+        posted_from, posted_to = default_date_range(filters.get("posted_from"), filters.get("posted_to"))
+        query = {name: filters[name] for name in FILTERS if filters.get(name)}
+        query.update(posted_from=to_iso_date(posted_from), posted_to=to_iso_date(posted_to))
+        return cls(query, time.time())
+
+    def encode(self) -> str:
+        """Serialize to the opaque string handed to clients."""
+        payload = {"v": CURSOR_VERSION, "q": self.filters, "s": self.snapshot}
+        if self.after is not None:
+            payload["a"] = list(self.after)
+        raw = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "Cursor":
+        """
+        Parse a cursor produced by encode().
+
+        Raises:
+            ValueError: If the cursor is malformed or from another version
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(payload, dict) or payload.get("v") != CURSOR_VERSION:
+            raise ValueError("Invalid cursor")
+        filters, snapshot, after = payload.get("q"), payload.get("s"), payload.get("a")
+        if (
+            not isinstance(filters, dict)
+            or any(name not in FILTERS or not isinstance(value, str) for name, value in filters.items())
+            or not isinstance(snapshot, (int, float))
+            or (after is not None and (
+                not isinstance(after, list) or len(after) != 2 or not all(isinstance(item, str) for item in after)
+            ))
+        ):
+            raise ValueError("Invalid cursor")
+        return cls(filters, float(snapshot), tuple(after) if after is not None else None)
+
+    def check(self, filters: Dict[str, Any]) -> None:
+        """
+        Make sure filters sent alongside the cursor match the query it was issued for.
+
+        Raises:
+            ValueError: If a filter is set to a different value
+        """
+        for name in FILTERS:
+            value = filters.get(name)
+            if value and name in ("posted_from", "posted_to"):
+                value = to_iso_date(value)
+            if value and value != self.filters.get(name):
+                raise ValueError(f"Cursor was issued for a different query ({name} differs)")
+
+
+def read_page(mirror: OpportunityMirror, cursor: Cursor, limit: int) -> Dict:
+    """
+    Read the page a cursor points at.
+
+    Args:
+        mirror: Mirror to read from
+        cursor: Cursor.start() for the first page, or a decoded next_cursor
+        limit: Maximum opportunities to return
+
+    Returns:
+        Search results with ``metadata.next_cursor``, None on the last page
+    """
+    records = mirror.scan(after=cursor.after, limit=limit + 1, seen_before=cursor.snapshot, **cursor.filters)
+    opportunities = records[:limit]
+    next_cursor = None
+    if len(records) > limit:
+        last = opportunities[-1]
+        next_cursor = cursor._replace(after=(last["postedDate"][:10], last["noticeId"])).encode()
+    return {
+        "opportunities": opportunities,
+        "metadata": {
+            "limit": limit,
+            "source": "mirror",
+            "next_cursor": next_cursor
+        }
+    }
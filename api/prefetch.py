@@ -0,0 +1,196 @@
+"""Background prefetch of the next pages of live searches
+
+Users paging through results nearly always go from page N to N+1, and each
+cold page costs a 1-3 s SAM.gov call. After serving page N of a live
+search, SearchPrefetcher fetches the following page(s) into the client's
+response cache so the next click is a cache hit.
+
+Prefetching only spends spare budget: it never waits for a rate-limit
+token, leaves a reserve of tokens and daily quota for foreground requests,
+and stands down while foreground traffic is heavy. Each API key has at
+most one prefetch running; a search with different filters cancels it.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .async_sam_api import AsyncSAMAPIClient
+from .rate_limiter import RateLimitExceeded, TokenBucketRateLimiter, key_fingerprint
+from .response_cache import search_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPrefetcher:
+    """Prefetches following search pages into the response cache."""
+
+    def __init__(
+        self,
+        rate_limiter: TokenBucketRateLimiter,
+        pages: int = 1,
+        min_tokens: float = 5.0,
+        min_daily_remaining: int = 1000,
+        max_foreground: int = 8,
+        delay: float = 0.2,
+        max_tracked: int = 4096
+    ):
+        """
+        Initialize the prefetcher.
+
+        Args:
+            rate_limiter: Limiter shared with foreground requests
+            pages: Pages to prefetch after each page served; 0 disables prefetch
+            min_tokens: Rate-limit tokens left for foreground requests
+            min_daily_remaining: Daily quota left for foreground requests
+            max_foreground: Stand down while more foreground searches are in flight
+            delay: Seconds to wait after a page is served before prefetching
+            max_tracked: Prefetched pages remembered for hit accounting
+        """
+        self.rate_limiter = rate_limiter
+        self.pages = pages
+        self.min_tokens = min_tokens
+        self.min_daily_remaining = min_daily_remaining
+        self.max_foreground = max_foreground
+        self.delay = delay
+        self.max_tracked = max_tracked
+        self.foreground = 0
+        # API key fingerprint -> (query key, prefetch task)
+        self._sessions: Dict[str, Tuple[str, asyncio.Task]] = {}
+        # Cache keys of prefetched pages not yet requested, oldest first
+        self._prefetched: "OrderedDict[str, None]" = OrderedDict()
+        self.scheduled = 0
+        self.fetched = 0
+        self.already_cached = 0
+        self.skipped_budget = 0
+        self.skipped_busy = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.hits = 0
+        self.unused = 0
+
+    @staticmethod
+    def _query_key(filters: Dict) -> str:
+        """Identity of a search regardless of page."""
+        return search_cache_key(**dict(filters, page=1))
+
+    def begin(self, client: AsyncSAMAPIClient, filters: Dict) -> None:
+        """
+        Note a foreground search before it is served.
+
+        Counts a prefetch hit if the page was prefetched, and cancels the
+        key's prefetch if it was for a different query.
+
+        Args:
+            client: Client serving the search
+            filters: Arguments of search_opportunities
+        """
+        self.foreground += 1
+        cache_key = search_cache_key(**filters)
+        if cache_key in self._prefetched:
+            del self._prefetched[cache_key]
+            self.hits += 1
+        session = self._sessions.get(key_fingerprint(client.api_key))
+        if session is not None and session[0] != self._query_key(filters):
+            session[1].cancel()
+
+    def end(self, client: AsyncSAMAPIClient, filters: Dict, result: Optional[Dict] = None) -> None:
+        """
+        Note that a foreground search finished, and prefetch the pages after it.
+
+        Args:
+            client: Client that served the search
+            filters: Arguments of search_opportunities
+            result: The search result, or None if the search failed
+        """
+        self.foreground -= 1
+        if result is None or self.pages <= 0:
+            return
+        page, limit = filters["page"], filters["limit"]
+        total = result.get("metadata", {}).get("total", 0)
+        pages = [next_page for next_page in range(page + 1, page + 1 + self.pages) if (next_page - 1) * limit < total]
+        if not pages:
+            return
+
+        session = key_fingerprint(client.api_key)
+        current = self._sessions.get(session)
+        if current is not None:
+            current[1].cancel()
+        task = asyncio.create_task(self._run(client, filters, pages))
+        self._sessions[session] = (self._query_key(filters), task)
+        task.add_done_callback(lambda done, session=session: self._finish(session, done))
+        self.scheduled += len(pages)
+
+    def _finish(self, session: str, task: asyncio.Task) -> None:
+        current = self._sessions.get(session)
+        if current is not None and current[1] is task:
+            del self._sessions[session]
+
+    def _has_budget(self, client: AsyncSAMAPIClient) -> bool:
+        status = client.rate_limit_status()
+        return (
+            status["tokens"] >= self.min_tokens
+            and status["daily_remaining"] >= self.min_daily_remaining
+            and self.rate_limiter.waiting == 0
+        )
+
+    def _remember(self, cache_key: str) -> None:
+        self._prefetched[cache_key] = None
+        self._prefetched.move_to_end(cache_key)
+        while len(self._prefetched) > self.max_tracked:
+            self._prefetched.popitem(last=False)
+            self.unused += 1
+
+    async def _run(self, client: AsyncSAMAPIClient, filters: Dict, pages: List[int]) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+            for page in pages:
+                if self.foreground >= self.max_foreground:
+                    self.skipped_busy += 1
+                    return
+                if not self._has_budget(client):
+                    self.skipped_budget += 1
+                    return
+                page_filters = dict(filters, page=page)
+                try:
+                    fetched = await client.prefetch_search(**page_filters)
+                except RateLimitExceeded:
+                    self.skipped_budget += 1
+                    return
+                except Exception as e:
+                    self.failed += 1
+                    logger.debug(f"Prefetch of page {page} failed: {str(e)}")
+                    return
+                if fetched:
+                    self.fetched += 1
+                    self._remember(search_cache_key(**page_filters))
+                else:
+                    self.already_cached += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    async def aclose(self) -> None:
+        """Cancel running prefetches."""
+        tasks = [task for _, task in self._sessions.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        """Return prefetch counters; hit_ratio is hits per page prefetched."""
+        return {
+            "pages": self.pages,
+            "running": len(self._sessions),
+            "scheduled": self.scheduled,
+            "fetched": self.fetched,
+            "already_cached": self.already_cached,
+            "skipped_budget": self.skipped_budget,
+            "skipped_busy": self.skipped_busy,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "hits": self.hits,
+            "unused": self.unused,
+            "hit_ratio": self.hits / self.fetched if self.fetched else 0.0,
+        }
@@ -0,0 +1,104 @@
+"""Field projection of opportunity payloads
+
+List views only need a handful of the ~40 SAM.gov notice fields, while the
+full records carry point-of-contact arrays, links and resource links. A
+``fields=`` query parameter selects the fields to keep, as a comma-separated
+list of top-level names or dotted paths into nested objects::
+
+    fields=noticeId,title,postedDate,placeOfPerformance.state.code
+
+Projection runs before the body is encoded, so trimmed pages are smaller to
+serialize, hash, compress and send.
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+# Fields kept whatever the projection, so clients can always identify rows
+ALWAYS_INCLUDED = ("noticeId", "relevanceScore")
+
+MAX_FIELDS = 64
+
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+Projection = Dict[str, Any]
+
+
+def parse_fields(value: Optional[str]) -> Optional[Projection]:
+    """
+    Parse a ``fields=`` parameter into a projection tree.
+
+    Args:
+        value: Comma-separated field names or dotted paths
+
+    Returns:
+        Nested dict of the fields to keep (``True`` marks a whole subtree),
+        or None to keep everything
+
+    Raises:
+        ValueError: If a field name is malformed or too many are given
+    """
+    if value is None or not value.strip():
+        return None
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if len(names) > MAX_FIELDS:
+        raise ValueError(f"At most {MAX_FIELDS} fields may be requested")
+    tree: Projection = {}
+    for name in list(ALWAYS_INCLUDED) + names:
+        if not FIELD_PATTERN.match(name):
+            raise ValueError(f"Invalid field name: {name}")
+        node = tree
+        parts = name.split(".")
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is True:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def project(record: Any, projection: Optional[Projection]) -> Any:
+    """
+    Return a copy of a record holding only the projected fields.
+
+    Missing fields are omitted rather than set to null. A path through a
+    list applies to each of its elements.
+
+    Args:
+        record: Opportunity dict (or nested value)
+        projection: Tree from parse_fields, or None for no projection
+
+    Returns:
+        The trimmed record; the input is not modified
+    """
+    if projection is None:
+        return record
+    if isinstance(record, list):
+        return [project(item, projection) for item in record]
+    if not isinstance(record, dict):
+        return record
+    trimmed = {}
+    for name, subtree in projection.items():
+        if name in record:
+            value = record[name]
+            trimmed[name] = value if subtree is True else project(value, subtree)
+    return trimmed
+
+
+def project_page(result: Dict, projection: Optional[Projection]) -> Dict:
+    """
+    Trim the opportunities of a search result page.
+
+    Args:
+        result: Search result with an ``opportunities`` list
+        projection: Tree from parse_fields, or None for no projection
+
+    Returns:
+        A new result dict; paging fields are kept as they are
+    """
+    if projection is None:
+        return result
+    return dict(result, opportunities=[project(opportunity, projection) for opportunity in result["opportunities"]])
+
@@ -0,0 +1,281 @@
+"""Per-API-key token-bucket rate limiting for SAM.gov requests
+
+Bucket state lives in a small SQLite database so every uvicorn worker on the
+host draws from the same per-minute budget and daily System Account quota.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "sam_rate_limits.sqlite3")
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Return a short, non-reversible identifier for an API key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be admitted within the allowed wait."""
+
+    def __init__(self, retry_after: float, reason: str = "Rate limit exceeded"):
+        super().__init__(f"{reason}. Retry after {retry_after:.1f} seconds")
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def retry_after_header(self) -> str:
+        """Value for the HTTP Retry-After header (whole seconds, at least 1)."""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucketRateLimiter:
+    """Token bucket per API key with a daily request quota.
+
+    Each key's bucket holds up to ``burst`` tokens and refills so that no
+    more than ``calls`` requests are admitted in any ``period`` window. A
+    request takes one token; when none are available the caller is given a
+    reservation and told how long to wait. Because a full bucket can be
+    spent at once, tokens refill at ``(calls - burst) / period``, so the
+    sustained rate is ``calls - burst`` requests per period (50 a minute
+    with the defaults) and only a burst after an idle spell reaches
+    ``calls``. Waits longer than ``max_wait``
+    are rejected with RateLimitExceeded instead of queueing.
+
+    State is stored in SQLite and updated under ``BEGIN IMMEDIATE``, so all
+    processes that point at the same database file share the same buckets.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        calls: int = 60,
+        period: float = 60,
+        burst: int = 10,
+        daily_quota: int = 100_000,
+        max_wait: Optional[float] = None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            db_path: SQLite database shared by all workers; ``:memory:``
+                keeps state private to this process
+            calls: Maximum requests admitted in any period window
+            period: Window length in seconds
+            burst: Bucket capacity (requests that may be sent back to back)
+            daily_quota: Maximum requests per key per day (US/Eastern)
+            max_wait: Longest wait to queue for before rejecting; None waits
+                as long as needed
+        """
+        if not 0 < burst <= calls:
+            raise ValueError("burst must be between 1 and calls")
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.calls = calls
+        self.period = period
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        # Refill so that burst + refill over one period never exceeds calls;
+        # when burst == calls fall back to the plain average rate
+        self.refill_rate = (calls - burst) / period if calls > burst else calls / period
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        if self.db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few bucket updates to a power cut is harmless,
+            # so skip the fsync on every reservation
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                day TEXT NOT NULL,
+                day_count INTEGER NOT NULL
+            )
+            """
+        )
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.rejections = 0
+        self.waiting = 0
+
+    def _today(self) -> datetime:
+        return datetime.now(pytz.timezone('US/Eastern'))
+
+    def _seconds_until_tomorrow(self, now: datetime) -> float:
+        eastern = pytz.timezone('US/Eastern')
+        tomorrow = eastern.localize(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+        return max((tomorrow - now).total_seconds(), 1.0)
+
+    def _reserve(self, api_key: str, max_wait: Optional[float]) -> float:
+        """
+        Atomically take a token for api_key.
+
+        Returns:
+            Seconds the caller must wait before sending the request
+
+        Raises:
+            RateLimitExceeded: If the daily quota is spent or the wait would
+                exceed max_wait
+        """
+        key = key_fingerprint(api_key)
+        now = time.time()
+        today = self._today()
+        day = today.strftime("%Y-%m-%d")
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated, day, day_count FROM buckets WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    tokens, updated, bucket_day, day_count = float(self.burst), now, day, 0
+                else:
+                    tokens, updated, bucket_day, day_count = row
+                if bucket_day != day:
+                    bucket_day, day_count = day, 0
+
+                if day_count >= self.daily_quota:
+                    raise RateLimitExceeded(
+                        self._seconds_until_tomorrow(today), "Daily SAM.gov quota exhausted"
+                    )
+
+                tokens = min(float(self.burst), tokens + max(now - updated, 0.0) * self.refill_rate)
+                tokens -= 1
+                wait = -tokens / self.refill_rate if tokens < 0 else 0.0
+                if max_wait is not None and wait > max_wait:
+                    raise RateLimitExceeded(wait)
+
+                self._conn.execute(
+                    """
+                    INSERT INTO buckets (key, tokens, updated, day, day_count)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        tokens = excluded.tokens,
+                        updated = excluded.updated,
+                        day = excluded.day,
+                        day_count = excluded.day_count
+                    """,
+                    (key, tokens, now, bucket_day, day_count + 1)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException as e:
+                self._conn.execute("ROLLBACK")
+                if isinstance(e, RateLimitExceeded):
+                    self.rejections += 1
+                    logger.warning(f"Rejecting SAM.gov request for {key}: {e}")
+                raise
+
+            if wait > 0:
+                self.waits += 1
+                self.wait_seconds += wait
+        return wait
+
+    def acquire(self, api_key: str, max_wait: Optional[float] = None) -> float:
+        """
+        Block until a request for api_key may be sent.
+
+        Args:
+            api_key: SAM.gov API key the request is made with
+            max_wait: Overrides the limiter's max_wait for this call
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(api_key, self.max_wait if max_wait is None else max_wait)
+        if wait > 0:
+            logger.debug(f"Rate limit reached. Waiting {wait:.2f} seconds")
+            with self._lock:
+                self.waiting += 1
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        return wait
+
+    async def acquire_async(self, api_key: str, max_wait: Optional[float] = None) -> float:
+        """
+        Wait without blocking the event loop until a request may be sent.
+
+        The reservation itself runs in a worker thread, since it may wait on
+        another process's lock on the shared database.
+
+        Args:
+            api_key: SAM.gov API key the request is made with
+            max_wait: Overrides the limiter's max_wait for this call
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = await asyncio.to_thread(self._reserve, api_key, self.max_wait if max_wait is None else max_wait)
+        if wait > 0:
+            logger.debug(f"Rate limit reached. Waiting {wait:.2f} seconds")
+            with self._lock:
+                self.waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self.waiting -= 1
+        return wait
+
+    def try_acquire(self, api_key: str) -> None:
+        """Take a token only if one is available now; raise RateLimitExceeded otherwise."""
+        self._reserve(api_key, 0.0)
+
+    def status(self, api_key: str) -> Dict:
+        """Return the current bucket level and daily usage for api_key."""
+        key = key_fingerprint(api_key)
+        day = self._today().strftime("%Y-%m-%d")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tokens, updated, day, day_count FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+        tokens, day_count = float(self.burst), 0
+        if row is not None:
+            tokens = min(float(self.burst), row[0] + max(time.time() - row[1], 0.0) * self.refill_rate)
+            day_count = row[3] if row[2] == day else 0
+        return {
+            "key": key,
+            "tokens": round(tokens, 3),
+            "burst": self.burst,
+            "calls": self.calls,
+            "period": self.period,
+            "daily_used": day_count,
+            "daily_quota": self.daily_quota,
+            "daily_remaining": max(self.daily_quota - day_count, 0),
+        }
+
+    def stats(self) -> Dict:
+        """Return wait and rejection counters, and current waiters, for this process."""
+        return {
+            "waiting": self.waiting,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "rejections": self.rejections,
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
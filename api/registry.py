@@ -0,0 +1,144 @@
+"""Process-wide registry of long-lived SAM.gov API clients"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+
+from .async_sam_api import AsyncSAMAPIClient, create_http_client
+from .cache import LRUCache
+from .circuit_breaker import CircuitBreaker
+from .metrics import Metrics
+from .rate_limiter import TokenBucketRateLimiter, key_fingerprint
+from .response_cache import DiskCache, TieredCache
+from .sam_api import DEFAULT_API_ROOT
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class SAMClientRegistry:
+    """Registry of AsyncSAMAPIClient instances keyed by API key.
+
+    Clients are created on first use and reused across requests so their
+    response caches survive between page views. Each client has its own
+    in-memory L1 cache in front of an optional on-disk L2 shared by every
+    client and worker. All clients share one pooled keep-alive HTTP client,
+    one SingleFlight, so identical concurrent upstream calls are made once
+    regardless of which key asked, and one CircuitBreaker, since they all
+    talk to the same upstream. The number of distinct keys held is bounded; the
+    least recently used client is dropped first.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = 32,
+        cache_max_entries: int = 1024,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+        cache_max_stale: float = 0.0,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        disk_cache: Optional[DiskCache] = None,
+        metrics: Optional[Metrics] = None,
+        api_root: str = DEFAULT_API_ROOT,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            max_clients: Maximum number of API keys to keep clients for
+            cache_max_entries: Entry limit for each client's L1 cache
+            cache_max_bytes: Approximate memory budget for each client's L1 cache
+            cache_max_stale: Seconds expired L1 entries are kept to be served
+                stale while they are refreshed
+            http_client: Pooled HTTP client shared by all SAM clients; a
+                default one is created when omitted
+            rate_limiter: Per-key limiter shared by all SAM clients; one
+                backed by the default database file is created when omitted
+            disk_cache: Shared L2 response cache; memory only when omitted
+            metrics: Metrics every client records upstream calls into
+            api_root: Scheme and host of the SAM.gov API
+            circuit_breaker: Breaker shared by all SAM clients; calls are never
+                short-circuited when omitted
+        """
+        self.max_clients = max_clients
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_max_stale = cache_max_stale
+        self.http_client = http_client if http_client is not None else create_http_client()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucketRateLimiter()
+        self.disk_cache = disk_cache
+        self.metrics = metrics
+        self.api_root = api_root
+        self.circuit_breaker = circuit_breaker
+        self.singleflight = SingleFlight()
+        self._clients: "OrderedDict[str, AsyncSAMAPIClient]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _create_client(self, api_key: str) -> AsyncSAMAPIClient:
+        cache = TieredCache(
+            l1=LRUCache(
+                max_entries=self.cache_max_entries,
+                max_bytes=self.cache_max_bytes,
+                max_stale=self.cache_max_stale
+            ),
+            l2=self.disk_cache
+        )
+        return AsyncSAMAPIClient(
+            api_key,
+            cache=cache,
+            rate_limiter=self.rate_limiter,
+            http_client=self.http_client,
+            singleflight=self.singleflight,
+            metrics=self.metrics,
+            api_root=self.api_root,
+            circuit_breaker=self.circuit_breaker
+        )
+
+    async def aclose(self) -> None:
+        """Drop all clients and close the shared HTTP connection pool."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            await client.aclose()
+        await self.http_client.aclose()
+        self.rate_limiter.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+    def get(self, api_key: str) -> AsyncSAMAPIClient:
+        """Return the shared client for api_key, creating it if needed."""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is not None:
+                self._clients.move_to_end(api_key)
+                return client
+            client = self._create_client(api_key)
+            self._clients[api_key] = client
+            while len(self._clients) > self.max_clients:
+                _, dropped = self._clients.popitem(last=False)
+                logger.info(f"Dropping SAM client {key_fingerprint(dropped.api_key)} from registry")
+            return client
+
+    def rate_limit_status(self) -> List[Dict]:
+        """Return the rate limiter status of every registered key."""
+        with self._lock:
+            clients = list(self._clients.values())
+        return [client.rate_limit_status() for client in clients]
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return per-client cache statistics (keyed by key fingerprint), coalescing and circuit breaker counters."""
+        with self._lock:
+            clients = list(self._clients.values())
+        stats = {
+            "clients": {key_fingerprint(client.api_key): client.cache_stats() for client in clients},
+            "singleflight": self.singleflight.stats()
+        }
+        if self.circuit_breaker is not None:
+            stats["circuit_breaker"] = self.circuit_breaker.stats()
+        return stats
+
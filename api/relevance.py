@@ -0,0 +1,153 @@
+"""Relevance scoring of opportunities with opportunity_relevance_model.joblib"""
+
+import hashlib
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import joblib
+
+from .cache import LRUCache
+from .features import FEATURE_NAMES, FeaturePipeline, signature_hashes, source_columns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "opportunity_relevance_model.joblib")
+
+
+class RelevanceScorer:
+    """Score opportunities with the shipped scikit-learn relevance model.
+
+    The model is loaded on first use with ``mmap_mode="r"``, so its arrays
+    are mapped from the file rather than copied, and worker processes share
+    them through the page cache. Scores are cached per model version,
+    noticeId and the notice's feature source fields, so amendments that do
+    not change the features keep their score. Only uncached rows are
+    featurized and reach the model, in one vectorized predict_proba call
+    per batch.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, cache_max_entries: int = 200_000):
+        """
+        Initialize the scorer.
+
+        Args:
+            model_path: Path of the joblib model file
+            cache_max_entries: Scores (and feature vectors) kept in memory
+        """
+        self.model_path = model_path or DEFAULT_MODEL_PATH
+        self._model = None
+        self._positive_column: Optional[int] = None
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+        self._cache = LRUCache(max_entries=cache_max_entries, max_bytes=cache_max_entries * 128)
+        self.features = FeaturePipeline(cache_max_entries=cache_max_entries)
+        self.scored = 0
+
+    def _load(self) -> Any:
+        """
+        Load the model once; later calls return the loaded instance.
+
+        Raises:
+            ValueError: If the model cannot tell relevant notices apart
+        """
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                with open(self.model_path, "rb") as file:
+                    self._version = hashlib.sha256(file.read()).hexdigest()[:12]
+                model = joblib.load(self.model_path, mmap_mode="r")
+                classes = list(model.classes_)
+                # A model that only saw one class scores every notice the same
+                if len(classes) < 2 or True not in classes:
+                    raise ValueError(
+                        f"{self.model_path} was trained on classes {[str(c) for c in classes]}; "
+                        "a relevance model needs relevant and irrelevant examples"
+                    )
+                if model.n_features_in_ != len(FEATURE_NAMES):
+                    raise ValueError(
+                        f"{self.model_path} expects {model.n_features_in_} features, not the "
+                        f"{len(FEATURE_NAMES)} api.features computes; retrain it with api.relevance_training"
+                    )
+                self._positive_column = classes.index(True)
+                self._model = model
+                logger.info(f"Loaded relevance model {self.model_path} (version {self._version})")
+        return self._model
+
+    @property
+    def version(self) -> str:
+        """Short SHA-256 of the model file, part of every score cache key."""
+        self._load()
+        return self._version
+
+    def score(self, opportunities: List[Dict]) -> List[float]:
+        """
+        Score opportunities by their probability of being relevant.
+
+        Args:
+            opportunities: Raw SAM.gov opportunity dicts
+
+        Returns:
+            Scores between 0 and 1, in input order
+        """
+        model = self._load()
+        columns = source_columns(opportunities)
+        hashes = signature_hashes(columns)
+        signatures = hashes.tolist()
+        keys = [f"{self._version}:{opp.get('noticeId')}" for opp in opportunities]
+        scores: List[Optional[float]] = []
+        missing = []
+        for index, (key, signature) in enumerate(zip(keys, signatures)):
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == signature:
+                scores.append(cached[1])
+            else:
+                scores.append(None)
+                missing.append(index)
+
+        if missing:
+            features, _ = self.features.transform(
+                [opportunities[index] for index in missing],
+                columns={name: [values[index] for index in missing] for name, values in columns.items()},
+                hashes=hashes[missing]
+            )
+            predicted = model.predict_proba(features)[:, self._positive_column]
+            for index, value in zip(missing, predicted.tolist()):
+                scores[index] = value
+                self._cache.set(keys[index], (signatures[index], value), size=128)
+            self.scored += len(missing)
+        return scores
+
+    def annotate(self, opportunities: List[Dict], sort: bool = False) -> List[Dict]:
+        """
+        Return copies of the opportunities with a ``relevanceScore`` field.
+
+        The inputs are not modified, since they may be cached responses.
+
+        Args:
+            opportunities: Raw SAM.gov opportunity dicts
+            sort: Order the result by descending score
+
+        Returns:
+            New list of annotated opportunity dicts
+        """
+        scored = [
+            dict(opportunity, relevanceScore=round(score, 4))
+            for opportunity, score in zip(opportunities, self.score(opportunities))
+        ]
+        if sort:
+            scored.sort(key=lambda opportunity: opportunity["relevanceScore"], reverse=True)
+        return scored
+
+    def stats(self) -> Dict:
+        """Return model version and score cache counters."""
+        return {
+            "model": self.model_path,
+            "version": self._version,
+            "loaded": self._model is not None,
+            "scored": self.scored,
+            "cache": self._cache.stats(),
+            "features": self.features.stats(),
+        }
@@ -0,0 +1,118 @@
+"""Train the opportunity relevance model on the features it is served with
+
+Scoring featurizes raw SAM.gov records with api.features (hashed agency and
+state buckets, notice type codes, set-aside flags, ...). A model trained on
+any other encoding, such as the raw strings of preprocessed_data.csv, sees
+different inputs at serving time, so models are trained here through the
+same feature_matrix. Training data is NDJSON of raw opportunity records, as
+written by ``/api/opportunities/export?format=ndjson``, each with a boolean
+label added::
+
+    python -m api.relevance_training labeled.ndjson --output opportunity_relevance_model.joblib
+"""
+
+import argparse
+import json
+import logging
+from typing import Dict, List, Tuple
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+from .features import feature_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def load_examples(path: str, label: str = "relevant") -> Tuple[List[Dict], np.ndarray]:
+    """
+    Read labeled opportunities from an NDJSON file.
+
+    Args:
+        path: File with one opportunity record per line
+        label: Field of each record holding whether it is relevant
+
+    Returns:
+        (records, labels)
+
+    Raises:
+        ValueError: If a record has no boolean label
+    """
+    records, labels = [], []
+    with open(path, encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            value = record.get(label)
+            if not isinstance(value, bool):
+                raise ValueError(f"Line {number}: {label!r} must be true or false")
+            records.append(record)
+            labels.append(value)
+    return records, np.array(labels, dtype=bool)
+
+
+def train(
+    records: List[Dict],
+    labels: np.ndarray,
+    trees: int = 100,
+    test_fraction: float = 0.2,
+    seed: int = 0
+) -> Tuple[RandomForestClassifier, Dict]:
+    """
+    Fit a relevance model on the serving features of labeled records.
+
+    Args:
+        records: Raw SAM.gov opportunity records
+        labels: Whether each record is relevant
+        trees: Trees in the random forest
+        test_fraction: Share of records held out to report accuracy on
+        seed: Random seed for the split and the forest
+
+    Returns:
+        The model, refitted on every record, and a training report
+
+    Raises:
+        ValueError: If the labels do not include both relevant and irrelevant records
+    """
+    relevant = int(labels.sum())
+    if relevant == 0 or relevant == len(labels):
+        raise ValueError("Training needs both relevant and irrelevant examples")
+    features = feature_matrix(records)
+    report = {"examples": len(labels), "relevant": relevant}
+
+    if test_fraction > 0 and min(relevant, len(labels) - relevant) >= 2:
+        train_x, test_x, train_y, test_y = train_test_split(
+            features, labels, test_size=test_fraction, stratify=labels, random_state=seed
+        )
+        holdout = RandomForestClassifier(n_estimators=trees, random_state=seed).fit(train_x, train_y)
+        report["holdout_accuracy"] = round(float(holdout.score(test_x, test_y)), 4)
+
+    model = RandomForestClassifier(n_estimators=trees, random_state=seed).fit(features, labels)
+    return model, report
+
+
+def main() -> None:
+    """Command-line entry point training a model from labeled records."""
+    parser = argparse.ArgumentParser(description="Train the opportunity relevance model")
+    parser.add_argument("examples", help="NDJSON file of labeled opportunity records")
+    parser.add_argument("--output", default="opportunity_relevance_model.joblib", help="Model file to write")
+    parser.add_argument("--label", default="relevant", help="Boolean field holding each record's label")
+    parser.add_argument("--trees", type=int, default=100, help="Trees in the random forest")
+    parser.add_argument("--test-fraction", type=float, default=0.2, help="Share held out to report accuracy")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        records, labels = load_examples(args.examples, args.label)
+        model, report = train(records, labels, trees=args.trees, test_fraction=args.test_fraction)
+    except ValueError as e:
+        parser.error(str(e))
+    joblib.dump(model, args.output)
+    logger.info(f"Wrote {args.output}: {report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""On-disk cache for opportunity resource files (attachments)
+
+Files are stored content-addressed under their SHA-256, with a SQLite index
+mapping each SAM.gov resource ID to its content and the upstream
+Content-Type and Content-Disposition. Downloads are written to the cache
+while they stream to the first client; later requests are served from disk
+with Range and conditional request support.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Dict, Mapping, Optional, Tuple
+
+import anyio
+import httpx
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "sam_resources")
+
+# Upstream headers forwarded to the client as-is. Validators are left out:
+# cached copies are validated by content hash, which is only known once the
+# first download completes, so forwarding SAM.gov's would change a file's
+# ETag between its first and second download
+PASSTHROUGH_HEADERS = (
+    "content-type",
+    "content-disposition",
+    "content-length",
+    "content-range",
+    "accept-ranges",
+)
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ResourceCache:
+    """Content-addressed store of downloaded resource files.
+
+    Safe to share between processes: objects are written to a temporary file
+    and renamed into place, and the index is a SQLite database. Once the
+    stored files exceed ``max_bytes``, the least recently served resources
+    are evicted.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 10 * 1024 ** 3):
+        """
+        Initialize the resource cache.
+
+        Args:
+            directory: Directory holding the objects and index; created if missing
+            max_bytes: Total size of stored files to keep
+        """
+        self.directory = directory or DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(self.directory, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.directory, "tmp"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite3"),
+            timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS resources (
+                resource_id TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                content_type TEXT,
+                content_disposition TEXT,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resources_sha256 ON resources (sha256)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resources_last_access ON resources (last_access)")
+        self.hits = 0
+        self.misses = 0
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, "objects", sha256[:2], sha256)
+
+    def lookup(self, resource_id: str) -> Optional[Dict]:
+        """
+        Find a cached resource and mark it recently used.
+
+        Returns:
+            Dict with path, sha256, size, content_type, content_disposition
+            and stored_at, or None if the resource is not cached
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM resources WHERE resource_id = ?", (resource_id,)
+            ).fetchone()
+            if row is not None:
+                path = self._object_path(row["sha256"])
+                if not os.path.exists(path):
+                    # Removed behind our back (e.g. temp dir cleanup)
+                    self._conn.execute("DELETE FROM resources WHERE resource_id = ?", (resource_id,))
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE resources SET last_access = ? WHERE resource_id = ?", (time.time(), resource_id)
+            )
+        entry = dict(row)
+        entry["path"] = path
+        return entry
+
+    def _store(self, resource_id: str, tmp_path: str, sha256: str, size: int, headers: Mapping[str, str]) -> None:
+        """Move a completed download into place and index it."""
+        path = self._object_path(sha256)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT sha256 FROM resources WHERE resource_id = ?", (resource_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (resource_id, sha256, size, headers.get("content-type"),
+                 headers.get("content-disposition"), now, now)
+            )
+            if previous is not None and previous["sha256"] != sha256:
+                # The resource changed upstream; drop the old file unless another resource shares it
+                self._remove_unreferenced(previous["sha256"])
+            self._evict()
+
+    def _remove_unreferenced(self, sha256: str) -> bool:
+        """Delete the object file for sha256 if no resource refers to it; return whether it was unreferenced."""
+        if self._conn.execute("SELECT 1 FROM resources WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone():
+            return False
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict(self) -> None:
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM resources)"
+        ).fetchone()[0]
+        while total > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT resource_id, sha256, size FROM resources ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute("DELETE FROM resources WHERE resource_id = ?", (row["resource_id"],))
+            if self._remove_unreferenced(row["sha256"]):
+                total -= row["size"]
+
+    async def stream_and_store(self, resource_id: str, response: httpx.Response) -> AsyncIterator[bytes]:
+        """
+        Relay an upstream download while writing it to the cache.
+
+        The file is indexed only if the download completes (and matches the
+        announced Content-Length); an interrupted download is discarded.
+
+        Args:
+            resource_id: SAM.gov resource ID the download belongs to
+            response: Streaming upstream response with a 200 status
+
+        Yields:
+            Chunks of the file as they arrive
+        """
+        tmp_path = os.path.join(self.directory, "tmp", uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        stored = False
+        try:
+            async with await anyio.open_file(tmp_path, "wb") as file:
+                async for chunk in response.aiter_bytes():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    await file.write(chunk)
+                    yield chunk
+            # httpx decodes Content-Encoding, so Content-Length only applies to raw bodies
+            expected = response.headers.get("content-length")
+            if expected is None or "content-encoding" in response.headers or int(expected) == size:
+                await anyio.to_thread.run_sync(
+                    self._store, resource_id, tmp_path, digest.hexdigest(), size, response.headers
+                )
+                stored = True
+                logger.info(f"Cached resource {resource_id} ({size} bytes)")
+        finally:
+            if not stored:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> Dict:
+        """Return cached file counts, size and hit/miss counters."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM resources)"
+            ).fetchone()
+            resources = self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "resources": resources,
+            "objects": row[0],
+            "bytes": row[1],
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header.
+
+    Multiple ranges and malformed headers are ignored (the full file is
+    served), as RFC 9110 allows.
+
+    Args:
+        header: Range header value
+        size: File size in bytes
+
+    Returns:
+        Inclusive (start, end) byte positions, or None to serve the full file
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+class CachedFileResponse(Response):
+    """Serve a cached resource file with Range and conditional request support.
+
+    The SHA-256 of the content is used as a strong ETag. When the server
+    supports the ASGI zero-copy send extension the file is handed over with
+    sendfile; otherwise it is read and sent in chunks.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, entry: Dict, request_headers: Mapping[str, str]):
+        """
+        Build the response for a cached resource.
+
+        Args:
+            entry: Cache entry as returned by ResourceCache.lookup
+            request_headers: Headers of the incoming request
+        """
+        self.path = entry["path"]
+        self.size = entry["size"]
+        self.background = None
+        self.media_type = entry["content_type"] or "application/octet-stream"
+        etag = f'"{entry["sha256"]}"'
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(entry["stored_at"], usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        if entry["content_disposition"]:
+            headers["content-disposition"] = entry["content_disposition"]
+
+        self.start, self.length = 0, self.size
+        self.status_code = 200
+        if _not_modified(request_headers, etag, entry["stored_at"]):
+            self.status_code, self.length = 304, 0
+        elif _if_range_matches(request_headers.get("if-range"), etag, entry["stored_at"]):
+            try:
+                byte_range = parse_range(request_headers.get("range"), self.size)
+            except ValueError:
+                self.status_code, self.length = 416, 0
+                headers["content-range"] = f"bytes */{self.size}"
+            else:
+                if byte_range is not None:
+                    self.status_code = 206
+                    self.start, end = byte_range
+                    self.length = end - self.start + 1
+                    headers["content-range"] = f"bytes {self.start}-{end}/{self.size}"
+        if self.status_code != 304:
+            headers["content-length"] = str(self.length)
+        self.send_header_only = self.length == 0
+        self.init_headers(headers)
+        if self.status_code in (304, 416):
+            self.raw_headers = [(k, v) for k, v in self.raw_headers if k != b"content-type"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the body so the client sees a short read
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _not_modified(request_headers: Mapping[str, str], etag: str, stored_at: float) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since."""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    since = _http_date(request_headers.get("if-modified-since"))
+    return since is not None and int(stored_at) <= since
+
+
+def _if_range_matches(if_range: Optional[str], etag: str, stored_at: float) -> bool:
+    """Return True if a Range should be honoured given the If-Range precondition."""
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    since = _http_date(if_range)
+    return since is not None and int(stored_at) <= since
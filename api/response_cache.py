@@ -0,0 +1,348 @@
+"""Two-tier (memory + on-disk) cache for SAM.gov responses
+
+L1 is a per-process LRUCache. L2 is a SQLite database shared by every worker
+on the host and surviving restarts, so a deploy does not start cold.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Optional
+
+from .cache import CacheEntry, LRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "sam_response_cache.sqlite3")
+
+
+def _normalize_list(value: Optional[str], upper: bool = False) -> Optional[str]:
+    """Sort and de-duplicate a comma-separated filter value."""
+    if not value:
+        return None
+    items = {item.strip() for item in value.split(",") if item.strip()}
+    if upper:
+        items = {item.upper() for item in items}
+    return ",".join(sorted(items)) or None
+
+
+def _normalize_date(value: Optional[str]) -> Optional[str]:
+    """Convert YYYY-MM-DD or MM/dd/yyyy to YYYY-MM-DD; leave other values for upstream validation."""
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return value
+
+
+def normalize_search_params(
+    keyword: Optional[str] = None,
+    naics_code: Optional[str] = None,
+    set_aside: Optional[str] = None,
+    status: Optional[str] = None,
+    page: int = 1,
+    limit: int = 10,
+    posted_from: Optional[str] = None,
+    posted_to: Optional[str] = None,
+    organization_id: Optional[str] = None,
+    organization_name: Optional[str] = None,
+    place_of_performance_state: Optional[str] = None,
+    place_of_performance_zipcode: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Canonicalize search arguments so equivalent searches share a cache key.
+
+    Comma lists are sorted and de-duplicated, dates are converted to
+    YYYY-MM-DD, and a missing date range is resolved to the same default
+    90-day window the client sends upstream.
+    """
+    posted_from = _normalize_date(posted_from)
+    posted_to = _normalize_date(posted_to)
+    if not posted_from or not posted_to:
+        end_date = datetime.now()
+        posted_from = (end_date - timedelta(days=90)).strftime("%Y-%m-%d")
+        posted_to = end_date.strftime("%Y-%m-%d")
+
+    return {
+        "keyword": " ".join(keyword.split()).lower() if keyword else None,
+        "naics_code": _normalize_list(naics_code),
+        "set_aside": _normalize_list(set_aside, upper=True),
+        "status": _normalize_list(status),
+        "page": int(page),
+        "limit": int(limit),
+        "posted_from": posted_from,
+        "posted_to": posted_to,
+        "organization_id": organization_id.strip() if organization_id else None,
+        "organization_name": " ".join(organization_name.split()).lower() if organization_name else None,
+        "place_of_performance_state": place_of_performance_state.strip().upper() if place_of_performance_state else None,
+        "place_of_performance_zipcode": place_of_performance_zipcode.strip() if place_of_performance_zipcode else None,
+    }
+
+
+def search_cache_key(**filters) -> str:
+    """Build a cache key for a search from its normalized parameters."""
+    normalized = normalize_search_params(**filters)
+    return "search:" + json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class DiskCache:
+    """SQLite-backed cache of JSON-serializable values with absolute expiry.
+
+    Safe to share between processes. Rows expired more than ``max_stale``
+    seconds ago are purged, and the table trimmed to ``max_entries``
+    oldest-first, every ``purge_interval`` writes.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 100_000,
+        purge_interval: int = 500,
+        max_stale: float = 0.0
+    ):
+        """
+        Initialize the on-disk cache.
+
+        Args:
+            db_path: SQLite database file; created if missing
+            max_entries: Maximum number of rows kept
+            purge_interval: Writes between purges of expired and excess rows
+            max_stale: Seconds expired rows are kept for stale lookups
+        """
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.max_entries = max_entries
+        self.max_stale = max_stale
+        self.purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        if self.db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                stored_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_stored_at ON responses (stored_at)")
+        self._writes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get_entry(self, key: str, max_stale: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Look up key, including rows expired less than max_stale seconds ago.
+
+        Args:
+            key: Cache key
+            max_stale: Seconds past expiry a row is still returned; the
+                cache's own max_stale when omitted
+
+        Returns:
+            The entry, marked stale if expired, or None
+        """
+        max_stale = min(self.max_stale if max_stale is None else max_stale, self.max_stale)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, stored_at FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now - max_stale)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] > now:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return CacheEntry(json.loads(row[0]), now - row[2], row[1] - now)
+
+    def __contains__(self, key: str) -> bool:
+        """Whether an unexpired row exists, without counting a hit or miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: Any, expires_at: float) -> None:
+        """Store value until the absolute UNIX time expires_at."""
+        payload = json.dumps(value, separators=(",", ":"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, time.time())
+            )
+            self._writes += 1
+            if self._writes % self.purge_interval == 0:
+                self._purge()
+
+    def _purge(self) -> None:
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time() - self.max_stale,))
+        self._conn.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def delete(self, key: str) -> None:
+        """Remove a key."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove all rows."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return row count and hit/miss counters for this process."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """L1 in-memory LRU in front of an optional shared L2 DiskCache.
+
+    Presents the same get/get_entry/set/clear/stats interface as LRUCache.
+    L2 hits are promoted into L1 for the remainder of their lifetime. A stale
+    L1 entry is checked against L2, where another worker may have refreshed it.
+
+    L2 reads and writes block on SQLite (and on other workers' write locks),
+    so async callers use get_entry_async/contains_async/set_async, which run
+    the L2 side in a worker thread.
+    """
+
+    def __init__(self, l1: Optional[LRUCache] = None, l2: Optional[DiskCache] = None):
+        """
+        Initialize the tiered cache.
+
+        Args:
+            l1: Per-process memory tier; a default LRUCache when omitted
+            l2: Shared disk tier; memory only when omitted
+        """
+        self.l1 = l1 if l1 is not None else LRUCache()
+        self.l2 = l2
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.l1 or (self.l2 is not None and key in self.l2)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value from the fastest tier that has it."""
+        entry = self.get_entry(key, max_stale=0.0)
+        return entry.value if entry is not None else default
+
+    def get_entry(self, key: Hashable, max_stale: Optional[float] = None) -> Optional[CacheEntry]:
+        """
+        Return the freshest entry either tier has, stale or not.
+
+        Args:
+            key: Cache key
+            max_stale: Seconds past expiry an entry is still returned; each
+                tier's own max_stale when omitted
+
+        Returns:
+            The entry, marked stale if expired, or None
+        """
+        entry = self.l1.get_entry(key, max_stale)
+        if self.l2 is None or (entry is not None and not entry.stale):
+            return entry
+        return self._promote(key, entry, self.l2.get_entry(key, max_stale))
+
+    async def get_entry_async(self, key: Hashable, max_stale: Optional[float] = None) -> Optional[CacheEntry]:
+        """get_entry for the event loop: L2 is read in a worker thread."""
+        entry = self.l1.get_entry(key, max_stale)
+        if self.l2 is None or (entry is not None and not entry.stale):
+            return entry
+        return self._promote(key, entry, await asyncio.to_thread(self.l2.get_entry, key, max_stale))
+
+    def _promote(self, key: Hashable, entry: Optional[CacheEntry], shared: Optional[CacheEntry]) -> Optional[CacheEntry]:
+        """Return the longer-lived of the L1 and L2 entries, copying an L2 winner into L1."""
+        if shared is None or (entry is not None and shared.ttl <= entry.ttl):
+            return entry
+        self.l1.set(key, shared.value, ttl=shared.ttl, age=shared.age)
+        return shared
+
+    async def contains_async(self, key: Hashable) -> bool:
+        """``key in cache`` for the event loop: L2 is checked in a worker thread."""
+        if key in self.l1:
+            return True
+        return self.l2 is not None and await asyncio.to_thread(self.l2.__contains__, key)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store value in both tiers.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Seconds until expiry; entries without a TTL stay in memory only
+        """
+        self.l1.set(key, value, ttl=ttl)
+        if self.l2 is not None and ttl is not None:
+            self._set_l2(key, value, time.time() + ttl)
+
+    async def set_async(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """set for the event loop: L1 is updated at once, L2 (and its periodic purge) in a worker thread."""
+        self.l1.set(key, value, ttl=ttl)
+        if self.l2 is not None and ttl is not None:
+            await asyncio.to_thread(self._set_l2, key, value, time.time() + ttl)
+
+    def _set_l2(self, key: Hashable, value: Any, expires_at: float) -> None:
+        try:
+            self.l2.set(key, value, expires_at)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            # The disk tier is an optimization; never fail a request over it
+            logger.warning(f"Could not write {key} to disk cache: {str(e)}")
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key from both tiers and return the L1 value."""
+        if self.l2 is not None:
+            self.l2.delete(key)
+        return self.l1.pop(key, default)
+
+    def clear(self) -> None:
+        """Clear both tiers."""
+        self.l1.clear()
+        if self.l2 is not None:
+            self.l2.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return statistics for each tier."""
+        stats = {"l1": self.l1.stats()}
+        if self.l2 is not None:
+            stats["l2"] = self.l2.stats()
+        return stats
@@ -1,45 +1,17 @@
 """SAM.gov API Client for Contract Opportunities"""
 
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import requests
 from datetime import datetime, timedelta
-import time
-from functools import wraps
-import pytz
-from .sam_schedule import get_cache_ttl, is_bulk_update_time, get_next_update_time
+from .sam_schedule import get_ttl_until_next_update
+from .cache import LRUCache
+from .response_cache import TieredCache, search_cache_key
+from .rate_limiter import TokenBucketRateLimiter
 
 logger = logging.getLogger(__name__)
 
-def rate_limit(calls: int, period: int):
-    """Rate limiting decorator
-    
-    Args:
-        calls (int): Number of calls allowed in the period
-        period (int): Time period in seconds
-    """
-    def decorator(func):
-        # Store last request timestamps
-        timestamps = []
-        
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            now = time.time()
-            # Remove timestamps outside the window
-            while timestamps and now - timestamps[0] > period:
-                timestamps.pop(0)
-            
-            if len(timestamps) >= calls:
-                sleep_time = timestamps[0] + period - now
-                if sleep_time > 0:
-                    logger.warning(f"Rate limit reached. Waiting {sleep_time:.2f} seconds")
-                    time.sleep(sleep_time)
-                    timestamps.pop(0)
-            
-            timestamps.append(now)
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+DEFAULT_API_ROOT = "https://api.sam.gov"
 
 class SAMAPIClient:
     """Client for interacting with the SAM.gov Contract Opportunities API.
@@ -47,19 +19,48 @@ class SAMAPIClient:
     Rate Limits (System Account):
         - 100,000 requests per day
         - 60 requests per minute
+    
+    Every upstream call takes a token from a per-key TokenBucketRateLimiter
+    shared by all endpoints; cache hits are free.
     """
     
-    def __init__(self, api_key: str):
-        """Initialize the SAM API client with authentication."""
+    def __init__(
+        self,
+        api_key: str,
+        cache: Optional[Union[LRUCache, TieredCache]] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        api_root: str = DEFAULT_API_ROOT
+    ):
+        """
+        Initialize the SAM API client with authentication.
+        
+        Args:
+            api_key: SAM.gov API key
+            cache: Cache for search, detail and description responses
+                (LRUCache or TieredCache); a private LRUCache is created
+                when omitted
+            rate_limiter: Limiter shared with other clients and workers; one
+                backed by the default database file is created when omitted
+            api_root: Scheme and host of the SAM.gov API, e.g. a local
+                stand-in server for load tests
+        """
         self.api_key = api_key
-        self.base_url = "https://api.sam.gov/opportunities/v2"
-        self.desc_url = "https://api.sam.gov/opportunities/v1"
-        self.resources_url = "https://api.sam.gov/opportunities/v3"
-        self._cache = {}
-        self._last_update = None
-        self._next_update = get_next_update_time()
+        api_root = api_root.rstrip("/")
+        self.base_url = f"{api_root}/opportunities/v2"
+        self.desc_url = f"{api_root}/opportunities/v1"
+        self.resources_url = f"{api_root}/opportunities/v3"
+        self._cache = cache if cache is not None else LRUCache()
+        self._rate_limiter = rate_limiter if rate_limiter is not None else TokenBucketRateLimiter()
         logger.info("SAM API client initialized with System Account limits")
     
+    def cache_stats(self) -> Dict:
+        """Return hit/miss/eviction counters for the response cache."""
+        return self._cache.stats()
+    
+    def rate_limit_status(self) -> Dict:
+        """Return the token bucket level and daily quota usage for this key."""
+        return self._rate_limiter.status(self.api_key)
+    
     def _build_headers(self) -> Dict[str, str]:
         """Build request headers including authentication."""
         return {
@@ -67,7 +68,7 @@ class SAMAPIClient:
             "Content-Type": "application/json",
             "X-Api-Key": self.api_key
         }
-
+    
     def _format_date(self, date_str: Optional[str] = None) -> str:
         """
         Format date string to MM/dd/yyyy format required by SAM.gov API.
@@ -87,7 +88,134 @@ class SAMAPIClient:
         
         return date.strftime("%m/%d/%Y")
     
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
+    def _check_response(self, response) -> None:
+        """
+        Raise for SAM.gov error responses.
+        
+        Works with both ``requests`` and ``httpx`` responses. A 400 becomes a
+        ValueError carrying SAM.gov's error message; other error statuses are
+        raised by the underlying library.
+        """
+        if response.status_code == 400:
+            error_msg = response.json().get("errorMessage", "Unknown error")
+            logger.error(f"SAM.gov API error: {error_msg}")
+            raise ValueError(error_msg)
+        
+        response.raise_for_status()
+    
+    def _build_search_params(
+        self,
+        keyword: Optional[str] = None,
+        naics_code: Optional[str] = None,
+        set_aside: Optional[str] = None,
+        status: Optional[str] = None,
+        page: int = 1,
+        limit: int = 10,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        organization_id: Optional[str] = None,
+        organization_name: Optional[str] = None,
+        place_of_performance_state: Optional[str] = None,
+        place_of_performance_zipcode: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Translate search arguments into SAM.gov search query parameters."""
+        # Format dates
+        if not posted_from or not posted_to:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=90)
+            posted_from = start_date.strftime("%m/%d/%Y")
+            posted_to = end_date.strftime("%m/%d/%Y")
+        else:
+            posted_from = self._format_date(posted_from)
+            posted_to = self._format_date(posted_to)
+        
+        params = {
+            "limit": str(limit),
+            "offset": str((page - 1) * limit),
+            "postedFrom": posted_from,
+            "postedTo": posted_to,
+            "active": "true"
+        }
+        
+        # Add optional filters
+        if keyword:
+            params["q"] = keyword
+        if naics_code:
+            params["naicsCodes"] = naics_code
+        if set_aside:
+            params["setAsides"] = set_aside
+        if status:
+            params["type"] = status
+        if organization_id:
+            params["organizationId"] = organization_id
+        if organization_name:
+            params["organizationName"] = organization_name
+        if place_of_performance_state:
+            params["placeOfPerformanceState"] = place_of_performance_state
+        if place_of_performance_zipcode:
+            params["placeOfPerformanceZipcode"] = place_of_performance_zipcode
+        
+        return params
+    
+    def _parse_search_response(self, data: Dict, page: int, limit: int) -> Dict:
+        """Shape a raw SAM.gov search response into the API's result format."""
+        # Updated response parsing based on actual SAM.gov API response structure
+        opportunities = data.get("opportunitiesData", [])
+        if isinstance(opportunities, dict):
+            opportunities = [opportunities]
+        
+        return {
+            "opportunities": opportunities,
+            "metadata": {
+                "total": data.get("totalRecords", 0),
+                "page": page,
+                "limit": limit
+            }
+        }
+    
+    def _catalog_params(self, organization_hierarchy: bool = False) -> Dict[str, str]:
+        """Build search parameters for deriving reference catalogs."""
+        # Calculate date range (last 90 days)
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=90)
+        
+        params = {
+            "limit": "100",
+            "postedFrom": start_date.strftime("%m/%d/%Y"),
+            "postedTo": end_date.strftime("%m/%d/%Y")
+        }
+        if organization_hierarchy:
+            params["organizationHierarchy"] = "true"
+        return params
+    
+    def _extract_organizations(self, opportunities: List[Dict]) -> List[Dict]:
+        """Extract unique organizations from search results."""
+        organizations = {}
+        for opp in opportunities:
+            org_id = opp.get("organizationId")
+            if org_id and org_id not in organizations:
+                organizations[org_id] = {
+                    "id": org_id,
+                    "name": opp.get("organizationName"),
+                    "type": opp.get("organizationType")
+                }
+        
+        return list(organizations.values())
+    
+    def _extract_setasides(self, opportunities: List[Dict]) -> List[Dict]:
+        """Extract unique set-asides from search results."""
+        setasides = {}
+        for opp in opportunities:
+            setaside = opp.get("typeOfSetAside")
+            description = opp.get("typeOfSetAsideDescription")
+            if setaside and setaside not in setasides:
+                setasides[setaside] = {
+                    "code": setaside,
+                    "description": description or setaside
+                }
+        
+        return list(setasides.values())
+    
     def search_opportunities(
         self,
         keyword: Optional[str] = None,
@@ -119,115 +247,71 @@ class SAMAPIClient:
             organization_name: Filter by organization name
             place_of_performance_state: Filter by state code
             place_of_performance_zipcode: Filter by ZIP code
-            
+        
         Returns:
             Dict containing opportunities and metadata
         """
-        cache_key = f"search:{keyword}:{naics_code}:{set_aside}:{status}:{page}:{limit}:{posted_from}:{posted_to}:{organization_id}:{organization_name}:{place_of_performance_state}:{place_of_performance_zipcode}"
-        current_time = time.time()
+        filters = dict(
+            keyword=keyword,
+            naics_code=naics_code,
+            set_aside=set_aside,
+            status=status,
+            page=page,
+            limit=limit,
+            posted_from=posted_from,
+            posted_to=posted_to,
+            organization_id=organization_id,
+            organization_name=organization_name,
+            place_of_performance_state=place_of_performance_state,
+            place_of_performance_zipcode=place_of_performance_zipcode
+        )
+        cache_key = search_cache_key(**filters)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Check if we need to refresh cache
-        if (cache_key not in self._cache or 
-            current_time - self._cache[cache_key]['timestamp'] > get_cache_ttl() or
-            datetime.now(pytz.timezone('US/Eastern')) >= self._next_update):
+        # Make API call and cache results
+        try:
+            params = self._build_search_params(**filters)
             
-            # Update next update time if we've passed it
-            if datetime.now(pytz.timezone('US/Eastern')) >= self._next_update:
-                self._next_update = get_next_update_time()
+            logger.debug(f"Searching opportunities with params: {params}")
             
-            # Make API call and cache results
-            try:
-                # Format dates
-                if not posted_from or not posted_to:
-                    end_date = datetime.now()
-                    start_date = end_date - timedelta(days=90)
-                    posted_from = start_date.strftime("%m/%d/%Y")
-                    posted_to = end_date.strftime("%m/%d/%Y")
-                else:
-                    posted_from = self._format_date(posted_from)
-                    posted_to = self._format_date(posted_to)
-                
-                params = {
-                    "limit": str(limit),
-                    "offset": str((page - 1) * limit),
-                    "postedFrom": posted_from,
-                    "postedTo": posted_to,
-                    "active": "true"
-                }
-                
-                # Add optional filters
-                if keyword:
-                    params["q"] = keyword
-                if naics_code:
-                    params["naicsCodes"] = naics_code
-                if set_aside:
-                    params["setAsides"] = set_aside
-                if status:
-                    params["type"] = status
-                if organization_id:
-                    params["organizationId"] = organization_id
-                if organization_name:
-                    params["organizationName"] = organization_name
-                if place_of_performance_state:
-                    params["placeOfPerformanceState"] = place_of_performance_state
-                if place_of_performance_zipcode:
-                    params["placeOfPerformanceZipcode"] = place_of_performance_zipcode
-                
-                logger.info(f"Searching opportunities with params: {params}")
-                
-                response = requests.get(
-                    f"{self.base_url}/search",
-                    headers=self._build_headers(),
-                    params=params,
-                    timeout=10
-                )
-                
-                if response.status_code == 400:
-                    error_msg = response.json().get("errorMessage", "Unknown error")
-                    logger.error(f"SAM.gov API error: {error_msg}")
-                    raise ValueError(error_msg)
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                # Updated response parsing based on actual SAM.gov API response structure
-                opportunities = data.get("opportunitiesData", [])
-                if isinstance(opportunities, dict):
-                    opportunities = [opportunities]
-                
-                self._cache[cache_key] = {
-                    'data': {
-                        "opportunities": opportunities,
-                        "metadata": {
-                            "total": data.get("totalRecords", 0),
-                            "page": page,
-                            "limit": limit
-                        }
-                    },
-                    'timestamp': current_time
-                }
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error searching opportunities: {str(e)}")
-                raise
-            except ValueError as e:
-                logger.error(f"Invalid request: {str(e)}")
-                raise
-        
-        return self._cache[cache_key]['data']
+            self._rate_limiter.acquire(self.api_key)
+            response = requests.get(
+                f"{self.base_url}/search",
+                headers=self._build_headers(),
+                params=params,
+                timeout=10
+            )
+            self._check_response(response)
+            
+            result = self._parse_search_response(response.json(), page, limit)
+            self._cache.set(cache_key, result, ttl=get_ttl_until_next_update())
+            return result
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error searching opportunities: {str(e)}")
+            raise
+        except ValueError as e:
+            logger.error(f"Invalid request: {str(e)}")
+            raise
     
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
     def get_opportunity(self, notice_id: str) -> Dict:
         """
         Get detailed information about a specific opportunity.
         
         Args:
             notice_id: The unique identifier of the opportunity
-            
+        
         Returns:
             Dict containing opportunity details
         """
+        cache_key = f"opportunity:{notice_id}"
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            logger.info(f"Getting opportunity details for notice ID: {notice_id}")
+            logger.debug(f"Getting opportunity details for notice ID: {notice_id}")
             
             # Updated URL to use search endpoint with notice ID
             params = {
@@ -235,19 +319,14 @@ class SAMAPIClient:
                 "limit": "1"
             }
             
+            self._rate_limiter.acquire(self.api_key)
             response = requests.get(
                 f"{self.base_url}/search",
                 headers=self._build_headers(),
                 params=params,
                 timeout=10
             )
-            
-            if response.status_code == 400:
-                error_msg = response.json().get("errorMessage", "Unknown error")
-                logger.error(f"SAM.gov API error: {error_msg}")
-                raise ValueError(error_msg)
-            
-            response.raise_for_status()
+            self._check_response(response)
             data = response.json()
             
             # Extract the first (and should be only) opportunity
@@ -255,89 +334,84 @@ class SAMAPIClient:
             if not opportunities:
                 raise ValueError(f"Opportunity {notice_id} not found")
             
+            self._cache.set(cache_key, opportunities[0], ttl=get_ttl_until_next_update())
             return opportunities[0]
-            
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting opportunity details: {str(e)}")
             raise
         except ValueError as e:
             logger.error(f"Invalid request: {str(e)}")
             raise
-
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
+    
     def get_opportunity_description(self, notice_id: str) -> str:
         """
         Get the full description text of an opportunity.
         
         Args:
             notice_id: The unique identifier of the opportunity
-            
+        
         Returns:
             String containing the full description
         """
+        cache_key = f"description:{notice_id}"
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            logger.info(f"Getting description for notice ID: {notice_id}")
+            logger.debug(f"Getting description for notice ID: {notice_id}")
             
+            self._rate_limiter.acquire(self.api_key)
             response = requests.get(
                 f"{self.desc_url}/noticedesc",
                 headers=self._build_headers(),
                 params={"noticeid": notice_id},
                 timeout=10
             )
-            
-            if response.status_code == 400:
-                error_msg = response.json().get("errorMessage", "Unknown error")
-                logger.error(f"SAM.gov API error: {error_msg}")
-                raise ValueError(error_msg)
-            
-            response.raise_for_status()
+            self._check_response(response)
             data = response.json()
             
-            return data.get("description", "")
-            
+            description = data.get("description", "")
+            self._cache.set(cache_key, description, ttl=get_ttl_until_next_update())
+            return description
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting opportunity description: {str(e)}")
             raise
         except ValueError as e:
             logger.error(f"Invalid request: {str(e)}")
             raise
-
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
+    
     def get_resource_file(self, resource_id: str) -> bytes:
         """
         Download a resource file associated with an opportunity.
         
         Args:
             resource_id: The unique identifier of the resource file
-            
+        
         Returns:
             Bytes containing the file content
         """
         try:
-            logger.info(f"Downloading resource file: {resource_id}")
+            logger.debug(f"Downloading resource file: {resource_id}")
             
+            self._rate_limiter.acquire(self.api_key)
             response = requests.get(
                 f"{self.resources_url}/resources/files/{resource_id}/download",
                 headers=self._build_headers(),
                 timeout=10
             )
-            
-            if response.status_code == 400:
-                error_msg = response.json().get("errorMessage", "Unknown error")
-                logger.error(f"SAM.gov API error: {error_msg}")
-                raise ValueError(error_msg)
-            
-            response.raise_for_status()
+            self._check_response(response)
             return response.content
-            
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Error downloading resource file: {str(e)}")
             raise
         except ValueError as e:
             logger.error(f"Invalid request: {str(e)}")
             raise
-
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
+    
     def get_organizations(self) -> List[Dict]:
         """
         Get a list of organizations that post opportunities.
@@ -348,55 +422,26 @@ class SAMAPIClient:
         try:
             logger.info("Getting organizations list")
             
-            # Calculate date range (last 90 days)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=90)
-            
             # Use the search endpoint with specific parameters to get organizations
-            params = {
-                "limit": "100",
-                "organizationHierarchy": "true",
-                "postedFrom": start_date.strftime("%m/%d/%Y"),
-                "postedTo": end_date.strftime("%m/%d/%Y")
-            }
-            
+            self._rate_limiter.acquire(self.api_key)
             response = requests.get(
                 f"{self.base_url}/search",
                 headers=self._build_headers(),
-                params=params,
+                params=self._catalog_params(organization_hierarchy=True),
                 timeout=10
             )
-            
-            if response.status_code == 400:
-                error_msg = response.json().get("errorMessage", "Unknown error")
-                logger.error(f"SAM.gov API error: {error_msg}")
-                raise ValueError(error_msg)
-            
-            response.raise_for_status()
+            self._check_response(response)
             data = response.json()
             
-            # Extract unique organizations from the search results
-            opportunities = data.get("opportunitiesData", [])
-            organizations = {}
-            for opp in opportunities:
-                org_id = opp.get("organizationId")  
-                if org_id and org_id not in organizations:
-                    organizations[org_id] = {
-                        "id": org_id,
-                        "name": opp.get("organizationName"),  
-                        "type": opp.get("organizationType")
-                    }
-            
-            return list(organizations.values())
-            
+            return self._extract_organizations(data.get("opportunitiesData", []))
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting organizations: {str(e)}")
             raise
         except ValueError as e:
             logger.error(f"Invalid request: {str(e)}")
             raise
-
-    @rate_limit(calls=60, period=60)  # 60 calls per minute
+    
     def get_setasides(self) -> List[Dict]:
         """
         Get a list of valid set-aside types and codes.
@@ -407,46 +452,19 @@ class SAMAPIClient:
         try:
             logger.info("Getting set-aside types")
             
-            # Calculate date range (last 90 days)
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=90)
-            
             # Use the search endpoint with specific parameters to get set-asides
-            params = {
-                "limit": "100",
-                "postedFrom": start_date.strftime("%m/%d/%Y"),
-                "postedTo": end_date.strftime("%m/%d/%Y")
-            }
-            
+            self._rate_limiter.acquire(self.api_key)
             response = requests.get(
                 f"{self.base_url}/search",
                 headers=self._build_headers(),
-                params=params,
+                params=self._catalog_params(),
                 timeout=10
             )
-            
-            if response.status_code == 400:
-                error_msg = response.json().get("errorMessage", "Unknown error")
-                logger.error(f"SAM.gov API error: {error_msg}")
-                raise ValueError(error_msg)
-            
-            response.raise_for_status()
+            self._check_response(response)
             data = response.json()
             
-            # Extract unique set-asides from the search results
-            opportunities = data.get("opportunitiesData", [])
-            setasides = {}
-            for opp in opportunities:
-                setaside = opp.get("typeOfSetAside")
-                description = opp.get("typeOfSetAsideDescription")
-                if setaside and setaside not in setasides:
-                    setasides[setaside] = {
-                        "code": setaside,
-                        "description": description or setaside  
-                    }
-            
-            return list(setasides.values())
-            
+            return self._extract_setasides(data.get("opportunitiesData", []))
+        
         except requests.exceptions.RequestException as e:
             logger.error(f"Error getting set-aside types: {str(e)}")
             raise
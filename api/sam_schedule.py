@@ -7,7 +7,7 @@ SAM.gov Updates Schedule:
 - Complete data refresh occurs during overnight hours
 """
 
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 import pytz
 
 def is_bulk_update_time():
@@ -28,20 +28,55 @@ def is_bulk_update_time():
         return True
     return False
 
-def get_next_update_time():
+def _next_eastern(wall_time, now=None):
+    """
+    Get the next occurrence of an Eastern wall-clock time strictly after now
+    Dates are advanced with date arithmetic (safe across month and year
+    ends) and localized afterwards, so the UTC offset is the one in force
+    on that day (safe across DST changes)
+    """
+    eastern = pytz.timezone('US/Eastern')
+    now = now.astimezone(eastern) if now is not None else datetime.now(eastern)
+    day = now.date()
+    if now.time() >= wall_time:
+        day += timedelta(days=1)
+    # Attach Eastern time explicitly; astimezone() on a naive datetime
+    # would interpret it in the server's local timezone instead
+    return eastern.localize(datetime.combine(day, wall_time))
+
+def get_eastern_date(now=None):
+    """
+    Get the current date in Eastern Time, the calendar SAM.gov posts by
+    The host's local date can be a day ahead (e.g. after 8 PM ET on a UTC host)
+    """
+    eastern = pytz.timezone('US/Eastern')
+    return (now.astimezone(eastern) if now is not None else datetime.now(eastern)).date()
+
+def get_next_update_time(now=None):
     """
     Get the next scheduled bulk update time in Eastern Time
     """
+    return _next_eastern(time(21, 0), now)  # 9 PM ET
+
+def get_update_window_end(now=None):
+    """
+    Get the end of the current bulk update window, or of the next one when
+    outside it, in Eastern Time
+    """
+    return _next_eastern(time(5, 0), now)  # 5 AM ET
+
+def get_data_generation():
+    """
+    Identify the current generation of SAM.gov data, for validators like ETags
+    Outside the bulk update window: the bulk update it followed (e.g. "d20241018")
+    During update hours: the current hour (e.g. "u2024101922"), matching get_cache_ttl()
+    """
     eastern = pytz.timezone('US/Eastern')
     now = datetime.now(eastern)
-    update_time = time(21, 0)  # 9 PM ET
-    
-    next_update = datetime.combine(now.date(), update_time)
-    if now.time() >= update_time:
-        # If we're past today's update time, get tomorrow's
-        next_update = next_update.replace(day=next_update.day + 1)
-    
-    return next_update.astimezone(eastern)
+    if is_bulk_update_time():
+        return now.strftime("u%Y%m%d%H")
+    # The last update started at 9 PM the previous day
+    return (now - timedelta(days=1)).strftime("d%Y%m%d")
 
 def get_cache_ttl():
     """
@@ -52,3 +87,15 @@ def get_cache_ttl():
     if is_bulk_update_time():
         return 3600  # 1 hour during update window
     return 300      # 5 minutes during business hours
+
+def get_ttl_until_next_update():
+    """
+    Get how long freshly fetched data stays valid, in seconds
+    Outside the bulk update window: until the next bulk update starts
+    During update hours: get_cache_ttl(), since data is being refreshed
+    """
+    if is_bulk_update_time():
+        return get_cache_ttl()
+    eastern = pytz.timezone('US/Eastern')
+    remaining = (get_next_update_time() - datetime.now(eastern)).total_seconds()
+    return max(remaining, 0)
@@ -0,0 +1,156 @@
+"""Full-text relevance search over mirrored opportunities
+
+The index itself is an SQLite FTS5 table kept in the mirror database (see
+OpportunityMirror) and ranked with BM25. This module turns user keyword
+queries into safe FTS5 MATCH expressions and fills in notice descriptions,
+which are not part of SAM.gov search results and need their own fetch.
+"""
+
+import asyncio
+import html
+import logging
+import re
+import time
+from typing import List, Optional
+
+from .async_sam_api import AsyncSAMAPIClient
+from .rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# Weights for bm25(): title, description, naics, agency
+COLUMN_WEIGHTS = (10.0, 1.0, 2.0, 3.0)
+
+_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"[\w]+", re.UNICODE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Translate a user keyword query into an FTS5 MATCH expression.
+
+    Supported syntax:
+        - ``cyber security``: every word must match (AND)
+        - ``"network security"``: exact phrase
+        - ``secur*``: prefix match
+        - ``-construction``: exclude a word
+
+    Everything else is quoted, so user input can never produce an FTS5
+    syntax error.
+
+    Args:
+        query: Raw keyword query
+
+    Returns:
+        MATCH expression, or None if the query has no searchable terms
+    """
+    include: List[str] = []
+    exclude: List[str] = []
+    for phrase, word in _TOKEN_RE.findall(query or ""):
+        if phrase:
+            terms = _WORD_RE.findall(phrase)
+            if terms:
+                include.append('"' + " ".join(terms) + '"')
+            continue
+        negate = word.startswith("-") and len(word) > 1
+        prefix = word.endswith("*")
+        terms = _WORD_RE.findall(word)
+        if not terms:
+            continue
+        # Words joined by punctuation (e.g. "8(a)", "cyber-security") become phrases
+        expression = '"' + " ".join(terms) + '"' + ("*" if prefix else "")
+        (exclude if negate else include).append(expression)
+
+    if not include:
+        return None
+    match = " AND ".join(include)
+    for expression in exclude:
+        match += f" NOT {expression}"
+    return match
+
+
+def strip_html(text: str) -> str:
+    """Reduce an HTML notice description to plain text for indexing."""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", text or ""))).strip()
+
+
+class DescriptionIndexer:
+    """Fetch and index descriptions for mirrored notices that lack one.
+
+    Each description costs one upstream call, so a run is capped at
+    ``max_per_run`` notices and the newest notices are indexed first. A run
+    stops early when a rate-limit wait would exceed ``max_wait`` (e.g. the
+    daily quota is spent), leaving the rest for the next run.
+    """
+
+    def __init__(
+        self,
+        client: AsyncSAMAPIClient,
+        mirror,
+        max_per_run: int = 1000,
+        concurrency: int = 4,
+        max_wait: float = 60.0
+    ):
+        """
+        Initialize the indexer.
+
+        Args:
+            client: Async SAM.gov client used for description fetches
+            mirror: OpportunityMirror holding the search index
+            max_per_run: Maximum descriptions fetched per run
+            concurrency: Concurrent description fetches
+            max_wait: Longest rate-limit wait for one fetch before the run stops
+        """
+        self.client = client
+        self.mirror = mirror
+        self.max_per_run = max_per_run
+        self.concurrency = concurrency
+        self.max_wait = max_wait
+
+    async def _fetch(self, notice_id: str) -> Optional[str]:
+        """Fetch one description, raising RateLimitExceeded once waiting would pass max_wait."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                return await self.client.get_opportunity_description(notice_id)
+            except RateLimitExceeded as e:
+                if time.monotonic() + e.retry_after > deadline:
+                    raise
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.warning(f"Could not fetch description for {notice_id}: {str(e)}")
+                return None
+
+    async def run(self) -> int:
+        """
+        Index descriptions for up to max_per_run notices.
+
+        Returns:
+            Number of descriptions indexed
+        """
+        notice_ids = await asyncio.to_thread(self.mirror.notices_missing_description, self.max_per_run)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        indexed = 0
+        stopped: Optional[RateLimitExceeded] = None
+
+        async def index_one(notice_id: str) -> None:
+            nonlocal indexed, stopped
+            async with semaphore:
+                if stopped is not None:
+                    return
+                try:
+                    description = await self._fetch(notice_id)
+                except RateLimitExceeded as e:
+                    stopped = e
+                    return
+            if description is not None:
+                await asyncio.to_thread(self.mirror.set_description, notice_id, strip_html(description))
+                indexed += 1
+
+        await asyncio.gather(*(index_one(notice_id) for notice_id in notice_ids))
+        if stopped is not None:
+            logger.warning(f"Stopped indexing descriptions early: {str(stopped)}")
+        logger.info(f"Indexed {indexed} of {len(notice_ids)} pending descriptions")
+        return indexed
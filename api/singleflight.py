@@ -0,0 +1,86 @@
+"""In-flight request coalescing for upstream SAM.gov calls"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Deduplicate concurrent identical async calls.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and share its result or exception.
+    The task is shielded, so a caller that disconnects does not cancel the
+    call for everyone else waiting on it.
+
+    Errors that belong to the caller rather than the call (for SAM.gov, an
+    API key that is throttled or not authorized) are not shared: callers
+    that joined re-run their own fn instead of receiving the first caller's
+    error.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.reruns = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        rerun_on: Optional[Callable[[BaseException], bool]] = None
+    ) -> T:
+        """
+        Run fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identity of the call, e.g. a normalized cache key
+            fn: Zero-argument coroutine function performing the call
+            rerun_on: Predicate for errors specific to the caller that
+                started the call; a caller that joined and sees one runs
+                its own fn instead
+
+        Returns:
+            The result of fn, shared by every caller that joined
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+            return await asyncio.shield(task)
+
+        self.coalesced += 1
+        logger.debug(f"Coalescing request for {key}")
+        try:
+            return await asyncio.shield(task)
+        except Exception as e:
+            if rerun_on is None or not rerun_on(e):
+                raise
+            self.reruns += 1
+            logger.debug(f"Re-running coalesced request for {key} after {type(e).__name__}")
+        return await fn()
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return upstream call and coalescing counters."""
+        total = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "reruns": self.reruns,
+            "in_flight": len(self._inflight),
+            "coalesced_ratio": self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,469 @@
+"""Columnar snapshots of the SAM.gov entity and opportunity CSV exports
+
+The CSV exports (e.g. ``entities_data_20241019_084447.csv``) store nested
+objects such as addresses and points of contact as stringified Python dicts.
+Converting an export once parses those cells and writes every column in a
+typed, memory-mappable layout, so later readers open a snapshot in
+milliseconds and only touch the columns they use. Convert an export with::
+
+    python -m api.snapshot entities_data_20241019_084447.csv
+
+A snapshot is a directory with a ``manifest.json`` and one or two files per
+column:
+
+- ``date``: ``datetime64[D]`` array (NaT for missing values)
+- ``float``: ``float64`` array (NaN for missing values)
+- ``bool``: ``bool`` array plus a null mask
+- ``str`` and ``json``: UTF-8 bytes of all values back to back, with an
+  ``int64`` array of offsets and a null mask; ``json`` values are the
+  parsed nested objects, re-encoded as JSON
+"""
+
+import argparse
+import ast
+import csv
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+# In order of preference when a column's values fit several types
+COLUMN_TYPES = ("date", "float", "bool", "json", "str")
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_FLOAT_RE = re.compile(r"^-?(\d+\.\d*|\.\d+|\d+(\.\d*)?[eE][-+]?\d+)$")
+_BOOLEANS = {"yes": True, "y": True, "true": True, "no": False, "n": False, "false": False}
+
+
+def _candidate_types(value: str) -> set:
+    """Column types a single non-empty CSV value is compatible with."""
+    types = {"str"}
+    if _DATE_RE.match(value):
+        types.add("date")
+    if _FLOAT_RE.match(value):
+        types.add("float")
+    if value.lower() in _BOOLEANS:
+        types.add("bool")
+    if value[0] in "{[" and value[-1] in "}]":
+        types.add("json")
+    return types
+
+
+def infer_types(reader: Iterator[Dict[str, str]], fieldnames: Sequence[str]) -> Tuple[Dict[str, str], int]:
+    """
+    Pick the most specific type every value of each column fits.
+
+    Numbers without a decimal point or exponent (NAICS codes, ZIP codes,
+    CAGE codes) stay strings, so leading zeros and identifier semantics
+    survive.
+
+    Args:
+        reader: CSV rows as dicts
+        fieldnames: CSV header
+
+    Returns:
+        (dict mapping each column name to one of COLUMN_TYPES, row count)
+    """
+    candidates: Dict[str, Optional[set]] = {name: None for name in fieldnames}
+    rows = 0
+    for row in reader:
+        rows += 1
+        for name in fieldnames:
+            value = row.get(name)
+            if not value or candidates[name] == {"str"}:
+                continue
+            types = _candidate_types(value)
+            candidates[name] = types if candidates[name] is None else candidates[name] & types
+    types = {
+        name: next((kind for kind in COLUMN_TYPES if kind in (candidate or ())), "str")
+        for name, candidate in candidates.items()
+    }
+    return types, rows
+
+
+def _parse_nested(value: str) -> Any:
+    """Parse a stringified Python literal (or JSON) cell."""
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        # Some exports write JSON (true/false/null) rather than Python literals
+        return json.loads(value)
+
+
+class _TextWriter:
+    """Appends the values of one str or json column to its data file."""
+
+    def __init__(self, path: str, rows: int):
+        self.file = open(path + ".data", "wb")
+        self.offsets = np.zeros(rows + 1, dtype=np.int64)
+        self.nulls = np.ones(rows, dtype=bool)
+        self.position = 0
+
+    def write(self, index: int, text: str) -> None:
+        encoded = text.encode("utf-8")
+        self.file.write(encoded)
+        self.position += len(encoded)
+        self.offsets[index + 1] = self.position
+        self.nulls[index] = False
+
+    def close(self, path: str) -> None:
+        self.file.close()
+        # Missing values are empty: their end offset is the previous value's
+        np.maximum.accumulate(self.offsets, out=self.offsets)
+        np.save(path + ".offsets.npy", self.offsets)
+        np.save(path + ".nulls.npy", self.nulls)
+
+
+def convert_csv(csv_path: str, output: Optional[str] = None, types: Optional[Dict[str, str]] = None) -> str:
+    """
+    Convert a CSV export into a columnar snapshot directory.
+
+    The CSV is read twice, once to infer column types and once to write the
+    columns, so exports larger than memory convert fine. The snapshot is
+    built in a temporary directory and renamed into place, replacing any
+    previous snapshot at ``output``.
+
+    Args:
+        csv_path: Path of the CSV export
+        output: Snapshot directory; defaults to the CSV path with a
+            ``.snapshot`` suffix instead of ``.csv``
+        types: Column types overriding inference, by column name
+
+    Returns:
+        Path of the snapshot directory
+    """
+    started = time.time()
+    output = output or os.path.splitext(csv_path)[0] + ".snapshot"
+    csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+    with open(csv_path, newline="", encoding="utf-8") as file:
+        reader = csv.DictReader(file)
+        fieldnames = list(reader.fieldnames or [])
+        column_types, rows = infer_types(reader, fieldnames)
+    column_types.update(types or {})
+    invalid = {name: kind for name, kind in column_types.items() if kind not in COLUMN_TYPES}
+    if invalid:
+        raise ValueError(f"Unknown column types: {invalid}")
+
+    staging = f"{output.rstrip(os.sep)}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(staging)
+    columns: Dict[str, Dict] = {}
+    arrays: Dict[str, np.ndarray] = {}
+    masks: Dict[str, np.ndarray] = {}
+    writers: Dict[str, _TextWriter] = {}
+    try:
+        for position, name in enumerate(fieldnames):
+            kind = column_types[name]
+            prefix = f"c{position:04d}"
+            columns[name] = {"type": kind, "file": prefix}
+            if kind == "date":
+                arrays[name] = np.full(rows, np.datetime64("NaT"), dtype="datetime64[D]")
+            elif kind == "float":
+                arrays[name] = np.full(rows, np.nan, dtype=np.float64)
+            elif kind == "bool":
+                arrays[name] = np.zeros(rows, dtype=bool)
+                masks[name] = np.ones(rows, dtype=bool)
+            else:
+                writers[name] = _TextWriter(os.path.join(staging, prefix), rows)
+
+        unparsed: Dict[str, int] = {}
+        with open(csv_path, newline="", encoding="utf-8") as file:
+            for index, row in enumerate(csv.DictReader(file)):
+                for name in fieldnames:
+                    value = row.get(name)
+                    if not value:
+                        continue
+                    kind = column_types[name]
+                    try:
+                        if kind == "date":
+                            arrays[name][index] = np.datetime64(value[:10], "D")
+                        elif kind == "float":
+                            arrays[name][index] = float(value)
+                        elif kind == "bool":
+                            arrays[name][index] = _BOOLEANS[value.lower()]
+                            masks[name][index] = False
+                        elif kind == "json":
+                            parsed = _parse_nested(value)
+                            writers[name].write(index, json.dumps(parsed, separators=(",", ":"), default=list))
+                        else:
+                            writers[name].write(index, value)
+                    except (ValueError, KeyError, SyntaxError, TypeError):
+                        # Left missing; counted so a bad type override is visible
+                        unparsed[name] = unparsed.get(name, 0) + 1
+
+        for name, spec in columns.items():
+            path = os.path.join(staging, spec["file"])
+            if name in writers:
+                writers[name].close(path)
+            else:
+                np.save(path + ".npy", arrays[name])
+                if name in masks:
+                    np.save(path + ".nulls.npy", masks[name])
+        if unparsed:
+            logger.warning(f"Values left missing because they did not parse: {unparsed}")
+
+        with open(os.path.join(staging, MANIFEST), "w") as file:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "source": os.path.basename(csv_path),
+                "rows": rows,
+                "created_at": time.time(),
+                "columns": columns,
+            }, file, indent=2)
+
+        previous = None
+        if os.path.exists(output):
+            previous = f"{output.rstrip(os.sep)}.old-{uuid.uuid4().hex}"
+            os.replace(output, previous)
+        os.replace(staging, output)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    except BaseException:
+        for writer in writers.values():
+            writer.file.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(f"Converted {rows} rows of {csv_path} into {output} in {time.time() - started:.1f}s")
+    return output
+
+
+class TextColumn:
+    """Lazily decoded str or json column backed by memory-mapped files.
+
+    Values are decoded only when accessed; missing values are None.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray, nulls: np.ndarray, nested: bool):
+        self._data = data
+        self._offsets = offsets
+        self.nulls = nulls
+        self._nested = nested
+
+    def __len__(self) -> int:
+        return len(self.nulls)
+
+    def _decode(self, start: int, stop: int) -> List[Any]:
+        """Decode rows start..stop with one read of their bytes."""
+        offsets = self._offsets[start:stop + 1].tolist()
+        base = offsets[0]
+        chunk = self._data[base:offsets[-1]].tobytes()
+        values: List[Any] = []
+        for position, null in enumerate(self.nulls[start:stop].tolist()):
+            if null:
+                values.append(None)
+                continue
+            text = chunk[offsets[position] - base:offsets[position + 1] - base].decode("utf-8")
+            values.append(json.loads(text) if self._nested else text)
+        return values
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._decode(start, max(start, stop))
+            return [self._decode(position, position + 1)[0] for position in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("column index out of range")
+        return self._decode(index, index + 1)[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self[:])
+
+    def tolist(self) -> List[Any]:
+        """Decode every value."""
+        return self[:]
+
+
+class ColumnarSnapshot:
+    """Read-only, memory-mapped view of a snapshot written by convert_csv.
+
+    Opening a snapshot reads only its manifest. Each column is mapped on
+    first access, and with ``columns`` given, no other column can be read.
+    """
+
+    def __init__(self, path: str, columns: Optional[Sequence[str]] = None):
+        """
+        Open a snapshot.
+
+        Args:
+            path: Snapshot directory
+            columns: Column projection; defaults to every column
+        """
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as file:
+            manifest = json.load(file)
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format')} in {path}")
+        self.source = manifest["source"]
+        self.rows = manifest["rows"]
+        self.created_at = manifest["created_at"]
+        self.types = {name: spec["type"] for name, spec in manifest["columns"].items()}
+        self._files = {name: spec["file"] for name, spec in manifest["columns"].items()}
+        if columns is not None:
+            unknown = [name for name in columns if name not in self.types]
+            if unknown:
+                raise ValueError(f"Unknown snapshot columns: {', '.join(unknown)}")
+            self.types = {name: self.types[name] for name in columns}
+        self._columns: Dict[str, Union[np.ndarray, TextColumn]] = {}
+
+    @property
+    def columns(self) -> List[str]:
+        """Names of the projected columns, in CSV order."""
+        return list(self.types)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> Union[np.ndarray, TextColumn]:
+        """
+        Return one column, memory-mapped.
+
+        Args:
+            name: Column name
+
+        Returns:
+            A read-only NumPy array for date, float and bool columns (see
+            nulls() for missing bools), or a TextColumn for str and json
+            columns
+        """
+        if name not in self.types:
+            raise KeyError(name)
+        column = self._columns.get(name)
+        if column is None:
+            path = os.path.join(self.path, self._files[name])
+            if self.types[name] in ("str", "json"):
+                offsets = np.load(path + ".offsets.npy", mmap_mode="r")
+                nulls = np.load(path + ".nulls.npy", mmap_mode="r")
+                size = os.path.getsize(path + ".data")
+                # np.memmap cannot map an empty file
+                data = np.memmap(path + ".data", dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+                column = TextColumn(data, offsets, nulls, nested=self.types[name] == "json")
+            else:
+                column = np.load(path + ".npy", mmap_mode="r")
+            self._columns[name] = column
+        return column
+
+    def nulls(self, name: str) -> np.ndarray:
+        """
+        Return a boolean mask of the missing values of a column.
+
+        Args:
+            name: Column name
+        """
+        kind = self.types.get(name)
+        if kind is None:
+            raise KeyError(name)
+        column = self.column(name)
+        if kind == "date":
+            return np.isnat(column)
+        if kind == "float":
+            return np.isnan(column)
+        if kind == "bool":
+            return np.load(os.path.join(self.path, self._files[name]) + ".nulls.npy", mmap_mode="r")
+        return column.nulls
+
+    def records(
+        self,
+        start: int = 0,
+        stop: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+        nested: bool = False
+    ) -> List[Dict]:
+        """
+        Materialize a range of rows as dicts.
+
+        Args:
+            start: First row
+            stop: Row after the last one; defaults to the end
+            columns: Columns to include; defaults to the projection
+            nested: Rebuild the API's nesting from flattened column names,
+                e.g. ``coreData_physicalAddress`` becomes
+                ``record["coreData"]["physicalAddress"]``
+
+        Returns:
+            One dict per row, with dates as ISO strings and missing values as None
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        names = list(columns) if columns is not None else self.columns
+        values: Dict[str, List[Any]] = {}
+        for name in names:
+            column = self.column(name)
+            kind = self.types[name]
+            if kind in ("str", "json"):
+                values[name] = column[start:stop]
+            elif kind == "date":
+                values[name] = [None if np.isnat(value) else str(value) for value in column[start:stop]]
+            elif kind == "float":
+                values[name] = [None if np.isnan(value) else value for value in column[start:stop].tolist()]
+            else:
+                missing = self.nulls(name)[start:stop]
+                values[name] = [None if null else value for value, null in zip(column[start:stop].tolist(), missing)]
+
+        records = []
+        for offset in range(stop - start):
+            record: Dict[str, Any] = {}
+            for name in names:
+                value = values[name][offset]
+                if nested and "_" in name:
+                    group, field = name.split("_", 1)
+                    record.setdefault(group, {})[field] = value
+                else:
+                    record[name] = value
+            records.append(record)
+        return records
+
+
+def open_snapshot(path: str, columns: Optional[Sequence[str]] = None) -> ColumnarSnapshot:
+    """
+    Open a snapshot directory, or the snapshot converted from a CSV path.
+
+    Args:
+        path: Snapshot directory, or the CSV export it was converted from
+        columns: Column projection; defaults to every column
+
+    Returns:
+        ColumnarSnapshot for the path
+    """
+    if path.endswith(".csv"):
+        path = os.path.splitext(path)[0] + ".snapshot"
+    return ColumnarSnapshot(path, columns)
+
+
+def main() -> None:
+    """Command-line entry point converting CSV exports."""
+    parser = argparse.ArgumentParser(description="Convert SAM.gov CSV exports into columnar snapshots")
+    parser.add_argument("csv", nargs="+", help="CSV export(s) to convert")
+    parser.add_argument("--output", help="Snapshot directory (only with a single CSV)")
+    parser.add_argument(
+        "--type", action="append", default=[], metavar="COLUMN=TYPE",
+        help=f"Override an inferred column type ({', '.join(COLUMN_TYPES)})"
+    )
+    args = parser.parse_args()
+    if args.output and len(args.csv) > 1:
+        parser.error("--output requires a single CSV")
+    try:
+        overrides = dict(item.split("=", 1) for item in args.type)
+    except ValueError:
+        parser.error("--type must look like COLUMN=TYPE")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for path in args.csv:
+        convert_csv(path, args.output, overrides)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""Cache warming after SAM.gov's overnight bulk update
+
+Every live search is recorded, normalized, in a query log with a
+frequency score that halves every ``half_life_days``. Shortly after the
+9 PM - 5 AM ET update window closes, CacheWarmer re-runs the top-K queries
+and rebuilds the reference catalogs, so the response cache (including the
+shared on-disk tier every worker reads) holds fresh results before
+business hours.
+
+Recording is an in-memory counter increment; counts are flushed to SQLite
+once a minute, so every worker contributes to one shared log and the log
+survives restarts. Each morning's run is claimed in the same database, so
+only one worker warms.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pytz
+
+from .async_sam_api import AsyncSAMAPIClient
+from .catalogs import CatalogStore
+from .rate_limiter import RateLimitExceeded
+from .response_cache import normalize_search_params
+from .sam_schedule import get_update_window_end, is_bulk_update_time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "sam_query_log.sqlite3")
+
+
+def normalize_query(filters: Dict) -> Dict:
+    """
+    Canonicalize search arguments for the query log.
+
+    Like the cache key normalization, except that a search without an
+    explicit date range keeps no dates, so re-running it tomorrow covers
+    tomorrow's default 90-day window rather than today's.
+    """
+    normalized = normalize_search_params(**filters)
+    if not (filters.get("posted_from") and filters.get("posted_to")):
+        normalized["posted_from"] = normalized["posted_to"] = None
+    return normalized
+
+
+class QueryLog:
+    """Decaying frequency count of normalized searches, shared through SQLite."""
+
+    def __init__(self, db_path: Optional[str] = None, half_life_days: float = 7.0, max_entries: int = 10_000):
+        """
+        Initialize the log.
+
+        Args:
+            db_path: SQLite database shared by all workers
+            half_life_days: Days after which a search's count weighs half
+            max_entries: Distinct searches kept; the least frequent are dropped
+        """
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.half_life = half_life_days * 86400
+        self.max_entries = max_entries
+        self._pending: Dict[str, Tuple[Dict, int, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        if self.db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS queries (
+                key TEXT PRIMARY KEY,
+                filters TEXT NOT NULL,
+                score REAL NOT NULL,
+                count INTEGER NOT NULL,
+                last_seen REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS warm_runs (
+                run TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                claimed_at REAL NOT NULL
+            )
+            """
+        )
+        self.recorded = 0
+
+    def _decayed(self, score: float, since: float, now: float) -> float:
+        return score * 0.5 ** (max(now - since, 0.0) / self.half_life)
+
+    def record(self, filters: Dict) -> None:
+        """
+        Count one search.
+
+        Args:
+            filters: Arguments of search_opportunities
+        """
+        normalized = normalize_query(filters)
+        key = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        now = time.time()
+        with self._pending_lock:
+            _, count, _ = self._pending.get(key, (None, 0, 0.0))
+            self._pending[key] = (normalized, count + 1, now)
+            self.recorded += 1
+
+    def flush(self) -> int:
+        """
+        Write recorded counts to the database.
+
+        Returns:
+            Number of distinct searches written
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, (filters, count, seen) in pending.items():
+                    row = self._conn.execute(
+                        "SELECT score, count, last_seen FROM queries WHERE key = ?", (key,)
+                    ).fetchone()
+                    score, total = float(count), count
+                    if row is not None:
+                        score += self._decayed(row[0], row[2], seen)
+                        total += row[1]
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO queries (key, filters, score, count, last_seen) VALUES (?, ?, ?, ?, ?)",
+                        (key, json.dumps(filters), score, total, seen)
+                    )
+                self._trim()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(pending)
+
+    def _trim(self) -> None:
+        excess = self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return
+        now = time.time()
+        rows = self._conn.execute("SELECT key, score, last_seen FROM queries").fetchall()
+        rows.sort(key=lambda row: self._decayed(row[1], row[2], now))
+        self._conn.executemany("DELETE FROM queries WHERE key = ?", [(row[0],) for row in rows[:excess]])
+
+    def top(self, k: int) -> List[Dict]:
+        """
+        Return the k most frequent searches, by decayed score.
+
+        Returns:
+            Normalized search arguments, most frequent first
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute("SELECT filters, score, last_seen FROM queries").fetchall()
+        rows.sort(key=lambda row: self._decayed(row[1], row[2], now), reverse=True)
+        return [json.loads(row[0]) for row in rows[:k]]
+
+    def claim_run(self, run: str, owner: str) -> bool:
+        """
+        Claim a warming run so only one worker performs it.
+
+        Args:
+            run: Identifier of the run, e.g. the date of the morning it warms
+            owner: Identifier of the caller (e.g. hostname and PID)
+
+        Returns:
+            True if the caller claimed the run, False if another did first
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO warm_runs (run, owner, claimed_at) VALUES (?, ?, ?)",
+                (run, owner, time.time())
+            )
+            self._conn.execute("DELETE FROM warm_runs WHERE claimed_at < ?", (time.time() - 30 * 86400,))
+        return cursor.rowcount == 1
+
+    def stats(self) -> Dict:
+        """Return the number of searches logged and pending a flush."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {"entries": entries, "pending": pending, "recorded": self.recorded}
+
+    def close(self) -> None:
+        """Flush pending counts and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+class CacheWarmer:
+    """Re-runs the most frequent searches and rebuilds catalogs into the caches."""
+
+    def __init__(
+        self,
+        client: AsyncSAMAPIClient,
+        query_log: QueryLog,
+        catalogs: Optional[CatalogStore] = None,
+        top_k: int = 50,
+        min_daily_remaining: int = 1000,
+        max_wait: float = 60.0
+    ):
+        """
+        Initialize the warmer.
+
+        Args:
+            client: Client whose API key pays for the warming calls
+            query_log: Log of searches to warm
+            catalogs: Catalog store to rebuild, if configured
+            top_k: Searches re-run per warming
+            min_daily_remaining: Daily quota left untouched for users
+            max_wait: Longest rate-limit wait for one search before giving up
+        """
+        self.client = client
+        self.query_log = query_log
+        self.catalogs = catalogs
+        self.top_k = top_k
+        self.min_daily_remaining = min_daily_remaining
+        self.max_wait = max_wait
+        self.running = False
+        self.last_run: Optional[Dict] = None
+        self.next_run: Optional[datetime] = None
+
+    async def _warm(self, filters: Dict) -> bool:
+        """Refresh one search, waiting for rate-limit tokens rather than queueing on them."""
+        deadline = time.monotonic() + self.max_wait
+        while True:
+            try:
+                return await self.client.prefetch_search(refresh=True, **filters)
+            except RateLimitExceeded as e:
+                # Only whole free tokens are used, so foreground requests never queue behind warming
+                if time.monotonic() + e.retry_after > deadline:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def run(self) -> Dict:
+        """
+        Warm the caches once.
+
+        Returns:
+            Counts of searches warmed, skipped and failed
+        """
+        self.running = True
+        started = time.time()
+        counts = {"warmed": 0, "failed": 0, "skipped_quota": 0, "catalogs": False}
+        try:
+            await asyncio.to_thread(self.query_log.flush)
+            queries = await asyncio.to_thread(self.query_log.top, self.top_k)
+            for index, filters in enumerate(queries):
+                if self.client.rate_limit_status()["daily_remaining"] < self.min_daily_remaining:
+                    counts["skipped_quota"] = len(queries) - index
+                    break
+                try:
+                    await self._warm(filters)
+                    counts["warmed"] += 1
+                except Exception as e:
+                    counts["failed"] += 1
+                    logger.debug(f"Could not warm {filters}: {str(e)}")
+            if self.catalogs is not None:
+                counts["catalogs"] = await self.catalogs.rebuild() is not None
+        finally:
+            self.running = False
+        self.last_run = dict(counts, started_at=started, seconds=round(time.time() - started, 1))
+        logger.info(f"Warmed {counts['warmed']} of the top {self.top_k} searches in {self.last_run['seconds']}s: {counts}")
+        return self.last_run
+
+    def stats(self) -> Dict:
+        """Return the log size, the last run's results and the next run time."""
+        return {
+            "top_k": self.top_k,
+            "running": self.running,
+            "next_run": self.next_run.isoformat() if self.next_run is not None else None,
+            "last_run": self.last_run,
+            "query_log": self.query_log.stats(),
+        }
+
+
+def next_warm_time(delay: float, grace: float, now: Optional[datetime] = None) -> datetime:
+    """
+    Time of the next warming run: ``delay`` seconds after the bulk window ends.
+
+    A run whose time passed less than ``grace`` seconds ago is still due, so a
+    worker started shortly after the window closes warms that morning.
+    """
+    eastern = pytz.timezone('US/Eastern')
+    now = now.astimezone(eastern) if now is not None else datetime.now(eastern)
+    window_end = get_update_window_end(now - timedelta(seconds=delay + grace))
+    return eastern.normalize(window_end + timedelta(seconds=delay))
+
+
+async def run_warming_schedule(
+    warmer: CacheWarmer,
+    delay: float = 600,
+    grace: float = 2 * 3600,
+    flush_interval: float = 60
+) -> None:
+    """
+    Flush the query log and warm the caches after every bulk update, forever.
+
+    Args:
+        warmer: Warmer to run
+        delay: Seconds after the update window closes (5 AM ET) to warm
+        grace: Seconds after the run time a late-starting worker still warms
+        flush_interval: Seconds between query log flushes
+    """
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    eastern = pytz.timezone('US/Eastern')
+    while True:
+        try:
+            await asyncio.to_thread(warmer.query_log.flush)
+            warmer.next_run = next_warm_time(delay, grace)
+            now = datetime.now(eastern)
+            if warmer.next_run <= now and not is_bulk_update_time():
+                run = warmer.next_run.strftime("%Y-%m-%d")
+                if await asyncio.to_thread(warmer.query_log.claim_run, run, owner):
+                    await warmer.run()
+                warmer.next_run = next_warm_time(delay, grace, warmer.next_run + timedelta(seconds=grace + 1))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache warming failed: {str(e)}")
+        remaining = (warmer.next_run - datetime.now(eastern)).total_seconds() if warmer.next_run else flush_interval
+        await asyncio.sleep(min(flush_interval, max(remaining, 1.0)))
@@ -0,0 +1,100 @@
+"""Benchmark facet counting over the local mirror
+
+Loads synthetic notices into a FacetIndex and times facet queries with no
+filter, one filter and several filters, and the incremental update for a
+batch of changed notices. Run from the repository root with::
+
+    python -m benchmarks.facets --sizes 100000 300000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from api.facets import FacetIndex
+from api.mirror import NOTICE_TYPES, OpportunityMirror
+from benchmarks.feature_pipeline import DEPARTMENTS, SETASIDES
+
+STATES = [
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DC", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+    "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH",
+    "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+]
+
+QUERIES = {
+    "no filter": {},
+    "naics": {"naics_code": "541512"},
+    "naics+state+set-aside": {"naics_code": "541512,541511", "place_of_performance_state": "VA", "set_aside": "SBA"},
+    "agency+type+30 days": {
+        "organization_id": "017", "status": "o,k",
+        "posted_from": (date.today() - timedelta(days=30)).isoformat(), "posted_to": date.today().isoformat(),
+    },
+}
+
+
+def synthetic_changes(count: int, seed: int = 0, start: int = 1) -> List[Dict]:
+    """Generate rows shaped like OpportunityMirror.changes_since results."""
+    rng = random.Random(seed)
+    today = date.today()
+    naics = [str(code) for code in rng.sample(range(111110, 999990), 1000)] + ["541512", "541511"]
+    rows = []
+    for rowid in range(start, start + count):
+        department = rng.randrange(len(DEPARTMENTS))
+        subtier, office = rng.randrange(20), rng.randrange(200)
+        rows.append({
+            "rowid": rowid,
+            "active": 1,
+            "posted_date": (today - timedelta(days=rng.randrange(90))).isoformat(),
+            "naics_code": rng.choice(naics),
+            "type_of_set_aside": rng.choice(SETASIDES),
+            "base_type": rng.choice(list(NOTICE_TYPES.values())),
+            "state": rng.choice(STATES),
+            "zipcode": f"{rng.randrange(100000):05d}",
+            "department_code": f"{department * 10 + 17:03d}",
+            "subtier_code": f"{department * 10 + 17:03d}{subtier:02d}",
+            "office_code": f"O{department}{subtier:02d}{office:03d}",
+            "full_parent_path_name": f"{DEPARTMENTS[department]}.SUBTIER {subtier}.OFFICE {office}",
+        })
+    return rows
+
+
+def run(size: int, repeat: int) -> Dict:
+    """Time loading, querying and updating an index of size notices."""
+    with tempfile.TemporaryDirectory() as directory:
+        index = FacetIndex(OpportunityMirror(os.path.join(directory, "mirror.sqlite3")))
+        rows = synthetic_changes(size)
+        started = time.perf_counter()
+        index.apply(rows)
+        result = {"notices": size, "load_s": round(time.perf_counter() - started, 2)}
+
+        for name, filters in QUERIES.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                facets = index.facets(**filters)
+            result[f"{name} ms"] = round((time.perf_counter() - started) / repeat * 1000, 2)
+            result[f"{name} total"] = facets["metadata"]["total"]
+
+        changed = synthetic_changes(1000, seed=1, start=size // 2)
+        started = time.perf_counter()
+        index.apply(changed)
+        result["update 1000 ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark facet counting")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 300_000], help="Notices indexed")
+    parser.add_argument("--repeat", type=int, default=20, help="Queries to average over")
+    args = parser.parse_args()
+    for size in args.sizes:
+        print(json.dumps(run(size, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
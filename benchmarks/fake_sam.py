@@ -0,0 +1,418 @@
+"""Local stand-in for the SAM.gov Opportunities API
+
+Replays recorded fixtures for the three endpoints the API talks to:
+
+- ``/opportunities/v2/search`` (searches, notice lookups, catalogs)
+- ``/opportunities/v1/noticedesc``
+- ``/opportunities/v3/resources/files/{id}/download`` (redirects to the file,
+  as SAM.gov redirects to its storage bucket)
+
+with configurable latency, server errors and 429 throttling, and counts
+every call so load tests can report upstream traffic. Point the API at it
+with ``SAM_API_ROOT=http://127.0.0.1:<port>``.
+
+Fixtures are a directory holding ``search.json`` (a list of notices, or a
+raw SAM.gov search response), optional ``descriptions.json`` (noticeId to
+description text) and optional ``resources/<resource id>`` files. Record
+them from the real API once with::
+
+    python -m benchmarks.fake_sam record --api-key KEY --output benchmarks/fixtures
+
+and serve them (or synthetic notices, when no fixtures are given) with::
+
+    python -m benchmarks.fake_sam serve --fixtures benchmarks/fixtures --port 8900 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response
+from starlette.routing import Route
+
+from api.sam_api import DEFAULT_API_ROOT
+from benchmarks.serialization import full_records
+
+SYNTHETIC_RESOURCE_BYTES = 256 * 1024
+
+
+class Fixtures:
+    """Notices, descriptions and resource files served by FakeSAM."""
+
+    def __init__(
+        self,
+        opportunities: List[Dict],
+        descriptions: Optional[Dict[str, str]] = None,
+        resources: Optional[Dict[str, bytes]] = None,
+        resource_bytes: int = SYNTHETIC_RESOURCE_BYTES
+    ):
+        """
+        Initialize the fixtures.
+
+        Args:
+            opportunities: SAM.gov search records
+            descriptions: Description text by noticeId; generated when missing
+            resources: File content by resource ID; generated when missing
+            resource_bytes: Size of generated resource files
+        """
+        self.opportunities = opportunities
+        self.by_id = {opportunity.get("noticeId"): opportunity for opportunity in opportunities}
+        self.descriptions = descriptions or {}
+        self.resources = resources or {}
+        self.resource_bytes = resource_bytes
+
+    @classmethod
+    def load(cls, directory: str) -> "Fixtures":
+        """Load fixtures recorded by ``record``."""
+        with open(os.path.join(directory, "search.json")) as file:
+            search = json.load(file)
+        opportunities = search.get("opportunitiesData", []) if isinstance(search, dict) else search
+        descriptions = {}
+        path = os.path.join(directory, "descriptions.json")
+        if os.path.exists(path):
+            with open(path) as file:
+                descriptions = json.load(file)
+        resources = {}
+        resource_dir = os.path.join(directory, "resources")
+        if os.path.isdir(resource_dir):
+            for name in os.listdir(resource_dir):
+                with open(os.path.join(resource_dir, name), "rb") as file:
+                    resources[name] = file.read()
+        return cls(opportunities, descriptions, resources)
+
+    @classmethod
+    def synthetic(cls, count: int = 2000, seed: int = 0) -> "Fixtures":
+        """Generate full-shape notices for when no recording is available."""
+        return cls(full_records(count, seed))
+
+    def resource_ids(self) -> List[str]:
+        """Resource IDs referenced by the notices' resourceLinks."""
+        ids = []
+        for opportunity in self.opportunities:
+            for link in opportunity.get("resourceLinks") or []:
+                ids.append(link.rstrip("/").split("/")[-2])
+        return ids or list(self.resources)
+
+    def description(self, notice_id: str) -> str:
+        text = self.descriptions.get(notice_id)
+        if text is None:
+            title = self.by_id.get(notice_id, {}).get("title", notice_id)
+            text = f"<p>{title}</p>" + "<p>Statement of work and submission instructions.</p>" * 40
+        return text
+
+    def resource(self, resource_id: str) -> bytes:
+        content = self.resources.get(resource_id)
+        if content is None:
+            block = hashlib.sha256(resource_id.encode()).digest()
+            content = (block * (self.resource_bytes // len(block) + 1))[:self.resource_bytes]
+        return content
+
+
+def _matches(opportunity: Dict, params) -> bool:
+    """Apply the handful of SAM.gov search filters the replay honours."""
+    keyword = params.get("q")
+    if keyword and keyword.lower() not in (opportunity.get("title") or "").lower():
+        return False
+    naics = params.get("naicsCodes")
+    if naics and opportunity.get("naicsCode") not in naics.split(","):
+        return False
+    set_aside = params.get("setAsides")
+    if set_aside and opportunity.get("typeOfSetAside") not in set_aside.split(","):
+        return False
+    state = params.get("placeOfPerformanceState")
+    if state and ((opportunity.get("placeOfPerformance") or {}).get("state") or {}).get("code") != state:
+        return False
+    return True
+
+
+class FakeSAM:
+    """ASGI app imitating the SAM.gov endpoints, with injected latency and faults."""
+
+    def __init__(
+        self,
+        fixtures: Fixtures,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialize the fake server.
+
+        Args:
+            fixtures: Data to replay
+            latency: Seconds added to every response
+            jitter: Uniform random extra latency, up to this many seconds
+            error_rate: Fraction of calls answered with 500 or 503
+            throttle_rate: Fraction of calls answered with 429 and Retry-After
+            seed: Seed for the fault and jitter random numbers
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.app = Starlette(routes=[
+            Route("/opportunities/v2/search", self.search),
+            Route("/opportunities/v1/noticedesc", self.notice_description),
+            Route("/opportunities/v3/resources/files/{resource_id}/download", self.resource_download),
+            Route("/files/{resource_id}", self.resource_file),
+            Route("/_stats", self.stats_endpoint),
+        ])
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+    async def _enter(self, endpoint: str, request: Request) -> Optional[Response]:
+        """Count the call, wait out the latency, and return a fault response if one is due."""
+        self.calls[endpoint] += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        response = None
+        if not request.headers.get("x-api-key"):
+            response = JSONResponse({"error": {"code": "API_KEY_MISSING"}}, status_code=403)
+        else:
+            roll = self._random.random()
+            if roll < self.throttle_rate:
+                response = JSONResponse(
+                    {"error": {"code": "OVER_RATE_LIMIT", "message": "Rate limit exceeded"}},
+                    status_code=429, headers={"Retry-After": "1"}
+                )
+            elif roll < self.throttle_rate + self.error_rate:
+                response = JSONResponse({"message": "Internal error"}, status_code=self._random.choice([500, 503]))
+        if response is not None:
+            self.statuses[f"{endpoint} {response.status_code}"] += 1
+        return response
+
+    def _ok(self, endpoint: str, response: Response) -> Response:
+        self.statuses[f"{endpoint} {response.status_code}"] += 1
+        return response
+
+    async def search(self, request: Request) -> Response:
+        fault = await self._enter("v2/search", request)
+        if fault is not None:
+            return fault
+        params = request.query_params
+        notice_id = params.get("noticeid")
+        if notice_id:
+            found = self.fixtures.by_id.get(notice_id)
+            matches = [found] if found is not None else []
+        else:
+            matches = [opportunity for opportunity in self.fixtures.opportunities if _matches(opportunity, params)]
+        limit = int(params.get("limit", "10"))
+        offset = int(params.get("offset", "0"))
+        return self._ok("v2/search", JSONResponse({
+            "totalRecords": len(matches),
+            "limit": limit,
+            "offset": offset,
+            "opportunitiesData": matches[offset:offset + limit],
+        }))
+
+    async def notice_description(self, request: Request) -> Response:
+        fault = await self._enter("v1/noticedesc", request)
+        if fault is not None:
+            return fault
+        return self._ok("v1/noticedesc", JSONResponse(
+            {"description": self.fixtures.description(request.query_params.get("noticeid", ""))}
+        ))
+
+    async def resource_download(self, request: Request) -> Response:
+        fault = await self._enter("v3/resources", request)
+        if fault is not None:
+            return fault
+        resource_id = request.path_params["resource_id"]
+        return self._ok("v3/resources", RedirectResponse(f"/files/{resource_id}", status_code=303))
+
+    async def resource_file(self, request: Request) -> Response:
+        resource_id = request.path_params["resource_id"]
+        return Response(
+            self.fixtures.resource(resource_id),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f'attachment; filename="{resource_id}.pdf"'}
+        )
+
+    async def stats_endpoint(self, request: Request) -> Response:
+        return JSONResponse(self.stats())
+
+    def stats(self) -> Dict:
+        """Return call counts per endpoint and per endpoint and status."""
+        return {"calls": dict(self.calls), "statuses": dict(self.statuses)}
+
+    def reset(self) -> None:
+        """Zero the call counters."""
+        self.calls.clear()
+        self.statuses.clear()
+
+
+class FakeSAMServer:
+    """Runs a FakeSAM under uvicorn on a background thread."""
+
+    def __init__(self, fake: FakeSAM, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake
+        self._server = uvicorn.Server(uvicorn.Config(fake, host=host, port=port, log_level="warning", lifespan="off"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Root URL to use as SAM_API_ROOT."""
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeSAMServer":
+        self._thread = threading.Thread(target=self._server.run, name="fake-sam", daemon=True)
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake SAM.gov server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+
+async def record(
+    api_key: str,
+    output: str,
+    days: int = 7,
+    max_notices: int = 2000,
+    descriptions: int = 50,
+    resources: int = 10,
+    max_resource_bytes: int = 5 * 1024 * 1024,
+    api_root: str = DEFAULT_API_ROOT
+) -> None:
+    """
+    Record fixtures from the real SAM.gov API.
+
+    Uses about ``max_notices / 1000 + descriptions + resources`` requests of
+    the key's daily quota.
+
+    Args:
+        api_key: SAM.gov API key
+        output: Fixture directory to write
+        days: Posting-date window to record notices from
+        max_notices: Notices to record
+        descriptions: Descriptions to record, for the first notices
+        resources: Resource files to record, from the first notices' links
+        max_resource_bytes: Skip resource files larger than this
+        api_root: SAM.gov API root
+    """
+    headers = {"X-Api-Key": api_key, "accept": "application/json"}
+    today = date.today()
+    opportunities: List[Dict] = []
+    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as http:
+        while len(opportunities) < max_notices:
+            response = await http.get(f"{api_root}/opportunities/v2/search", headers=headers, params={
+                "postedFrom": (today - timedelta(days=days)).strftime("%m/%d/%Y"),
+                "postedTo": today.strftime("%m/%d/%Y"),
+                "limit": str(min(1000, max_notices - len(opportunities))),
+                "offset": str(len(opportunities)),
+            })
+            response.raise_for_status()
+            page = response.json().get("opportunitiesData", [])
+            opportunities.extend(page)
+            if not page:
+                break
+
+        recorded_descriptions = {}
+        for opportunity in opportunities[:descriptions]:
+            notice_id = opportunity["noticeId"]
+            response = await http.get(
+                f"{api_root}/opportunities/v1/noticedesc", headers=headers, params={"noticeid": notice_id}
+            )
+            if response.status_code == 200:
+                recorded_descriptions[notice_id] = response.json().get("description", "")
+
+        os.makedirs(os.path.join(output, "resources"), exist_ok=True)
+        links = [link for opportunity in opportunities for link in opportunity.get("resourceLinks") or []]
+        for link in links[:resources]:
+            resource_id = link.rstrip("/").split("/")[-2]
+            response = await http.get(
+                f"{api_root}/opportunities/v3/resources/files/{resource_id}/download", headers=headers
+            )
+            if response.status_code == 200 and len(response.content) <= max_resource_bytes:
+                with open(os.path.join(output, "resources", resource_id), "wb") as file:
+                    file.write(response.content)
+
+    with open(os.path.join(output, "search.json"), "w") as file:
+        json.dump(opportunities, file)
+    with open(os.path.join(output, "descriptions.json"), "w") as file:
+        json.dump(recorded_descriptions, file)
+    print(f"Recorded {len(opportunities)} notices and {len(recorded_descriptions)} descriptions to {output}")
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the fixture, latency and fault options shared with the load test."""
+    parser.add_argument("--fixtures", help="Fixture directory (synthetic notices when omitted)")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds added to every upstream response")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Extra random upstream latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream calls failing with 500/503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of upstream calls answered with 429")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+
+def fake_from_arguments(args: argparse.Namespace) -> FakeSAM:
+    """Build a FakeSAM from add_fault_arguments options."""
+    fixtures = Fixtures.load(args.fixtures) if args.fixtures else Fixtures.synthetic(seed=args.seed)
+    return FakeSAM(
+        fixtures,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed
+    )
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Local stand-in for the SAM.gov Opportunities API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Serve fixtures")
+    add_fault_arguments(serve)
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8900)
+
+    recorder = commands.add_parser("record", help="Record fixtures from SAM.gov")
+    recorder.add_argument("--api-key", default=os.getenv("SAM_API_KEY"), help="SAM.gov API key")
+    recorder.add_argument("--output", required=True, help="Fixture directory to write")
+    recorder.add_argument("--days", type=int, default=7, help="Posting-date window to record")
+    recorder.add_argument("--notices", type=int, default=2000, help="Notices to record")
+    recorder.add_argument("--descriptions", type=int, default=50, help="Descriptions to record")
+    recorder.add_argument("--resources", type=int, default=10, help="Resource files to record")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        if not args.api_key:
+            parser.error("--api-key or SAM_API_KEY is required")
+        asyncio.run(record(
+            args.api_key, args.output, days=args.days, max_notices=args.notices,
+            descriptions=args.descriptions, resources=args.resources
+        ))
+        return
+    uvicorn.run(fake_from_arguments(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark the relevance feature pipeline
+
+Measures rows/sec for building feature matrices from synthetic SAM.gov
+search records: a cold pass, a fully cached pass, and a pass where 1% of
+notices were amended. Run from the repository root with::
+
+    python -m benchmarks.feature_pipeline --sizes 10000 100000
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from api.features import FeaturePipeline, feature_matrix
+from api.mirror import NOTICE_TYPES
+
+SETASIDES = [None, None, "SBA", "SBP", "8A", "HZC", "SDVOSBC", "WOSB", "EDWOSB", "VSA"]
+STATES = ["VA", "MD", "DC", "CA", "TX", "FL", "MA", "WA", "CO", "GA"]
+DEPARTMENTS = ["VETERANS AFFAIRS, DEPARTMENT OF", "DEPT OF DEFENSE", "HOMELAND SECURITY, DEPARTMENT OF",
+               "GENERAL SERVICES ADMINISTRATION", "INTERIOR, DEPARTMENT OF THE"]
+WORDS = ["repair", "services", "construction", "software", "maintenance", "medical", "supplies",
+         "cyber", "security", "building", "laundry", "upgrade", "network", "support", "janitorial"]
+
+
+def synthetic_opportunities(count: int, seed: int = 0) -> List[Dict]:
+    """Generate SAM.gov-shaped search records."""
+    rng = random.Random(seed)
+    today = date.today()
+    records = []
+    for index in range(count):
+        posted = today - timedelta(days=rng.randrange(90))
+        department = rng.choice(DEPARTMENTS)
+        records.append({
+            "noticeId": f"{index:032x}",
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 12))),
+            "fullParentPathName": f"{department}.SUBTIER {rng.randrange(20)}.OFFICE {rng.randrange(200)}",
+            "postedDate": posted.isoformat(),
+            "responseDeadLine": f"{posted + timedelta(days=rng.randrange(5, 60))}T16:00:00-04:00",
+            "baseType": rng.choice(list(NOTICE_TYPES.values())),
+            "typeOfSetAside": rng.choice(SETASIDES),
+            "naicsCode": str(rng.choice([236220, 541511, 541512, 561720, 339112])),
+            "placeOfPerformance": {"state": {"code": rng.choice(STATES)}},
+            "award": {"amount": str(rng.randrange(10_000, 5_000_000))} if rng.random() < 0.2 else None,
+            "active": "Yes",
+        })
+    return records
+
+
+def _rate(count: int, seconds: float) -> float:
+    return round(count / seconds) if seconds else float("inf")
+
+
+def run(size: int) -> Dict:
+    """Time the pipeline phases for one batch size."""
+    records = synthetic_opportunities(size)
+    pipeline = FeaturePipeline(cache_max_entries=size * 2)
+
+    started = time.perf_counter()
+    feature_matrix(records)
+    uncached = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pipeline.transform(records)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    pipeline.transform(records)
+    warm = time.perf_counter() - started
+
+    amended = [dict(record) for record in records]
+    for record in amended[::100]:
+        record["responseDeadLine"] = "2030-01-01T16:00:00-05:00"
+    computed_before = pipeline.computed
+    started = time.perf_counter()
+    pipeline.transform(amended)
+    incremental = time.perf_counter() - started
+
+    return {
+        "rows": size,
+        "uncached_rows_per_sec": _rate(size, uncached),
+        "cold_rows_per_sec": _rate(size, cold),
+        "cached_rows_per_sec": _rate(size, warm),
+        "amended_rows_per_sec": _rate(size, incremental),
+        "amended_rows_recomputed": pipeline.computed - computed_before,
+    }
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the relevance feature pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000], help="Batch sizes to time")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [run(size) for size in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{column:>24}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]:>24}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Load test the API against a local fake SAM.gov
+
+Starts benchmarks.fake_sam on a background thread, runs ``api.main:app``
+under uvicorn in a subprocess pointed at it (``SAM_API_ROOT``), and drives
+a fixed mix of search, detail, description and resource requests at each
+requested concurrency. Every level gets a fresh server process and empty
+caches. Reports throughput, p50/p95/p99 latency per request kind, upstream
+calls per SAM.gov endpoint, and the server's resident memory, and saves the
+results as JSON under ``benchmarks/results/`` for comparison between
+commits::
+
+    python -m benchmarks.load_test --concurrency 1 8 32 --requests 2000
+    python -m benchmarks.load_test compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.fake_sam import FakeSAM, FakeSAMServer, add_fault_arguments, fake_from_arguments
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, "benchmarks", "results")
+
+# Request kinds and their share of the workload
+DEFAULT_MIX = {"search": 0.6, "detail": 0.2, "description": 0.1, "resource": 0.1}
+
+KEYWORDS = ["repair", "services", "construction", "software", "maintenance", "medical", "cyber", "network"]
+NAICS = ["236220", "541511", "541512", "561720", "339112"]
+STATES = ["VA", "MD", "DC", "CA", "TX"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Tuple[Optional[str], bool]:
+    """Return the current commit and whether the tree has uncommitted changes."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, capture_output=True, text=True
+        ).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+
+
+def memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """Current and peak resident memory of a process, from /proc (Linux only)."""
+    fields = {"VmRSS": None, "VmHWM": None}
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        pass
+    return {"rss_kb": fields["VmRSS"], "peak_rss_kb": fields["VmHWM"]}
+
+
+def build_workload(fake: FakeSAM, count: int, distinct_queries: int, mix: Dict[str, float], seed: int) -> List[Tuple[str, str, Dict]]:
+    """
+    Build the request sequence: (kind, path, query params).
+
+    Searches are drawn from ``distinct_queries`` filter combinations, so the
+    response cache hit ratio rises over the run as it would with real users
+    re-running popular searches.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(distinct_queries):
+        params = {"limit": "25", "page": str(rng.randint(1, 3))}
+        if rng.random() < 0.6:
+            params["q"] = rng.choice(KEYWORDS)
+        if rng.random() < 0.4:
+            params["naics_codes"] = rng.choice(NAICS)
+        if rng.random() < 0.3:
+            params["state"] = rng.choice(STATES)
+        queries.append(params)
+    notice_ids = list(fake.fixtures.by_id)
+    resource_ids = fake.fixtures.resource_ids()
+
+    kinds, weights = zip(*mix.items())
+    workload = []
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        if kind == "search":
+            workload.append((kind, "/api/opportunities", rng.choice(queries)))
+        elif kind == "detail":
+            workload.append((kind, f"/api/opportunities/{rng.choice(notice_ids)}", {}))
+        elif kind == "description":
+            workload.append((kind, f"/api/opportunities/{rng.choice(notice_ids)}/description", {}))
+        elif resource_ids:
+            workload.append((kind, f"/api/opportunities/resources/{rng.choice(resource_ids)}", {}))
+    return workload
+
+
+class AppProcess:
+    """The API under uvicorn in a subprocess with private state directories."""
+
+    def __init__(self, sam_root: str, extra_env: Optional[Dict[str, str]] = None, workers: int = 1):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._state = tempfile.TemporaryDirectory(prefix="sam-load-")
+        env = dict(os.environ)
+        for name in ("SAM_MIRROR_DB", "SAM_API_KEY", "SAM_ENTITY_SNAPSHOT", "SAM_ALERTS_DB"):
+            env.pop(name, None)
+        env.update(
+            SAM_API_ROOT=sam_root,
+            SAM_RATE_LIMIT_DB=os.path.join(self._state.name, "rate_limits.sqlite3"),
+            SAM_CACHE_DB=os.path.join(self._state.name, "responses.sqlite3"),
+            SAM_RESOURCE_CACHE_DIR=os.path.join(self._state.name, "resources"),
+            # The fake server is the one being protected, so do not throttle in front of it
+            SAM_RATE_LIMIT_CALLS="1000000",
+            SAM_RATE_LIMIT_BURST="100000",
+            SAM_DAILY_QUOTA="100000000",
+        )
+        env.update(extra_env or {})
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(workers), "--log-level", "warning"],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    def wait_ready(self, timeout: float = 60) -> None:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"API server exited with status {self._process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/api/cache/stats", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("API server did not become ready")
+
+    def stop(self) -> None:
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._state.cleanup()
+
+
+async def drive(url: str, workload: List[Tuple[str, str, Dict]], concurrency: int, api_keys: int) -> Tuple[List, float]:
+    """
+    Send the workload with ``concurrency`` requests in flight.
+
+    Returns:
+        (kind, status, seconds) per request, and the wall-clock duration
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    samples = []
+    queue = iter(enumerate(workload))
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        async def worker():
+            for index, (kind, path, params) in queue:
+                headers = {"Authorization": f"Bearer load-test-key-{index % api_keys}"}
+                started = time.perf_counter()
+                try:
+                    response = await http.get(path, params=params, headers=headers)
+                    await response.aread()
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                samples.append((kind, status, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return samples, time.perf_counter() - started
+
+
+def summarize(samples: List, duration: float) -> Dict:
+    """Throughput and latency percentiles, overall and per request kind."""
+    def latency(values: List[float]) -> Dict[str, float]:
+        milliseconds = np.asarray(values) * 1000
+        p50, p95, p99 = np.percentile(milliseconds, [50, 95, 99])
+        return {
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(milliseconds.max()), 2),
+        }
+
+    by_kind = defaultdict(list)
+    for kind, _, seconds in samples:
+        by_kind[kind].append(seconds)
+    statuses = Counter(status for _, status, _ in samples)
+    errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+    return {
+        "requests": len(samples),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(samples) / duration, 1) if duration else None,
+        "error_ratio": round(errors / len(samples), 4) if samples else 0.0,
+        "latency": latency([seconds for _, _, seconds in samples]),
+        "by_kind": {kind: dict(latency(values), requests=len(values)) for kind, values in sorted(by_kind.items())},
+        "statuses": dict(statuses),
+    }
+
+
+def run_level(fake: FakeSAM, sam_root: str, workload: List, concurrency: int, args: argparse.Namespace) -> Dict:
+    """Run the workload at one concurrency against a fresh server."""
+    app = AppProcess(sam_root, workers=args.workers)
+    try:
+        app.wait_ready()
+        fake.reset()
+        samples, duration = asyncio.run(drive(app.url, workload, concurrency, args.api_keys))
+        result = summarize(samples, duration)
+        result["concurrency"] = concurrency
+        result["upstream"] = fake.stats()
+        result["upstream"]["total"] = sum(fake.calls.values())
+        result["memory"] = memory_kb(app.pid)
+        return result
+    finally:
+        app.stop()
+
+
+def print_run(result: Dict) -> None:
+    latency = result["latency"]
+    memory = result["memory"]
+    rss = f"{memory['rss_kb'] / 1024:.0f} MB (peak {memory['peak_rss_kb'] / 1024:.0f} MB)" if memory["rss_kb"] else "n/a"
+    print(
+        f"concurrency {result['concurrency']:>4}: {result['throughput_rps']:>8} req/s  "
+        f"p50 {latency['p50_ms']} ms  p95 {latency['p95_ms']} ms  p99 {latency['p99_ms']} ms  "
+        f"errors {result['error_ratio']:.2%}  upstream calls {result['upstream']['total']}  memory {rss}"
+    )
+    for kind, stats in result["by_kind"].items():
+        print(f"    {kind:<12} {stats['requests']:>6} requests  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  p99 {stats['p99_ms']} ms")
+
+
+def run(args: argparse.Namespace) -> None:
+    fake = fake_from_arguments(args)
+    workload = build_workload(fake, args.requests, args.distinct_queries, DEFAULT_MIX, args.seed)
+    server = FakeSAMServer(fake).start()
+    try:
+        runs = []
+        for concurrency in args.concurrency:
+            result = run_level(fake, server.url, workload, concurrency, args)
+            print_run(result)
+            runs.append(result)
+    finally:
+        server.stop()
+
+    commit, dirty = git_commit()
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "config": {
+            "requests": args.requests,
+            "distinct_queries": args.distinct_queries,
+            "api_keys": args.api_keys,
+            "workers": args.workers,
+            "mix": DEFAULT_MIX,
+            "fixtures": args.fixtures or "synthetic",
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "seed": args.seed,
+        },
+        "runs": runs,
+    }
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{(commit or 'unknown')[:8]}{'-dirty' if dirty else ''}.json")
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved {output}")
+
+
+COMPARED = [
+    ("throughput_rps", lambda run: run["throughput_rps"], True),
+    ("p50_ms", lambda run: run["latency"]["p50_ms"], False),
+    ("p95_ms", lambda run: run["latency"]["p95_ms"], False),
+    ("p99_ms", lambda run: run["latency"]["p99_ms"], False),
+    ("upstream_calls", lambda run: run["upstream"]["total"], False),
+    ("peak_rss_mb", lambda run: run["memory"]["peak_rss_kb"] and round(run["memory"]["peak_rss_kb"] / 1024, 1), False),
+]
+
+
+def compare(baseline_path: str, candidate_path: str) -> None:
+    """Print the change in each headline figure per concurrency level."""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(candidate_path) as file:
+        candidate = json.load(file)
+    if baseline["config"] != candidate["config"]:
+        print("warning: the runs used different configurations; figures may not be comparable")
+    print(f"baseline  {(baseline['commit'] or 'unknown')[:8]}  {baseline['created_at']}")
+    print(f"candidate {(candidate['commit'] or 'unknown')[:8]}  {candidate['created_at']}")
+    candidate_runs = {run["concurrency"]: run for run in candidate["runs"]}
+    for base_run in baseline["runs"]:
+        new_run = candidate_runs.get(base_run["concurrency"])
+        if new_run is None:
+            continue
+        print(f"concurrency {base_run['concurrency']}")
+        for name, value, higher_is_better in COMPARED:
+            old, new = value(base_run), value(new_run)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            better = (change > 0) == higher_is_better if change else None
+            verdict = "" if better is None else (" better" if better else " worse")
+            print(f"    {name:<16} {old:>10} -> {new:<10} {change:+7.1f}%{verdict}")
+
+
+def main() -> None:
+    """Command-line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test compare",
+                                         description="Compare two saved load test results")
+        parser.add_argument("baseline")
+        parser.add_argument("candidate")
+        args = parser.parse_args(sys.argv[2:])
+        compare(args.baseline, args.candidate)
+        return
+
+    parser = argparse.ArgumentParser(description="Load test the API against a local fake SAM.gov")
+    add_fault_arguments(parser)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Requests in flight per level")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per level")
+    parser.add_argument("--distinct-queries", type=int, default=50, help="Distinct search filter combinations")
+    parser.add_argument("--api-keys", type=int, default=4, help="API keys to spread requests over")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>-<commit>.json)")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
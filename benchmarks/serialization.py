@@ -0,0 +1,132 @@
+"""Benchmark search page serialization
+
+Measures body size and encode time for a page of full SAM.gov search
+records, with the standard-library encoder and with orjson, before and
+after a ``fields=`` projection to the list-view fields. Run from the
+repository root with::
+
+    python -m benchmarks.serialization --rows 100
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+from typing import Callable, Dict, List
+
+from api.projection import parse_fields, project_page
+from benchmarks.feature_pipeline import synthetic_opportunities
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LIST_FIELDS = "title,solicitationNumber,fullParentPathName,postedDate,responseDeadLine,typeOfSetAside,naicsCode"
+
+
+def full_records(count: int, seed: int = 0) -> List[Dict]:
+    """Generate search records with the contact, address and link fields SAM.gov returns."""
+    rng = random.Random(seed)
+    records = []
+    for record in synthetic_opportunities(count, seed):
+        notice_id = record["noticeId"]
+        records.append(dict(
+            record,
+            solicitationNumber=f"36C{rng.randrange(100, 999)}25R{rng.randrange(10000):04d}",
+            fullParentPathCode=f"036.3600.36C{rng.randrange(100, 999)}",
+            type=record["baseType"],
+            archiveType="autocustom",
+            archiveDate="2025-01-30",
+            typeOfSetAsideDescription="Service-Disabled Veteran-Owned Small Business (SDVOSB) Set-Aside (FAR 19.14)",
+            naicsCodes=[record["naicsCode"]],
+            classificationCode="Z2DZ",
+            pointOfContact=[
+                {"fax": "", "type": kind, "email": f"contact{rng.randrange(1000)}@agency.gov",
+                 "phone": f"{rng.randrange(200, 999)}-555-{rng.randrange(10000):04d}",
+                 "title": "Contracting Officer", "fullName": f"Contact {rng.randrange(1000)}"}
+                for kind in ("primary", "secondary")
+            ],
+            description=f"https://api.sam.gov/prod/opportunities/v1/noticedesc?noticeid={notice_id}",
+            organizationType="OFFICE",
+            officeAddress={"zipcode": "04330", "city": "TOGUS", "countryCode": "USA", "state": "ME"},
+            placeOfPerformance=dict(
+                record["placeOfPerformance"],
+                streetAddress="940 Belmont Street",
+                city={"code": "07000", "name": "Brockton"},
+                zip="02301-5596",
+                country={"code": "USA", "name": "UNITED STATES"},
+            ),
+            additionalInfoLink=None,
+            uiLink=f"https://sam.gov/opp/{notice_id}/view",
+            links=[{"rel": "self", "href": f"https://api.sam.gov/prod/opportunities/v2/search?noticeid={notice_id}&limit=1"}],
+            resourceLinks=[
+                f"https://sam.gov/api/prod/opps/v3/opportunities/resources/files/{rng.getrandbits(128):032x}/download"
+                for _ in range(rng.randrange(4))
+            ],
+        ))
+    return records
+
+
+def stdlib_dumps(content) -> bytes:
+    """Encode the way FastAPI's JSONResponse does."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def _time(encode: Callable, page: Dict, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(page)
+    return (time.perf_counter() - started) / repeat
+
+
+def run(rows: int, repeat: int, fields: str) -> List[Dict]:
+    """Time each encoder on a full and a projected page."""
+    page = {"totalRecords": rows * 40, "limit": rows, "offset": 0, "opportunities": full_records(rows)}
+    projection = parse_fields(fields)
+    encoders = [("stdlib", stdlib_dumps)]
+    if orjson is not None:
+        encoders.append(("orjson", orjson.dumps))
+
+    results = []
+    for projected in (False, True):
+        for name, encode in encoders:
+            if projected:
+                # Projection is part of the response path, so it is timed with the encode
+                step = lambda content, encode=encode: encode(project_page(content, projection))
+                body = step(page)
+            else:
+                step = encode
+                body = encode(page)
+            results.append({
+                "payload": "projected" if projected else "full",
+                "encoder": name,
+                "bytes": len(body),
+                "gzip_bytes": len(gzip.compress(body, compresslevel=6, mtime=0)),
+                "encode_ms": round(_time(step, page, repeat) * 1000, 3),
+            })
+    return results
+
+
+def main() -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark search page serialization")
+    parser.add_argument("--rows", type=int, default=100, help="Opportunities per page")
+    parser.add_argument("--repeat", type=int, default=200, help="Encodes to average over")
+    parser.add_argument("--fields", default=LIST_FIELDS, help="Projection for the trimmed page")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat, args.fields)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    columns = list(results[0])
+    print("  ".join(f"{column:>12}" for column in columns))
+    for result in results:
+        print("  ".join(f"{result[column]:>12}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()